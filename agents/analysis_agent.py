@@ -1,6 +1,18 @@
+import numpy as np
 import pandas as pd
+from utils.metrics import metrics
+from utils.records import AssetRecords, round_values
 
 class AnalysisAgent:
+    # Criterios eliminatorios previos al score
+    REQUIRED_FIELDS = ["rsi", "ema_short", "ema_long", "macd", "macd_signal", "adx", "atr_pct"]
+    PRESCREEN_MAX_RSI = 40
+    PRESCREEN_MIN_VOLUME_RATIO = 1.3
+    LEVEL_COLUMNS = [
+        "entry_optimal", "entry_max", "stop_loss", "target_1", "target_2", "target_3",
+        "rr_ratio_1", "rr_ratio_2", "rr_ratio_3", "risk_pct", "reward_1_pct", "reward_2_pct", "reward_3_pct"
+    ]
+
     def __init__(self, config):
         self.config = config
         self.thresholds = config.get("signal_thresholds", {})
@@ -194,78 +206,278 @@ class AnalysisAgent:
             "reward_3_pct": round((reward_3 / close) * 100, 2)
         }
 
-    def analyze(self, data_list):
+    def reevaluate_levels(self, asset, quote):
+        """
+        Revalúa el plan de un reporte detallado con la cotización actual.
+        Entrada, stop y objetivos se mantienen; riesgo, recorrido y R/R se
+        recalculan desde el precio actual y se marca si el stop o algún
+        objetivo ya se tocaron en alguna sesión desde el reporte (high y low
+        de la cotización son el máximo y el mínimo desde entonces).
+        """
+        price = quote["price"]
+        stop_loss = asset.get("stop_loss", 0)
+        report_close = asset.get("close", price)
+
+        updated = {
+            **asset,
+            "close": round(price, 2),
+            "report_close": report_close,
+            "change_pct": round((price / report_close - 1) * 100, 2) if report_close else 0.0,
+            "quote_date": quote.get("date"),
+        }
+
+        risk = price - stop_loss
+        updated["risk_pct"] = round((risk / price) * 100, 2)
+        for n in (1, 2, 3):
+            reward = asset.get(f"target_{n}", price) - price
+            updated[f"rr_ratio_{n}"] = round(reward / risk if risk > 0 else 0, 2)
+            updated[f"reward_{n}_pct"] = round((reward / price) * 100, 2)
+
+        # Mínimo/máximo desde el reporte para detectar niveles tocados
+        low = quote.get("low", price)
+        high = quote.get("high", price)
+        updated["stop_hit"] = bool(stop_loss and min(low, price) <= stop_loss)
+        updated["target_hit"] = max(
+            (n for n in (1, 2, 3) if asset.get(f"target_{n}") and max(high, price) >= asset[f"target_{n}"]),
+            default=0
+        )
+        return updated
+
+    def prescreen_mask(self, df):
+        """
+        Criterios eliminatorios de analyze() aplicados de forma vectorizada.
+        Retorna una máscara booleana sobre las filas del DataFrame.
+        """
+        mask = pd.Series(True, index=df.index)
+        for field in self.REQUIRED_FIELDS:
+            if field not in df:
+                return pd.Series(False, index=df.index)
+            mask &= df[field].notna()
+
+        # Mismas comparaciones que analyze() (un NaN no elimina, como en la versión escalar)
+        volume_ratio = df["volume_ratio"] if "volume_ratio" in df else pd.Series(0, index=df.index)
+        mask &= ~(df["rsi"] > self.PRESCREEN_MAX_RSI)
+        mask &= ~(df["adx"] < self.thresholds.get("adx_min", 25))
+        mask &= ~(df["atr_pct"] > self.thresholds.get("max_volatility_atr_pct", 1.5))
+        mask &= ~(volume_ratio < self.PRESCREEN_MIN_VOLUME_RATIO)
+        return mask
+
+    def prescreen(self, records):
+        """Descarta de golpe los activos que analyze() eliminaría antes del score."""
+        records = self._records(records)
+        if not len(records):
+            return records
+        fields = [f for f in self.REQUIRED_FIELDS + ["volume_ratio"] if f in records]
+        return records.take(self.prescreen_mask(records.frame(fields)).to_numpy())
+
+    @staticmethod
+    def _records(data):
+        """AssetRecords tal cual; las listas de dicts se convierten (compatibilidad)."""
+        return data if isinstance(data, AssetRecords) else AssetRecords.from_dicts(data)
+
+    def _column(self, df, name, default):
+        """Columna numérica del DataFrame (o el valor por defecto si no existe)."""
+        if name in df:
+            return pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=float)
+        values = np.empty(len(df))
+        values[:] = default
+        return values
+
+    @staticmethod
+    def _min(a, b):
+        """min() de Python elemento a elemento (un NaN en b no propaga)."""
+        return np.where(b < a, b, a)
+
+    @staticmethod
+    def _max(a, b):
+        """max() de Python elemento a elemento."""
+        return np.where(b > a, b, a)
+
+    def score_frame(self, df):
+        """
+        Versión vectorizada de calculate_score sobre un DataFrame de activos.
+        Mismos tramos y mismo orden de suma: los scores son idénticos.
+        """
+        col = lambda name, default: self._column(df, name, default)
+
+        # 1. RSI
+        rsi = col("rsi", 50)
+        rsi_score = np.select([rsi < 20, rsi < 25, rsi < 30, rsi < 35, rsi < 45], [10, 9, 8, 6, 4], 2)
+
+        # 2. Stochastic
+        stoch_k = col("stoch_k", 50)
+        stoch_cross = stoch_k > col("stoch_d", 50)
+        stoch_score = np.select(
+            [(stoch_k < 15) & stoch_cross, (stoch_k < 20) & stoch_cross, stoch_k < 20, stoch_k < 30],
+            [10, 9, 7, 5], 3
+        )
+
+        # 3. EMAs
+        ema_short = col("ema_short", 0)
+        ema_long = col("ema_long", 0)
+        ema_trend = col("ema_trend", 0)
+        ema_score = np.select(
+            [(ema_short > ema_long) & (ema_long > ema_trend), ema_short > ema_long, ema_short > ema_trend],
+            [10, 8, 6], 3
+        )
+
+        # 4. MACD
+        macd = col("macd", 0)
+        macd_signal = col("macd_signal", 0)
+        macd_hist = col("macd_histogram", 0)
+        macd_up = macd > macd_signal
+        macd_score = np.select(
+            [macd_up & (macd_hist > 0) & (macd_hist > col("prev_macd_hist", 0)),
+             macd_up & (macd_hist > 0), macd_up, macd_hist > 0],
+            [10, 8, 6, 4], 2
+        )
+
+        # 5. Volumen
+        volume_ratio = col("volume_ratio", 1.0)
+        volume_score = np.select(
+            [volume_ratio > 2.5, volume_ratio > 2.0, volume_ratio > 1.8, volume_ratio > 1.5, volume_ratio > 1.2],
+            [10, 9, 8, 6, 4], 2
+        )
+
+        # 6. Volatilidad/ATR
+        atr_pct = col("atr_pct", 2.0)
+        volatility_score = np.select(
+            [atr_pct < 0.8, atr_pct < 1.2, atr_pct < 1.5, atr_pct < 2.0], [10, 9, 7, 5], 2
+        )
+
+        # 7. ADX
+        adx = col("adx", 0)
+        adx_score = np.select([adx > 40, adx > 30, adx > 25, adx > 20], [10, 9, 7, 5], 2)
+
+        score = np.zeros(len(df))
+        score += rsi_score * self.weights.get("rsi_weight", 0.20)
+        score += stoch_score * self.weights.get("stochastic_weight", 0.15)
+        score += ema_score * self.weights.get("ema_weight", 0.15)
+        score += macd_score * self.weights.get("macd_weight", 0.15)
+        score += volume_score * self.weights.get("volume_weight", 0.15)
+        score += volatility_score * self.weights.get("volatility_weight", 0.10)
+        score += adx_score * self.weights.get("adx_weight", 0.10)
+        return round_values(score, 2)
+
+    def levels_frame(self, df):
+        """Versión por columnas de calculate_entry_exit_levels. Retorna un DataFrame."""
+        close = self._column(df, "close", 0)
+        keltner_lower = self._column(df, "keltner_lower", close)
+        keltner_mid = self._column(df, "keltner_mid", close)
+        keltner_upper = self._column(df, "keltner_upper", close)
+        supertrend = self._column(df, "supertrend", close)
+
+        targets_config = self.config.get("targets", {})
+
+        entry_optimal = self._min(close, keltner_lower * 1.002)
+
+        stop_loss_pct = targets_config.get("stop_loss_pct", 1.0) / 100
+        stop_loss_price = close * (1 - stop_loss_pct)
+        stop_loss_supertrend = np.where(supertrend < close, supertrend, stop_loss_price)
+        stop_loss = self._max(stop_loss_price, stop_loss_supertrend)
+
+        target_conservative = close * (1 + targets_config.get("profit_target_conservative", 5.0) / 100)
+        target_normal = close * (1 + targets_config.get("profit_target_pct", 7.0) / 100)
+        target_aggressive = close * (1 + targets_config.get("profit_target_aggressive", 10.0) / 100)
+
+        target_1 = self._min(target_conservative, keltner_mid)
+        target_2 = self._min(target_normal, keltner_upper * 0.98)
+        target_3 = target_aggressive
+
+        risk = close - stop_loss
+        reward_1 = target_1 - close
+        reward_2 = target_2 - close
+        reward_3 = target_3 - close
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rr_ratio_1 = np.where(risk > 0, reward_1 / risk, 0)
+            rr_ratio_2 = np.where(risk > 0, reward_2 / risk, 0)
+            rr_ratio_3 = np.where(risk > 0, reward_3 / risk, 0)
+
+            return pd.DataFrame({
+                "entry_optimal": round_values(entry_optimal, 2),
+                "entry_max": round_values(close, 2),
+                "stop_loss": round_values(stop_loss, 2),
+                "target_1": round_values(target_1, 2),
+                "target_2": round_values(target_2, 2),
+                "target_3": round_values(target_3, 2),
+                "rr_ratio_1": round_values(rr_ratio_1, 2),
+                "rr_ratio_2": round_values(rr_ratio_2, 2),
+                "rr_ratio_3": round_values(rr_ratio_3, 2),
+                "risk_pct": round_values((risk / close) * 100, 2),
+                "reward_1_pct": round_values((reward_1 / close) * 100, 2),
+                "reward_2_pct": round_values((reward_2 / close) * 100, 2),
+                "reward_3_pct": round_values((reward_3 / close) * 100, 2)
+            }, index=df.index)
+
+    def analyze_frame(self, df):
+        """
+        Ruta por lotes de analyze(): filtros eliminatorios como máscaras,
+        score y niveles por columnas. Retorna un DataFrame con los activos que
+        pasan, en el orden de entrada (el ranking lo hace SelectorAgent).
+        """
+        if df.empty:
+            return df.iloc[0:0]
+
+        mask = self.prescreen_mask(df).to_numpy()
+        df = df[mask]
+        if df.empty:
+            return df
+
+        # Calcular score (solo se procesan scores >= 8.0)
+        scores = self.score_frame(df)
+        df = df[scores >= 8.0].assign(score=scores[scores >= 8.0])
+        if df.empty:
+            return df
+
+        # Validar ratio R/R mínimo
+        levels = self.levels_frame(df)
+        min_rr = self.config.get("targets", {}).get("min_risk_reward_ratio", 5.0)
+        keep = ~(levels["rr_ratio_2"].to_numpy() < min_rr)
+        df = df[keep]
+        levels = levels[keep]
+        if df.empty:
+            return df
+
+        green_threshold = self.weights.get("green_threshold", 8.5)
+        yellow_threshold = self.weights.get("yellow_threshold", 8.0)
+        score = df["score"].to_numpy()
+        indicator = np.select([score >= green_threshold, score >= yellow_threshold], ["🟢", "🟡"], "🔴")
+        strength = np.select([score >= green_threshold, score >= yellow_threshold], ["MUY FUERTE", "FUERTE"], "DÉBIL")
+
+        # Determinar tipo de señal
+        rsi = self._column(df, "rsi", 50)
+        close = self._column(df, "close", 0)
+        signal = np.select(
+            [(rsi < 25) & (close <= self._column(df, "keltner_lower", 0) * 1.01),
+             (rsi < 30) & (self._column(df, "ema_short", 0) > self._column(df, "ema_long", 0)),
+             (rsi >= 30) & (rsi <= 35)],
+            ["🎯 Rebote alcista PREMIUM", "📈 Rebote alcista confirmado", "⚡ Corrección controlada"],
+            "✅ Oportunidad de entrada"
+        )
+
+        out = df.drop(columns=[c for c in self.LEVEL_COLUMNS if c in df])
+        out = pd.concat([out.assign(indicator=indicator, strength=strength, signal=signal), levels], axis=1)
+        return out
+
+    @metrics.timed("stage_seconds", stage="analyze")
+    def analyze(self, records):
         """Analiza y filtra solo las mejores oportunidades."""
-        results = []
         print("🔬 Analizando con criterios ultra-estrictos...")
+        records = self._records(records)
+        if not len(records):
+            print(f"✅ Análisis completado: 0 señales de calidad 8+/10 detectadas.")
+            return records
+
+        fields = [f for f in records.fields if records.array.dtype[f].kind in "fiu"]
+        frame = self.analyze_frame(records.frame(fields))
+
+        # Solo se copian las filas que pasan, con las columnas del análisis al final
+        columns = ["score", "indicator", "strength", "signal"] + self.LEVEL_COLUMNS
+        results = records.take(frame.index.to_numpy()).with_columns(
+            {c: frame[c].to_numpy() if c in frame else np.empty(0) for c in columns},
+            {c: 2 for c in ["score"] + self.LEVEL_COLUMNS}
+        )
 
-        for asset in data_list:
-            try:
-                # Validaciones básicas
-                required_fields = ["rsi", "ema_short", "ema_long", "macd", "macd_signal", "adx", "atr_pct"]
-                if any(asset.get(f) is None or pd.isna(asset.get(f)) for f in required_fields):
-                    continue
-
-                # FILTRO PRE-SCORE: Eliminar valores que no cumplen mínimos
-                rsi = asset.get("rsi", 50)
-                adx = asset.get("adx", 0)
-                atr_pct = asset.get("atr_pct", 5.0)
-                volume_ratio = asset.get("volume_ratio", 0)
-                
-                # Criterios eliminatorios
-                if rsi > 40:  # Debe estar en zona de sobreventa
-                    continue
-                if adx < self.thresholds.get("adx_min", 25):  # Tendencia debe ser fuerte
-                    continue
-                if atr_pct > self.thresholds.get("max_volatility_atr_pct", 1.5):  # Volatilidad controlada
-                    continue
-                if volume_ratio < 1.3:  # Debe haber interés
-                    continue
-                
-                # Calcular score
-                score = self.calculate_score(asset)
-                
-                # Solo procesar si score >= 8.0
-                if score < 8.0:
-                    continue
-                
-                indicator, strength = self.get_signal_strength(score)
-                levels = self.calculate_entry_exit_levels(asset)
-                
-                # Validar ratio R/R mínimo
-                min_rr = self.config.get("targets", {}).get("min_risk_reward_ratio", 5.0)
-                if levels["rr_ratio_2"] < min_rr:
-                    continue  # No cumple R/R mínimo
-                
-                # Determinar tipo de señal
-                ema_short = asset.get("ema_short", 0)
-                ema_long = asset.get("ema_long", 0)
-                close = asset.get("close", 0)
-                keltner_lower = asset.get("keltner_lower", 0)
-                
-                if rsi < 25 and close <= keltner_lower * 1.01:
-                    signal = "🎯 Rebote alcista PREMIUM"
-                elif rsi < 30 and ema_short > ema_long:
-                    signal = "📈 Rebote alcista confirmado"
-                elif 30 <= rsi <= 35:
-                    signal = "⚡ Corrección controlada"
-                else:
-                    signal = "✅ Oportunidad de entrada"
-                
-                results.append({
-                    **asset,
-                    "score": score,
-                    "indicator": indicator,
-                    "strength": strength,
-                    "signal": signal,
-                    **levels
-                })
-
-            except Exception as e:
-                print(f"⚠️ Error analizando {asset.get('symbol', '?')}: {e}")
-
-        # Ordenar por score descendente
-        results = sorted(results, key=lambda x: x["score"], reverse=True)
-        
         print(f"✅ Análisis completado: {len(results)} señales de calidad 8+/10 detectadas.")
         return results
@@ -0,0 +1,373 @@
+"""
+Backtest walk-forward de las reglas de scoring sobre el histórico local.
+
+Los indicadores se calculan una sola vez para todo el histórico con el motor
+de panel (cada valor en la barra t solo usa barras <= t) y se alinean en un
+calendario común de fechas. Después se recorre el tiempo día a día: al cierre
+de cada sesión se aplican AnalysisAgent.analyze_frame y SelectorAgent.select_top
+igual que en producción, y las señales se ejecutan en las sesiones siguientes
+con su entry_max, stop_loss y objetivo.
+
+Limitaciones conocidas:
+- Los filtros de calidad y sentiment no se reproducen (no hay histórico de
+  fundamentales ni de noticias).
+- Las EMAs arrancan al inicio del histórico, no al inicio de la ventana de
+  lookback_days que usa producción, así que llegan más convergidas.
+"""
+
+import time
+import numpy as np
+import pandas as pd
+from agents.data_agent import DataAgent, RECORD_FIELDS
+from agents.analysis_agent import AnalysisAgent
+from agents.selector_agent import SelectorAgent
+from utils.indicators import build_panel, compute_indicator_panel, _shift, OPEN, HIGH, LOW, CLOSE
+from utils.records import AssetRecords, round_values
+
+MIN_BARS = 60  # Igual que DataAgent.batch_download
+
+
+class BacktestAgent:
+    def __init__(self, config):
+        self.config = config
+        backtest_config = config.get("backtest", {})
+        self.years = backtest_config.get("years", 10)
+        self.horizon_days = backtest_config.get("horizon_days", 5)
+        self.entry_days = backtest_config.get("entry_days", 1)
+        self.target = backtest_config.get("target", "target_2")
+
+        profile = config.get("profile", {})
+        self.max_positions = profile.get("max_positions", 2)
+        self.capital_per_trade = profile.get("capital_per_trade", 2500)
+
+        self.analysis_agent = AnalysisAgent(config)
+        self.selector = SelectorAgent(config)
+
+    def load_history(self, symbols, download=False):
+        """
+        Lee el histórico de data_cache/prices. Con download=True descarga antes
+        `years` años completos y los fusiona en el almacén.
+        """
+        data_agent = DataAgent(symbols, self.config)
+        store = data_agent.price_store
+        if store is None:
+            print("⚠️ price_store desactivado en config.json: no hay histórico local.")
+            return {}
+
+        # PriceStore.save recorta a max_history_days en cada escritura (también la del análisis diario)
+        max_days = store.max_history_days
+        if max_days and self.years * 365 > max_days:
+            print(f"⚠️ backtest.years={self.years} supera price_store.max_history_days={max_days}: "
+                  f"el histórico se recorta a {max_days / 365:.1f} años. Sube max_history_days en config.json.")
+
+        if download:
+            print(f"📥 Descargando {self.years} años de {len(symbols)} símbolos...")
+            for s, df in data_agent._fetch(symbols, period=f"{self.years}y").items():
+                store.merge(s, df)
+
+        prices = {}
+        for s in symbols:
+            df = store.load(s)
+            if df is not None and len(df) >= MIN_BARS:
+                prices[s] = df
+        print(f"💾 Histórico disponible: {len(prices)}/{len(symbols)} símbolos")
+
+        if prices:
+            first = min(df.index[0] for df in prices.values())
+            requested = pd.Timestamp.today().normalize() - pd.DateOffset(years=self.years)
+            if first > requested + pd.Timedelta(days=7):
+                print(f"⚠️ El histórico empieza el {first:%Y-%m-%d}: cubre menos de los {self.years} años pedidos")
+        return prices
+
+    def build_timeline(self, prices):
+        """
+        Calcula los indicadores de todo el histórico y los alinea por fecha.
+        Retorna (fechas, símbolos, precios OHLC, registros) con arrays
+        (días × símbolos); NaN donde el símbolo no cotiza ese día.
+        """
+        symbols = list(prices)
+        frames = [prices[s] for s in symbols]
+        days = [df.index.values.astype("datetime64[D]") for df in frames]
+        dates = np.unique(np.concatenate(days))
+        positions = [np.searchsorted(dates, d) for d in days]
+
+        panel = build_panel(frames)
+        indicators = compute_indicator_panel(panel, self.config.get("indicators", {}))
+        length = panel.shape[1]
+
+        def align(values):
+            out = np.full((len(dates), len(symbols)), np.nan)
+            for j, pos in enumerate(positions):
+                out[pos, j] = values[j, length - len(pos):]
+            return out
+
+        ohlc = {name: align(panel[:, :, k]) for name, k in
+                (("open", OPEN), ("high", HIGH), ("low", LOW), ("close", CLOSE))}
+
+        # Registros por día con el mismo redondeo que DataAgent.build_panel_records
+        close = indicators["Close"]
+        records = {}
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for key, column, digits in RECORD_FIELDS:
+                if key == "atr_pct":
+                    records[key] = align(round_values(indicators["ATR"] / close * 100, digits))
+                elif digits is None:
+                    records[key] = align(indicators[column])
+                else:
+                    records[key] = align(round_values(indicators[column], digits))
+
+        # Tendencia por pendiente de 20 barras, como utils.indicators.trend
+        slope = align((close - _shift(close, 19)) / 20)
+        records["trend"] = np.where(slope > 0.5, "alcista", np.where(slope < -0.5, "bajista", "lateral"))
+
+        bars = np.full((len(symbols), length), np.nan)
+        for j, pos in enumerate(positions):
+            bars[j, length - len(pos):] = np.arange(1, len(pos) + 1)
+        records["bars"] = align(bars)
+
+        return dates, np.array(symbols, dtype=object), ohlc, records
+
+    def candidate_mask(self, records):
+        """
+        Máscara (días × símbolos) de activos que cotizan con histórico suficiente
+        y superan los filtros eliminatorios de AnalysisAgent. Se evalúa de una
+        vez para todo el histórico; el score solo se calcula en estas filas.
+        """
+        valid = (records["bars"] >= MIN_BARS) & ~np.isnan(records["close"]) & ~np.isnan(records["st_direction"])
+        fields = AnalysisAgent.REQUIRED_FIELDS + ["volume_ratio"]
+        flat = pd.DataFrame({field: np.asarray(records[field]).ravel() for field in fields})
+        return valid & self.analysis_agent.prescreen_mask(flat).to_numpy().reshape(valid.shape)
+
+    def signals_for_day(self, t, symbols, records, candidates):
+        """Aplica analyze_frame + select_top a los candidatos del día t."""
+        rows = candidates[t]
+        if not rows.any():
+            return []
+
+        columns = {"symbol": symbols[rows]}
+        for key, values in records.items():
+            if key != "bars":
+                columns[key] = values[t, rows]
+        columns["st_direction"] = columns["st_direction"].astype(int)
+
+        frame = self.analysis_agent.analyze_frame(pd.DataFrame(columns))
+        if frame.empty:
+            return []
+        candidates = AssetRecords.from_columns({c: frame[c].to_numpy() for c in frame})
+        return self.selector.select_top(candidates, verbose=False).to_dicts()
+
+    def _exit_price(self, position, o, h, l, allow_target=True):
+        """Precio y motivo de salida en la barra (stop antes que objetivo)."""
+        if o <= position["stop_loss"]:
+            return o, "stop"
+        if l <= position["stop_loss"]:
+            return position["stop_loss"], "stop"
+        if allow_target:
+            if o >= position["target"]:
+                return o, "objetivo"
+            if h >= position["target"]:
+                return position["target"], "objetivo"
+        return None, None
+
+    def run(self, prices):
+        """Calcula la línea temporal y simula las operaciones. Retorna el resumen."""
+        start_time = time.time()
+        dates, symbols, ohlc, records = self.build_timeline(prices)
+        print(f"⚡ Indicadores de {len(symbols)} símbolos × {len(dates)} días "
+              f"en {time.time() - start_time:.1f}s")
+
+        loop_start = time.time()
+        result = self.simulate(dates, symbols, ohlc, records)
+        print(f"⏱️ Simulación de {len(dates)} sesiones en {time.time() - loop_start:.1f}s")
+        result["summary"]["elapsed_sec"] = round(time.time() - start_time, 2)
+        return result
+
+    def simulate(self, dates, symbols, ohlc, records):
+        """Recorre la línea temporal de build_timeline() día a día."""
+        start_time = time.time()
+        candidates = self.candidate_mask(records)
+        initial = self.max_positions * self.capital_per_trade
+        realized = 0.0
+        pending = []    # Órdenes de compra a la espera de ejecutarse
+        open_positions = []
+        trades = []
+        equity = np.full(len(dates), initial, dtype=float)
+        signals = 0
+        expired = 0
+
+        for t in range(len(dates)):
+            o_row, h_row, l_row, c_row = ohlc["open"][t], ohlc["high"][t], ohlc["low"][t], ohlc["close"][t]
+
+            # 1. Salidas de posiciones abiertas
+            still_open = []
+            for position in open_positions:
+                j = position["column"]
+                if np.isnan(c_row[j]):
+                    still_open.append(position)
+                    continue
+                position["bars_held"] += 1
+                price, reason = self._exit_price(position, o_row[j], h_row[j], l_row[j])
+                if price is None and position["bars_held"] >= self.horizon_days:
+                    price, reason = c_row[j], "tiempo"
+                if price is None:
+                    position["last_close"] = c_row[j]
+                    still_open.append(position)
+                    continue
+                trades.append(self._close(position, price, reason, dates[t]))
+                realized += trades[-1]["pnl"]
+            open_positions = still_open
+
+            # 2. Entradas de órdenes pendientes
+            still_pending = []
+            for order in pending:
+                j = order["column"]
+                if np.isnan(c_row[j]):
+                    still_pending.append(order)
+                    continue
+                order["bars_waited"] += 1
+                if o_row[j] <= order["entry_max"]:
+                    fill = o_row[j]
+                elif l_row[j] <= order["entry_max"]:
+                    fill = order["entry_max"]
+                else:
+                    if order["bars_waited"] < self.entry_days:
+                        still_pending.append(order)
+                    else:
+                        expired += 1
+                    continue
+                if fill <= order["stop_loss"]:
+                    expired += 1
+                    continue
+
+                position = {**order, "entry_price": fill, "entry_date": dates[t],
+                            "bars_held": 1, "last_close": c_row[j]}
+                # Si se entra con límite dentro de la barra, no se sabe si el máximo
+                # fue antes o después: solo se comprueba el stop
+                price, reason = self._exit_price(position, o_row[j], h_row[j], l_row[j],
+                                                 allow_target=fill == o_row[j])
+                if price is None and self.horizon_days <= 1:
+                    price, reason = c_row[j], "tiempo"
+                if price is None:
+                    open_positions.append(position)
+                else:
+                    trades.append(self._close(position, price, reason, dates[t]))
+                    realized += trades[-1]["pnl"]
+            pending = still_pending
+
+            # 3. Señales al cierre
+            busy = {p["symbol"] for p in open_positions} | {p["symbol"] for p in pending}
+            free_slots = self.max_positions - len(open_positions) - len(pending)
+            if free_slots > 0 and t + 1 < len(dates):
+                column_of = None
+                for asset in self.signals_for_day(t, symbols, records, candidates):
+                    signals += 1
+                    if free_slots <= 0 or asset["symbol"] in busy:
+                        continue
+                    if column_of is None:
+                        column_of = {s: j for j, s in enumerate(symbols)}
+                    pending.append({
+                        "symbol": asset["symbol"],
+                        "column": column_of[asset["symbol"]],
+                        "signal_date": dates[t],
+                        "score": asset["score"],
+                        "entry_max": asset["entry_max"],
+                        "stop_loss": asset["stop_loss"],
+                        "target": asset[self.target],
+                        "bars_waited": 0,
+                    })
+                    busy.add(asset["symbol"])
+                    free_slots -= 1
+
+            # Valor de la cartera a precio de cierre
+            unrealized = sum(
+                self.capital_per_trade * (p["last_close"] / p["entry_price"] - 1) for p in open_positions
+            )
+            equity[t] = initial + realized + unrealized
+
+        # Posiciones que siguen abiertas al final del histórico
+        for position in open_positions:
+            trades.append(self._close(position, position["last_close"], "fin", dates[-1]))
+
+        summary = self.summarize(trades, equity, initial)
+        summary.update({
+            "symbols": len(symbols),
+            "start": str(dates[0]),
+            "end": str(dates[-1]),
+            "sessions": len(dates),
+            "signals": signals,
+            "expired_orders": expired,
+            "elapsed_sec": round(time.time() - start_time, 2),
+        })
+        return {"summary": summary, "trades": trades}
+
+    def _close(self, position, price, reason, date):
+        ret = float(price / position["entry_price"] - 1)
+        risk = float(1 - position["stop_loss"] / position["entry_price"])
+        return {
+            "symbol": position["symbol"],
+            "signal_date": str(position["signal_date"]),
+            "entry_date": str(position["entry_date"]),
+            "exit_date": str(date),
+            "score": position["score"],
+            "entry_price": round(float(position["entry_price"]), 4),
+            "exit_price": round(float(price), 4),
+            "reason": reason,
+            "bars_held": position["bars_held"],
+            "return_pct": round(ret * 100, 4),
+            "r_multiple": round(ret / risk, 4) if risk > 0 else None,
+            "pnl": round(self.capital_per_trade * ret, 2),
+        }
+
+    def summarize(self, trades, equity, initial):
+        """Tasa de acierto, esperanza y drawdown."""
+        if not trades:
+            return {"trades": 0}
+
+        returns = np.array([t["return_pct"] for t in trades])
+        r_multiples = np.array([t["r_multiple"] for t in trades if t["r_multiple"] is not None])
+        wins = returns[returns > 0]
+        losses = returns[returns <= 0]
+        reasons = pd.Series([t["reason"] for t in trades]).value_counts()
+
+        peak = np.maximum.accumulate(equity)
+        drawdown = (equity / peak - 1) * 100
+
+        return {
+            "trades": len(trades),
+            "hit_rate_pct": round(len(wins) / len(trades) * 100, 2),
+            "avg_win_pct": round(float(wins.mean()), 3) if len(wins) else 0.0,
+            "avg_loss_pct": round(float(losses.mean()), 3) if len(losses) else 0.0,
+            "expectancy_pct": round(float(returns.mean()), 3),
+            "expectancy_r": round(float(r_multiples.mean()), 3) if len(r_multiples) else None,
+            "profit_factor": round(float(wins.sum() / -losses.sum()), 2) if losses.sum() < 0 else None,
+            "exits": {reason: int(count) for reason, count in reasons.items()},
+            "avg_bars_held": round(float(np.mean([t["bars_held"] for t in trades])), 2),
+            "total_return_pct": round((equity[-1] / initial - 1) * 100, 2),
+            "max_drawdown_pct": round(float(drawdown.min()), 2),
+        }
+
+    def print_report(self, result):
+        summary = result["summary"]
+        print(f"\n{'='*50}")
+        print("🧪 BACKTEST WALK-FORWARD")
+        print(f"{'='*50}")
+        if not summary.get("trades"):
+            print("⚠️ Ninguna operación simulada.")
+            print(f"{'='*50}\n")
+            return
+        print(f"📅 {summary['start']} → {summary['end']} ({summary['sessions']} sesiones, "
+              f"{summary['symbols']} símbolos)")
+        print(f"📡 Señales: {summary['signals']} | Órdenes sin ejecutar: {summary['expired_orders']}")
+        print(f"💼 Operaciones: {summary['trades']} | Duración media: {summary['avg_bars_held']} sesiones")
+        print(f"🎯 Tasa de acierto: {summary['hit_rate_pct']:.1f}%")
+        print(f"   ├─ Ganancia media: {summary['avg_win_pct']:+.2f}%")
+        print(f"   └─ Pérdida media: {summary['avg_loss_pct']:+.2f}%")
+        expectancy_r = f" ({summary['expectancy_r']:+.2f}R)" if summary["expectancy_r"] is not None else ""
+        print(f"💎 Esperanza: {summary['expectancy_pct']:+.3f}% por operación{expectancy_r}")
+        if summary["profit_factor"] is not None:
+            print(f"⚖️ Profit factor: {summary['profit_factor']:.2f}")
+        print(f"🚪 Salidas: " + ", ".join(f"{k} {v}" for k, v in summary["exits"].items()))
+        print(f"📈 Rentabilidad total: {summary['total_return_pct']:+.2f}%")
+        print(f"📉 Drawdown máximo: {summary['max_drawdown_pct']:.2f}%")
+        print(f"⏱️ Tiempo total: {summary['elapsed_sec']:.1f}s")
+        print(f"{'='*50}\n")
@@ -1,7 +1,47 @@
 import yfinance as yf
 import pandas as pd
 import numpy as np
+import random
 import time
+from utils.price_store import PriceStore
+from utils.indicator_state import IndicatorState
+from utils.metrics import metrics
+from utils.yahoo_client import yahoo_client
+from utils.records import AssetRecords, round_values
+from utils.indicators import build_panel, compute_indicator_panel, supertrend_kernel, trend as compute_panel_trend
+
+# Días naturales que se vuelven a pedir antes de la última barra guardada, para
+# comprobar que el histórico ajustado no cambió (split o dividendo)
+PRICE_OVERLAP_DAYS = 7
+
+# Campos del registro por activo: (clave, columna del panel, decimales).
+# atr_pct se deriva del ATR; st_direction (decimales None) es entero.
+RECORD_FIELDS = [
+    ("close", "Close", 2),
+    ("ema_short", "EMA_short", 2),
+    ("ema_long", "EMA_long", 2),
+    ("ema_trend", "EMA_trend", 2),
+    ("rsi", "RSI", 2),
+    ("stoch_k", "Stoch_K", 2),
+    ("stoch_d", "Stoch_D", 2),
+    ("macd", "MACD", 4),
+    ("macd_signal", "MACD_Signal", 4),
+    ("macd_histogram", "MACD_Histogram", 4),
+    ("atr", "ATR", 2),
+    ("atr_pct", "ATR", 2),
+    ("adx", "ADX", 2),
+    ("keltner_upper", "Keltner_Upper", 2),
+    ("keltner_mid", "Keltner_Mid", 2),
+    ("keltner_lower", "Keltner_Lower", 2),
+    ("supertrend", "SuperTrend", 2),
+    ("st_direction", "ST_Direction", None),
+    ("vwap", "VWAP", 2),
+    ("momentum", "Momentum", 4),
+    ("volatility", "Volatility", 4),
+    ("volume_ratio", "Volume_Ratio", 2),
+    ("support", "Support", 2),
+    ("resistance", "Resistance", 2),
+]
 
 class DataAgent:
     def __init__(self, symbols, config):
@@ -9,7 +49,26 @@ class DataAgent:
         self.config = config
         self.lookback_days = config.get("lookback_days", 90)
         self.batch_size = 50
-        self.sleep_sec = 2
+        self.sleep_sec = config.get("yahoo", {}).get("batch_pause_sec", 2)
+        self.yahoo = yahoo_client(config)  # None = yfinance contra Yahoo
+
+        store_config = config.get("price_store", {})
+        self.price_store = None
+        if store_config.get("enabled", False):
+            self.price_store = PriceStore(
+                store_config.get("path", "data_cache/prices"),
+                store_config.get("max_history_days", 3650)
+            )
+
+        self.state_config = config.get("indicator_state", {})
+        self.state = None           # IndicatorState cargado una vez por agente
+        self.state_first_day = None  # Primer día (ordinal) de las descargas que avanzaron el estado
+
+        # La selección por correlación necesita los cierres recientes de cada candidato
+        selection_config = config.get("selection", {})
+        self.correlation_days = None
+        if selection_config.get("mode", "score") == "correlation":
+            self.correlation_days = selection_config.get("correlation_days", 60)
 
     def compute_rsi(self, series, period=14):
         """Calcula el RSI (Relative Strength Index)."""
@@ -78,20 +137,15 @@ class DataAgent:
         upper_band = hl_avg + (multiplier * atr)
         lower_band = hl_avg - (multiplier * atr)
         
-        supertrend = pd.Series(index=df.index, dtype=float)
-        direction = pd.Series(index=df.index, dtype=float)
-        
-        for i in range(period, len(df)):
-            if df["Close"].iloc[i] > upper_band.iloc[i-1]:
-                supertrend.iloc[i] = lower_band.iloc[i]
-                direction.iloc[i] = 1
-            elif df["Close"].iloc[i] < lower_band.iloc[i-1]:
-                supertrend.iloc[i] = upper_band.iloc[i]
-                direction.iloc[i] = -1
-            else:
-                supertrend.iloc[i] = supertrend.iloc[i-1]
-                direction.iloc[i] = direction.iloc[i-1]
+        values, direction = supertrend_kernel(
+            df["Close"].to_numpy(dtype=float)[None, :],
+            upper_band.to_numpy(dtype=float)[None, :],
+            lower_band.to_numpy(dtype=float)[None, :],
+            period
+        )
         
+        supertrend = pd.Series(values[0], index=df.index, dtype=float)
+        direction = pd.Series(direction[0], index=df.index, dtype=float)
         return supertrend, direction
 
     def compute_vwap(self, df):
@@ -114,135 +168,362 @@ class DataAgent:
         else:
             return "lateral"
 
-    def batch_download(self):
-        """Descarga datos en lotes y calcula TODOS los indicadores."""
-        results = []
-        indicators_config = self.config.get("indicators", {})
-        
-        print(f"📥 Descargando {len(self.symbols)} símbolos...")
+    def _extract_symbol(self, df_all, symbol, single):
+        """Extrae el DataFrame OHLCV de un símbolo de la respuesta de yf.download."""
+        if isinstance(df_all.columns, pd.MultiIndex):
+            if symbol not in df_all.columns.get_level_values(0):
+                return None
+            df = df_all[symbol].copy()
+        elif single:
+            df = df_all.copy()
+        else:
+            return None
+        return df.dropna(subset=["Close"])
 
-        for i in range(0, len(self.symbols), self.batch_size):
-            batch = self.symbols[i:i+self.batch_size]
+    def _fetch(self, symbols, **kwargs):
+        """Descarga OHLCV en lotes. Retorna dict símbolo -> DataFrame."""
+        frames = {}
+        total_batches = (len(symbols) + self.batch_size - 1) // self.batch_size
+
+        for i in range(0, len(symbols), self.batch_size):
+            batch = symbols[i:i+self.batch_size]
             batch_num = i // self.batch_size + 1
-            total_batches = (len(self.symbols) + self.batch_size - 1) // self.batch_size
             print(f"📦 Lote {batch_num}/{total_batches}...")
 
+            if self.yahoo is None:  # Con YahooClient se cuenta cada chart
+                metrics.inc("http_requests", vendor="yahoo", endpoint="download")
             try:
-                df_all = yf.download(
-                    batch,
-                    period=f"{self.lookback_days}d",
-                    interval="1d",
-                    progress=False,
-                    group_by="ticker",
-                    auto_adjust=True
-                )
-
+                with metrics.timer("http_request_seconds", vendor="yahoo", endpoint="download"):
+                    if self.yahoo is not None:
+                        df_all = self.yahoo.download(batch, **kwargs)
+                    else:
+                        df_all = yf.download(
+                            batch,
+                            interval="1d",
+                            progress=False,
+                            group_by="ticker",
+                            auto_adjust=True,
+                            **kwargs
+                        )
                 for s in batch:
-                    try:
-                        if len(batch) == 1:
-                            df = df_all.copy()
-                        else:
-                            df = df_all[s].copy()
-
-                        if df.empty or len(df) < 60:
-                            continue
-
-                        # EMAs
-                        df["EMA_short"] = df["Close"].ewm(span=indicators_config.get("ema_short", 5), adjust=False).mean()
-                        df["EMA_long"] = df["Close"].ewm(span=indicators_config.get("ema_long", 20), adjust=False).mean()
-                        df["EMA_trend"] = df["Close"].ewm(span=indicators_config.get("ema_trend", 50), adjust=False).mean()
-                        
-                        # RSI
-                        df["RSI"] = self.compute_rsi(df["Close"], indicators_config.get("rsi_period", 9))
-                        
-                        # Stochastic
-                        stoch_params = indicators_config.get("stochastic", [9, 3, 3])
-                        df["Stoch_K"], df["Stoch_D"] = self.compute_stochastic(df, *stoch_params)
-                        
-                        # MACD
-                        macd_params = [
-                            indicators_config.get("macd_fast", 5),
-                            indicators_config.get("macd_slow", 13),
-                            indicators_config.get("macd_signal", 5)
-                        ]
-                        df["MACD"], df["MACD_Signal"], df["MACD_Histogram"] = self.compute_macd(df["Close"], *macd_params)
-                        
-                        # ATR
-                        df["ATR"] = self.compute_atr(df, indicators_config.get("atr_period", 7))
-                        
-                        # ADX
-                        df["ADX"] = self.compute_adx(df, indicators_config.get("adx_period", 14))
-                        
-                        # Keltner Channels
-                        kelt_period = indicators_config.get("keltner_period", 10)
-                        kelt_mult = indicators_config.get("keltner_multiplier", 2.0)
-                        df["Keltner_Upper"], df["Keltner_Mid"], df["Keltner_Lower"] = self.compute_keltner_channels(df, kelt_period, kelt_mult)
-                        
-                        # SuperTrend
-                        st_period = indicators_config.get("supertrend_period", 7)
-                        st_mult = indicators_config.get("supertrend_multiplier", 1.5)
-                        df["SuperTrend"], df["ST_Direction"] = self.compute_supertrend(df, st_period, st_mult)
-                        
-                        # VWAP (últimos 20 días para que sea relevante)
-                        df["VWAP"] = self.compute_vwap(df.tail(20))
-                        
-                        # Volumen
-                        df["Volume_MA"] = df["Volume"].rolling(20).mean()
-                        df["Volume_Ratio"] = df["Volume"] / df["Volume_MA"]
-                        
-                        # Momentum y volatilidad
-                        df["Momentum"] = df["Close"].pct_change(5)
-                        df["Volatility"] = df["Close"].pct_change().rolling(10).std()
-                        
-                        # Soporte/Resistencia
-                        df["Support"] = df["Low"].rolling(20).min()
-                        df["Resistance"] = df["High"].rolling(20).max()
-
-                        # Obtener último valor
-                        latest = df.iloc[-1]
-                        close = float(latest["Close"])
-                        
-                        # ATR en porcentaje del precio
-                        atr_pct = (float(latest["ATR"]) / close) * 100
-
-                        results.append({
-                            "symbol": s,
-                            "close": round(close, 2),
-                            "ema_short": round(float(latest["EMA_short"]), 2),
-                            "ema_long": round(float(latest["EMA_long"]), 2),
-                            "ema_trend": round(float(latest["EMA_trend"]), 2),
-                            "rsi": round(float(latest["RSI"]), 2),
-                            "stoch_k": round(float(latest["Stoch_K"]), 2),
-                            "stoch_d": round(float(latest["Stoch_D"]), 2),
-                            "macd": round(float(latest["MACD"]), 4),
-                            "macd_signal": round(float(latest["MACD_Signal"]), 4),
-                            "macd_histogram": round(float(latest["MACD_Histogram"]), 4),
-                            "atr": round(float(latest["ATR"]), 2),
-                            "atr_pct": round(atr_pct, 2),
-                            "adx": round(float(latest["ADX"]), 2),
-                            "keltner_upper": round(float(latest["Keltner_Upper"]), 2),
-                            "keltner_mid": round(float(latest["Keltner_Mid"]), 2),
-                            "keltner_lower": round(float(latest["Keltner_Lower"]), 2),
-                            "supertrend": round(float(latest["SuperTrend"]), 2),
-                            "st_direction": int(latest["ST_Direction"]),
-                            "vwap": round(float(latest["VWAP"]), 2),
-                            "momentum": round(float(latest["Momentum"]), 4),
-                            "volatility": round(float(latest["Volatility"]), 4),
-                            "volume_ratio": round(float(latest["Volume_Ratio"]), 2),
-                            "support": round(float(latest["Support"]), 2),
-                            "resistance": round(float(latest["Resistance"]), 2),
-                            "trend": self.compute_trend(df)
-                        })
-
-                    except Exception as e:
-                        print(f"⚠️ Error procesando {s}: {e}")
-                        continue
-
+                    df = self._extract_symbol(df_all, s, len(batch) == 1)
+                    if df is not None and not df.empty:
+                        frames[s] = df
             except Exception as e:
+                metrics.inc("http_errors", vendor="yahoo", endpoint="download")
                 print(f"⚠️ Error en lote: {e}")
 
-            if i + self.batch_size < len(self.symbols):
+            if i + self.batch_size < len(symbols):
                 time.sleep(self.sleep_sec)
 
+        return frames
+
+    def download_prices(self, symbols=None):
+        """
+        Obtiene el histórico OHLCV de los símbolos (por defecto, todos los del agente).
+        Con el almacén local activado solo se descarga la cola que falta
+        desde la última fecha guardada de cada ticker.
+        """
+        symbols = self.symbols if symbols is None else symbols
+        start_time = time.time()
+
+        if not self.price_store:
+            prices = self._fetch(symbols, period=f"{self.lookback_days}d")
+            print(f"⏱️ Descarga completa en {time.time() - start_time:.1f}s")
+            return prices
+
+        cutoff = pd.Timestamp.today().normalize() - pd.Timedelta(days=self.lookback_days)
+
+        # Agrupar símbolos por fecha de inicio para minimizar llamadas; la cola
+        # empieza unos días antes de la última barra guardada para solaparse
+        groups = {}
+        for s in symbols:
+            last = self.price_store.last_date(s)
+            start = max(last - pd.Timedelta(days=PRICE_OVERLAP_DAYS), cutoff) if last is not None else cutoff
+            groups.setdefault(start, []).append(s)
+
+        warm = sum(len(group) for start, group in groups.items() if start > cutoff)
+        print(f"💾 Histórico local: {warm}/{len(symbols)} símbolos solo necesitan la cola")
+
+        prices = {}
+        readjusted = {}  # Inicio del histórico guardado -> símbolos a descargar enteros
+        for start, group in sorted(groups.items()):
+            fetched = self._fetch(group, start=start.strftime("%Y-%m-%d"))
+            for s in group:
+                if s in fetched and not self.price_store.matches(s, fetched[s]):
+                    readjusted.setdefault(self.price_store.load(s).index[0], []).append(s)
+                    continue
+                if s in fetched:
+                    merged = self.price_store.merge(s, fetched[s])
+                else:
+                    merged = self.price_store.load(s)
+                if merged is not None and not merged.empty:
+                    prices[s] = merged[merged.index >= cutoff]
+
+        # Split o dividendo: el histórico ajustado cambió hacia atrás, se sustituye entero
+        if readjusted:
+            print(f"♻️ {sum(map(len, readjusted.values()))} símbolos con histórico reajustado: descarga completa")
+        for start, group in sorted(readjusted.items()):
+            fetched = self._fetch(group, start=start.strftime("%Y-%m-%d"))
+            for s in group:
+                stored = self.price_store.replace(s, fetched[s]) if s in fetched else self.price_store.load(s)
+                if stored is not None and not stored.empty:
+                    prices[s] = stored[stored.index >= cutoff]
+
+        print(f"⏱️ Descarga incremental en {time.time() - start_time:.1f}s "
+              f"({'caliente' if warm else 'en frío'})")
+        return prices
+
+    def fetch_quotes(self, since=None):
+        """
+        Última cotización de cada símbolo (barra diaria en curso) con una sola
+        descarga por lote. Retorna dict símbolo -> {date, price, open, high, low}.
+        Con `since` (fecha del reporte) high y low son el máximo y el mínimo de
+        todas las sesiones posteriores; sin sesiones nuevas, los de la última barra.
+        """
+        kwargs = {"period": "5d"}
+        if since is not None:  # Unos días antes, para tener siempre la última barra
+            kwargs = {"start": (pd.Timestamp(since) - pd.Timedelta(days=5)).strftime("%Y-%m-%d")}
+        quotes = {}
+        for s, df in self._fetch(self.symbols, **kwargs).items():
+            last = df.iloc[-1]
+            bars = df.iloc[-1:]
+            if since is not None:
+                index = df.index.tz_localize(None) if df.index.tz is not None else df.index
+                if (index > since).any():
+                    bars = df[index > since]
+            quotes[s] = {
+                "date": df.index[-1].strftime("%Y-%m-%d"),
+                "price": float(last["Close"]),
+                "open": float(last["Open"]),
+                "high": float(bars["High"].max()),
+                "low": float(bars["Low"].min()),
+            }
+        return quotes
+
+    def compute_indicators(self, df):
+        """
+        Añade al DataFrame todas las columnas de indicadores configurados.
+        Cálculo de referencia por símbolo; batch_download usa el motor de panel.
+        """
+        indicators_config = self.config.get("indicators", {})
+
+        # EMAs
+        df["EMA_short"] = df["Close"].ewm(span=indicators_config.get("ema_short", 5), adjust=False).mean()
+        df["EMA_long"] = df["Close"].ewm(span=indicators_config.get("ema_long", 20), adjust=False).mean()
+        df["EMA_trend"] = df["Close"].ewm(span=indicators_config.get("ema_trend", 50), adjust=False).mean()
+        
+        # RSI
+        df["RSI"] = self.compute_rsi(df["Close"], indicators_config.get("rsi_period", 9))
+        
+        # Stochastic
+        stoch_params = indicators_config.get("stochastic", [9, 3, 3])
+        df["Stoch_K"], df["Stoch_D"] = self.compute_stochastic(df, *stoch_params)
+        
+        # MACD
+        macd_params = [
+            indicators_config.get("macd_fast", 5),
+            indicators_config.get("macd_slow", 13),
+            indicators_config.get("macd_signal", 5)
+        ]
+        df["MACD"], df["MACD_Signal"], df["MACD_Histogram"] = self.compute_macd(df["Close"], *macd_params)
+        
+        # ATR
+        df["ATR"] = self.compute_atr(df, indicators_config.get("atr_period", 7))
+        
+        # ADX
+        df["ADX"] = self.compute_adx(df, indicators_config.get("adx_period", 14))
+        
+        # Keltner Channels
+        kelt_period = indicators_config.get("keltner_period", 10)
+        kelt_mult = indicators_config.get("keltner_multiplier", 2.0)
+        df["Keltner_Upper"], df["Keltner_Mid"], df["Keltner_Lower"] = self.compute_keltner_channels(df, kelt_period, kelt_mult)
+        
+        # SuperTrend
+        st_period = indicators_config.get("supertrend_period", 7)
+        st_mult = indicators_config.get("supertrend_multiplier", 1.5)
+        df["SuperTrend"], df["ST_Direction"] = self.compute_supertrend(df, st_period, st_mult)
+        
+        # VWAP (últimos 20 días para que sea relevante)
+        df["VWAP"] = self.compute_vwap(df.tail(20))
+        
+        # Volumen
+        df["Volume_MA"] = df["Volume"].rolling(20).mean()
+        df["Volume_Ratio"] = df["Volume"] / df["Volume_MA"]
+        
+        # Momentum y volatilidad
+        df["Momentum"] = df["Close"].pct_change(5)
+        df["Volatility"] = df["Close"].pct_change().rolling(10).std()
+        
+        # Soporte/Resistencia
+        df["Support"] = df["Low"].rolling(20).min()
+        df["Resistance"] = df["High"].rolling(20).max()
+        return df
+
+    def build_record(self, symbol, df):
+        """Resume el último valor de cada indicador en un dict."""
+        latest = df.iloc[-1]
+        close = float(latest["Close"])
+        
+        # ATR en porcentaje del precio
+        atr_pct = (float(latest["ATR"]) / close) * 100
+
+        return {
+            "symbol": symbol,
+            "close": round(close, 2),
+            "ema_short": round(float(latest["EMA_short"]), 2),
+            "ema_long": round(float(latest["EMA_long"]), 2),
+            "ema_trend": round(float(latest["EMA_trend"]), 2),
+            "rsi": round(float(latest["RSI"]), 2),
+            "stoch_k": round(float(latest["Stoch_K"]), 2),
+            "stoch_d": round(float(latest["Stoch_D"]), 2),
+            "macd": round(float(latest["MACD"]), 4),
+            "macd_signal": round(float(latest["MACD_Signal"]), 4),
+            "macd_histogram": round(float(latest["MACD_Histogram"]), 4),
+            "atr": round(float(latest["ATR"]), 2),
+            "atr_pct": round(atr_pct, 2),
+            "adx": round(float(latest["ADX"]), 2),
+            "keltner_upper": round(float(latest["Keltner_Upper"]), 2),
+            "keltner_mid": round(float(latest["Keltner_Mid"]), 2),
+            "keltner_lower": round(float(latest["Keltner_Lower"]), 2),
+            "supertrend": round(float(latest["SuperTrend"]), 2),
+            "st_direction": int(latest["ST_Direction"]),
+            "vwap": round(float(latest["VWAP"]), 2),
+            "momentum": round(float(latest["Momentum"]), 4),
+            "volatility": round(float(latest["Volatility"]), 4),
+            "volume_ratio": round(float(latest["Volume_Ratio"]), 2),
+            "support": round(float(latest["Support"]), 2),
+            "resistance": round(float(latest["Resistance"]), 2),
+            "trend": self.compute_trend(df)
+        }
+
+    def build_panel_records(self, symbols, indicators):
+        """
+        Resume la última columna del panel de indicadores en un AssetRecords
+        (una fila por símbolo), con el mismo redondeo que compute_indicators.
+        """
+        latest = {name: values[:, -1] for name, values in indicators.items()}
+        close = latest["Close"]
+
+        # Sin dirección de SuperTrend o sin precio no hay registro
+        valid = np.isfinite(latest["ST_Direction"]) & (close != 0)
+        symbols = np.asarray(symbols, dtype=object)
+        for s in symbols[~valid]:
+            print(f"⚠️ Error procesando {s}: indicadores incompletos")
+
+        columns = {"symbol": symbols[valid]}
+        digits = {}
+        with np.errstate(invalid="ignore"):
+            for key, column, places in RECORD_FIELDS:
+                if key == "atr_pct":
+                    # ATR en porcentaje del precio
+                    columns[key] = round_values(latest["ATR"][valid] / close[valid] * 100, places)
+                elif places is None:
+                    columns[key] = latest[column][valid].astype(np.int8)
+                else:
+                    columns[key] = round_values(latest[column][valid], places)
+                if places is not None:
+                    digits[key] = places
+        columns["trend"] = compute_panel_trend(indicators["Close"])[valid]
+        return AssetRecords.from_columns(columns, digits)
+
+    def incremental_records(self, symbols, prices):
+        """
+        Avanza el estado incremental de indicadores solo con las barras nuevas
+        de cada símbolo y resume el resultado como build_panel_records. El
+        estado se carga una vez por agente; save_state() lo escribe.
+        """
+        if self.state is None:
+            self.state = IndicatorState.load(self.state_path(), self.config.get("indicators", {}))
+        state = self.state
+        bars = state.advance({s: prices[s] for s in symbols})
+        print(f"🔁 Estado incremental: {bars} barras nuevas para {len(symbols)} símbolos "
+              f"({bars / len(symbols):.1f} por símbolo)")
+
+        self.verify_state(state, random.sample(symbols, min(len(symbols), self.state_config.get("verify_sample", 0))))
+
+        first_day = int(min(prices[s].index.values[0] for s in symbols).astype("datetime64[D]").astype("int64"))
+        self.state_first_day = first_day if self.state_first_day is None else min(self.state_first_day, first_day)
+        return self.build_panel_records(symbols, state.indicators(state.rows(symbols)))
+
+    def state_path(self):
+        return self.state_config.get("path", "data_cache/indicator_state.npz")
+
+    def save_state(self):
+        """Guarda el estado incremental (si se usó), sin las filas que ya no enlazan con ninguna descarga."""
+        if self.state is None:
+            return
+        # Símbolos fuera del universo: su última barra es anterior a todas las descargas actuales
+        dropped = self.state.prune(self.state_first_day)
+        if dropped:
+            print(f"   🧹 {dropped} símbolos sin barras recientes eliminados del estado")
+        self.state.save(self.state_path())
+
+    def aligned_closes(self, symbols, prices, days):
+        """
+        Matriz float32 (símbolos × days+1) con los cierres de los últimos días
+        hábiles en un calendario común, para que los retornos diarios de todos
+        los símbolos sean comparables. En festivos de un mercado se repite su
+        último cierre; antes de la primera barra queda NaN.
+        """
+        indexes = []
+        for s in symbols:
+            index = prices[s].index
+            indexes.append(index.tz_localize(None) if index.tz is not None else index)
+        end = max(index[-1] for index in indexes).normalize()
+        calendar = pd.bdate_range(end=end, periods=days + 1).to_numpy()
+
+        closes = np.full((len(symbols), days + 1), np.nan, dtype=np.float32)
+        for j, (s, index) in enumerate(zip(symbols, indexes)):
+            pos = np.searchsorted(index.to_numpy(), calendar, side="right") - 1
+            valid = pos >= 0
+            closes[j, valid] = prices[s]["Close"].to_numpy(dtype=float)[pos[valid]]
+        return closes
+
+    def verify_state(self, state, symbols):
+        """Compara una muestra del estado incremental con un recálculo completo."""
+        if not symbols or not self.price_store:
+            return
+        frames = {s: self.price_store.load(s) for s in symbols}
+        mismatches = state.verify({s: df for s, df in frames.items() if df is not None})
+        if mismatches:
+            print(f"   ⚠️ Estado incremental difiere del recálculo en {len(mismatches)} valores:")
+            for symbol, name, actual, expected in mismatches[:5]:
+                print(f"      {symbol} {name}: {actual} vs {expected}")
+        else:
+            print(f"   ✅ Estado incremental verificado en {len(symbols)} símbolos")
+
+    @metrics.timed("stage_seconds", stage="batch_download")
+    def batch_download(self, symbols=None, save_state=True):
+        """
+        Descarga datos en lotes y calcula TODOS los indicadores. El pipeline
+        en streaming pasa cada lote en `symbols` con save_state=False y guarda
+        el estado incremental una sola vez al final (save_state()).
+        """
+        symbols = self.symbols if symbols is None else symbols
+        print(f"📥 Descargando {len(symbols)} símbolos...")
+        prices = self.download_prices(symbols)
+
+        # Panel (símbolos × días × campos): todos los indicadores de una vez
+        symbols = [s for s in symbols if s in prices and len(prices[s]) >= 60]
+        if not symbols:
+            print("✅ Descarga completa: 0 activos procesados.")
+            return AssetRecords.empty()
+
+        start_time = time.time()
+        with metrics.timer("stage_seconds", stage="indicators"):
+            if self.state_config.get("enabled", False):
+                results = self.incremental_records(symbols, prices)
+                if save_state:
+                    self.save_state()
+            else:
+                panel = build_panel([prices[s] for s in symbols])
+                indicators = compute_indicator_panel(panel, self.config.get("indicators", {}))
+                results = self.build_panel_records(symbols, indicators)
+        print(f"⚡ Indicadores de {len(symbols)} símbolos en {time.time() - start_time:.2f}s")
+
+        if self.correlation_days and len(results):
+            results = results.with_columns({"closes": self.aligned_closes(results.symbols, prices, self.correlation_days)})
+
         print(f"✅ Descarga completa: {len(results)} activos procesados.")
         return results
@@ -1,5 +1,14 @@
 import yfinance as yf
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.rate_limit import TokenBucket
+from utils.fundamentals_cache import FundamentalsCache
+from utils.metrics import metrics
+from utils.yahoo_client import yahoo_client
+
+# Motivos de rechazo que solo dependen de un campo lento: prefijo del motivo -> campo
+STATIC_REJECT_REASONS = {"Cap": "market_cap", "Vol:": "avg_volume", "Beta": "beta"}
 
 class QualityFilterAgent:
     """
@@ -11,26 +20,128 @@ class QualityFilterAgent:
         self.config = config
         self.filters = config.get("quality_filters", {})
         self.enabled = self.filters.get("enabled", True)
+        
+        # Descarga concurrente con límite de tasa
+        self.concurrency = max(1, int(self.filters.get("concurrency", 8)))
+        self.max_retries = int(self.filters.get("max_retries", 3))
+        self.retry_backoff_sec = float(self.filters.get("retry_backoff_sec", 1.0))
+        self.yahoo = yahoo_client(config)  # None = yfinance contra Yahoo
+        self.rate_limiter = TokenBucket(
+            self.filters.get("requests_per_second", 5),
+            self.filters.get("burst", None)
+        )
+        
+        # Caché de fundamentales con TTL por campo
+        cache_config = self.filters.get("cache", {})
+        self.cache = None
+        if cache_config.get("enabled", False):
+            self.cache = FundamentalsCache(
+                cache_config.get("path", "data_cache/fundamentals.sqlite"),
+                cache_config.get("ttl_hours")
+            )
+        self.stats_lock = threading.Lock()
+        self.reset_stats()
+        self.sectors = {}  # Símbolo aprobado -> sector (o categoría del ETF), para los límites de selección
+
+    def reset_stats(self):
+        """Pone a cero los contadores de caché (el agente puede reutilizarse entre ejecuciones)."""
+        with self.stats_lock:
+            self.cache_hits = 0
+            self.cache_misses = 0
+            self.volatile_misses = 0  # Entrada con campos lentos frescos, descargada por precio/bid/ask
+            self.fetch_time = 0.0
     
+    def print_cache_summary(self):
+        """
+        Imprime los aciertos de la caché desde el último reset_stats(). Lo usan
+        filter_symbols y el pipeline en streaming.
+        """
+        if not self.cache:
+            return
+        # Los campos con TTL 0 obligan a descargar todo valor que supera los
+        # filtros lentos: esas descargas se cuentan aparte de los fallos reales
+        lookups = self.cache_hits + self.cache_misses
+        hit_ratio = self.cache_hits / lookups * 100 if lookups else 0
+        # fetch_time suma latencias de peticiones concurrentes: se pasa a tiempo de pared
+        avg_fetch = self.fetch_time / self.cache_misses / self.concurrency if self.cache_misses else 0
+        print(f"\n   💾 Caché fundamentales: {self.cache_hits}/{lookups} aciertos ({hit_ratio:.1f}%)")
+        if self.volatile_misses:
+            print(f"      🔄 {self.volatile_misses} descargas solo por campos sin caché "
+                  f"({', '.join(sorted(self.cache.volatile_fields))})")
+        print(f"      ⏱️ Tiempo ahorrado estimado: {self.cache_hits * avg_fetch:.1f}s "
+              f"({self.cache_hits} peticiones evitadas, {self.concurrency} en paralelo)")
+        
     def get_stock_info(self, symbol):
-        """Obtiene información fundamental del símbolo."""
-        try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
-            
-            return {
-                "symbol": symbol,
-                "market_cap": info.get('marketCap', 0),
-                "avg_volume": info.get('averageVolume', 0),
-                "current_price": info.get('currentPrice') or info.get('regularMarketPrice', 0),
-                "bid": info.get('bid', 0),
-                "ask": info.get('ask', 0),
-                "beta": info.get('beta', 1.0),
-                "short_name": info.get('shortName', symbol)
-            }
-        except Exception as e:
-            print(f"   ⚠️ Error obteniendo info de {symbol}: {e}")
-            return None
+        """Obtiene información fundamental del símbolo (con reintentos y backoff)."""
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            metrics.inc("http_requests", vendor="yahoo", endpoint="info")
+            try:
+                with metrics.timer("http_request_seconds", vendor="yahoo", endpoint="info"):
+                    if self.yahoo is not None:
+                        info = self.yahoo.info(symbol)
+                    else:
+                        info = yf.Ticker(symbol).info
+                
+                return {
+                    "symbol": symbol,
+                    "market_cap": info.get('marketCap', 0),
+                    "avg_volume": info.get('averageVolume', 0),
+                    "current_price": info.get('currentPrice') or info.get('regularMarketPrice', 0),
+                    "bid": info.get('bid', 0),
+                    "ask": info.get('ask', 0),
+                    "beta": info.get('beta', 1.0),
+                    "short_name": info.get('shortName', symbol),
+                    "sector": info.get('sector') or info.get('category')
+                }
+            except Exception as e:
+                metrics.inc("http_errors", vendor="yahoo", endpoint="info")
+                if attempt < self.max_retries:
+                    metrics.inc("http_retries", vendor="yahoo", endpoint="info")
+                    time.sleep(self.retry_backoff_sec * (2 ** attempt))
+                    continue
+                print(f"   ⚠️ Error obteniendo info de {symbol}: {e}")
+                return None
+    
+    def get_stock_info_cached(self, symbol):
+        """
+        Sirve la información desde la caché si sus campos siguen frescos, o si
+        un campo lento aún fresco ya basta para rechazar el valor. Si no, la
+        descarga y la vuelve a guardar.
+        """
+        cached, stale = self.cache.lookup(symbol)
+        volatile = cached is not None and stale <= self.cache.volatile_fields
+        if cached is not None:
+            passes, reason = self.passes_quality_filters(cached)
+            field = next((f for prefix, f in STATIC_REJECT_REASONS.items() if reason.startswith(prefix)), None)
+            if not stale or (not passes and field is not None and field not in stale):
+                with self.stats_lock:
+                    self.cache_hits += 1
+                metrics.inc("cache_lookups", cache="fundamentals", result="hit")
+                return cached
+        
+        start = time.time()
+        info = self.get_stock_info(symbol)
+        with self.stats_lock:
+            self.fetch_time += time.time() - start
+            self.cache_misses += 1
+            self.volatile_misses += volatile
+        metrics.inc("cache_lookups", cache="fundamentals", result="volatile" if volatile else "miss")
+        if info is not None:
+            self.cache.store(symbol, info)
+        return info
+    
+    def fetch_stock_infos(self, symbols):
+        """
+        Obtiene la información de varios símbolos en paralelo.
+        El orden del resultado es el mismo que el de la entrada.
+        """
+        fetch = self.get_stock_info_cached if self.cache else self.get_stock_info
+        if self.concurrency == 1 or len(symbols) <= 1:
+            return [fetch(s) for s in symbols]
+        
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            return list(executor.map(fetch, symbols))
     
     def calculate_spread(self, bid, ask):
         """Calcula el spread bid-ask en porcentaje."""
@@ -87,6 +198,7 @@ class QualityFilterAgent:
         
         return True, "OK"
     
+    @metrics.timed("stage_seconds", stage="filter_symbols")
     def filter_symbols(self, symbols):
         """
         Filtra lista de símbolos según criterios de calidad.
@@ -96,13 +208,14 @@ class QualityFilterAgent:
             print("ℹ️  Filtros de calidad deshabilitados")
             return symbols
         
+        self.reset_stats()
         print(f"\n🔍 FASE: FILTROS DE CALIDAD")
         print(f"{'='*50}")
-        print(f"Analizando {len(symbols)} símbolos...")
+        print(f"Analizando {len(symbols)} símbolos ({self.concurrency} en paralelo)...")
         
         approved = []
         rejected = {}
-        batch_size = 100  # Procesar en lotes para no saturar
+        batch_size = 100  # Procesar en lotes (el rate limiter evita saturar)
         
         for i in range(0, len(symbols), batch_size):
             batch = symbols[i:i+batch_size]
@@ -111,20 +224,17 @@ class QualityFilterAgent:
             
             print(f"\n📦 Lote {batch_num}/{total_batches} ({len(batch)} símbolos)")
             
-            for symbol in batch:
-                stock_info = self.get_stock_info(symbol)
+            stock_infos = self.fetch_stock_infos(batch)
+            for symbol, stock_info in zip(batch, stock_infos):
                 passes, reason = self.passes_quality_filters(stock_info)
                 
                 if passes:
                     approved.append(symbol)
+                    self.sectors[symbol] = stock_info.get("sector")
                     print(f"   ✅ {symbol}: {stock_info.get('short_name', '')}")
                 else:
                     rejected[symbol] = reason
                     print(f"   ❌ {symbol}: {reason}")
-            
-            # Pausa entre lotes para evitar rate limiting
-            if i + batch_size < len(symbols):
-                time.sleep(2)
         
         # Estadísticas
         print(f"\n{'='*50}")
@@ -143,6 +253,7 @@ class QualityFilterAgent:
             for reason, count in sorted(reasons_count.items(), key=lambda x: x[1], reverse=True)[:5]:
                 print(f"      • {reason}: {count}")
         
+        self.print_cache_summary()
         print(f"{'='*50}\n")
         
         return approved
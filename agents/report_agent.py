@@ -1,12 +1,17 @@
 import os
 import requests
 import datetime
+import time
+from utils.metrics import metrics
 
 class ReportAgent:
-    def __init__(self, token=None, chat_id=None, report_type="detailed"):
+    def __init__(self, token=None, chat_id=None, report_type="detailed",
+                 base_url="https://api.telegram.org", pause_sec=1.0):
         self.token = token or os.getenv("TELEGRAM_TOKEN")
         self.chat_id = chat_id or os.getenv("TELEGRAM_CHAT_ID")
         self.report_type = report_type  # "detailed" o "update"
+        self.base_url = base_url.rstrip("/")
+        self.pause_sec = pause_sec  # Pausa entre mensajes de un reporte largo
 
         if not self.token:
             print("⚠️ TELEGRAM_TOKEN no está configurado.")
@@ -87,7 +92,18 @@ class ReportAgent:
             # Emoji de tendencia
             trend_emoji = "📈" if trend == "alcista" else "📉" if trend == "bajista" else "➡️"
             volume_emoji = "🔊" if volume_ratio > 2.0 else "🔉" if volume_ratio > 1.5 else "🔈"
-            
+
+            # Sentiment (solo si el análisis estaba habilitado)
+            sentiment = a.get('sentiment') or {}
+            sentiment_info = ""
+            if sentiment.get('enabled'):
+                sentiment_info = (
+                    f"📰 *SENTIMENT:*\n"
+                    f"  ├─ Score: `{sentiment.get('sentiment_score', 0):+.2f}`\n"
+                    f"  └─ Noticias: {sentiment.get('news_count', 0)} "
+                    f"(✅ {sentiment.get('positive_news', 0)} / ❌ {sentiment.get('negative_news', 0)})\n\n"
+                )
+
             asset_report = (
                 f"{indicator} *{i}. {symbol}* - Score: `{score:.1f}/10`\n"
                 f"{'─' * 40}\n"
@@ -163,7 +179,13 @@ class ReportAgent:
             signal = a.get('signal', 'Sin señal')
             
             # Determinar acción
-            if close <= entry_opt * 1.01:
+            if a.get('stop_hit'):
+                action = "⛔ *STOP ALCANZADO*"
+                detail = f"Precio tocó el stop en ${a.get('stop_loss', 0):.2f}"
+            elif a.get('target_hit'):
+                action = f"🎯 *TARGET {a['target_hit']} ALCANZADO - No entrar*"
+                detail = f"Precio llegó a ${a.get('target_' + str(a['target_hit']), 0):.2f}"
+            elif close <= entry_opt * 1.01:
                 action = "✅ *ZONA DE COMPRA ACTIVA*"
                 detail = f"Entrada óptima: ${entry_opt:.2f}-${entry_max:.2f}"
             elif close <= entry_max:
@@ -173,9 +195,16 @@ class ReportAgent:
                 action = "🔴 *CANCELAR - Ya rebotó*"
                 detail = f"Precio superó entrada máxima (+{((close/entry_max-1)*100):.1f}%)"
             
+            # Cambio desde el reporte del viernes (refresco intradía)
+            change = ""
+            if 'report_close' in a:
+                change = f"📅 Cierre reporte: `${a['report_close']:.2f}` ({a.get('change_pct', 0):+.1f}%)\n"
+                change += f"💎 R/R actual (T2): `{a.get('rr_ratio_2', 0):.1f}:1`\n"
+
             body += (
                 f"{indicator} *{i}. {symbol}* - Score: `{score:.1f}/10`\n"
                 f"💰 Precio actual: `${close:.2f}`\n"
+                f"{change}"
                 f"{action}\n"
                 f"💡 {detail}\n"
                 f"📍 {signal}\n\n"
@@ -191,6 +220,7 @@ class ReportAgent:
         
         return header + body + footer
 
+    @metrics.timed("stage_seconds", stage="send_report")
     def send_report(self, top_assets):
         """Envía el informe según el tipo configurado."""
         if self.report_type == "detailed":
@@ -210,7 +240,7 @@ class ReportAgent:
             print(message)  # Imprimir en consola al menos
             return report
 
-        url = f"https://api.telegram.org/bot{self.token}/sendMessage"
+        url = f"{self.base_url}/bot{self.token}/sendMessage"
         
         # Telegram tiene límite de 4096 caracteres por mensaje
         # Si es muy largo, dividir en varios mensajes
@@ -241,17 +271,20 @@ class ReportAgent:
                     "text": msg,
                     "parse_mode": "Markdown"
                 }
-                response = requests.post(url, data=payload, timeout=10)
+                metrics.inc("http_requests", vendor="telegram", endpoint="sendMessage")
+                with metrics.timer("http_request_seconds", vendor="telegram", endpoint="sendMessage"):
+                    response = requests.post(url, data=payload, timeout=10)
                 
                 if response.status_code == 200:
                     print(f"✅ Mensaje {i+1}/{len(messages)} enviado correctamente.")
                 else:
+                    metrics.inc("http_errors", vendor="telegram", endpoint="sendMessage",
+                                status=response.status_code)
                     print(f"❌ Error en mensaje {i+1}: {response.status_code} - {response.text}")
                 
                 # Pequeña pausa entre mensajes
                 if i < len(messages) - 1:
-                    import time
-                    time.sleep(1)
+                    time.sleep(self.pause_sec)
                     
         except Exception as e:
             print(f"⚠️ Error al enviar: {e}")
@@ -264,7 +297,7 @@ class ReportAgent:
             print("⚠️ No se puede enviar mensaje de prueba.")
             return False
 
-        url = f"https://api.telegram.org/bot{self.token}/sendMessage"
+        url = f"{self.base_url}/bot{self.token}/sendMessage"
         data = {"chat_id": self.chat_id, "text": text}
         
         try:
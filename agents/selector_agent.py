@@ -1,18 +1,227 @@
-import pandas as pd
+import heapq
+import numpy as np
+from utils.metrics import metrics
+from utils.records import AssetRecords
+
+# Etiquetas con límite por grupo: atributo adjunto a los registros -> clave de config.json selection
+CAPS = (("market", "max_per_market"), ("sector", "max_per_sector"))
+
+
+class RankedAsset:
+    """
+    Entrada del heap: ordena por score, luego R/R y luego símbolo
+    (alfabético), de forma determinista. El peor queda arriba del heap.
+    """
+    __slots__ = ("key", "records", "row", "labels")
+
+    def __init__(self, score, rr_ratio, symbol, records, row, labels):
+        self.key = (-score, -rr_ratio, symbol)  # Menor = mejor
+        self.records = records
+        self.row = row
+        self.labels = labels
+
+    def __lt__(self, other):
+        return self.key > other.key
+
+
+class TopNSelection:
+    """
+    Selección incremental de los top_n: cada lote de candidatos pasa por los
+    filtros vectorizados y solo se conservan los mejores en heaps acotados,
+    O(n log k). Con límites por mercado/sector hay un heap por combinación
+    (mercado, sector) de tamaño min(top_n, límites): un activo que no entra
+    en el de su combinación nunca podría elegirse, porque los que tiene
+    delante agotan su mercado, su sector o el top_n. result() aplica los
+    límites en orden de ranking sobre lo conservado.
+
+    Las etiquetas se leen de los adjuntos "market" y "sector" de cada lote
+    (AssetRecords.attach); un activo sin etiqueta no cuenta para ese límite.
+
+    Con `max_correlation` los heaps guardan hasta `pool` candidatos, porque
+    un activo puede descartarse por correlación con otro mejor. result()
+    calcula la matriz de correlación de los retornos diarios de los `pool`
+    mejores (campo "closes" de DataAgent) con una sola llamada a
+    np.corrcoef y elige en orden de ranking los que no superan el techo con
+    ninguno de los ya elegidos. Sin "closes" (p. ej. en el backtest) la
+    selección es solo por score.
+    """
+
+    def __init__(self, top_n, min_rr, max_atr_pct=2.0, caps=None, max_correlation=None, pool=200):
+        self.top_n = top_n
+        self.min_rr = min_rr
+        self.max_atr_pct = max_atr_pct
+        self.caps = {label: cap for label, cap in (caps or {}).items() if cap}
+        self.max_correlation = max_correlation
+        self.pool = max(top_n, pool)
+        self.buckets = {}  # (etiquetas) -> heap de RankedAsset
+        self.seen = 0
+        self.template = None  # Lote vacío con los campos, para un resultado sin activos
+        self.rejected = []  # (símbolo, símbolo elegido con el que correla, correlación)
+
+    def candidate_mask(self, records):
+        """Filtros de calidad ESTRICTOS como máscara sobre el lote."""
+        score = records["score"]
+        rr_ratio_2 = records["rr_ratio_2"]
+        keep = ~np.isnan(score) & ~np.isnan(records["rsi"]) & ~np.isnan(rr_ratio_2)
+
+        # Solo score >= 8.0 (ya viene filtrado del Analysis Agent, pero por si acaso)
+        keep &= score >= 8.0
+
+        # Ratio R/R mínimo de 5:1 para target 2
+        keep &= rr_ratio_2 >= self.min_rr
+
+        # Eliminar valores con volatilidad extrema (ATR > 2%)
+        keep &= records["atr_pct"] <= self.max_atr_pct
+        return keep
+
+    def capacity(self, labels):
+        """Tamaño del heap de una combinación de etiquetas."""
+        if self.max_correlation is not None:
+            return self.pool
+        limits = [self.top_n] + [cap for (label, cap), value in zip(self.caps.items(), labels) if value is not None]
+        return min(limits)
+
+    def push(self, records):
+        """Añade un lote de candidatos (AssetRecords del análisis)."""
+        if not len(records) or "score" not in records:
+            return self
+        self.seen += len(records)
+        if self.template is None:
+            self.template = records.take(np.zeros(0, dtype=int))
+
+        rows = np.flatnonzero(self.candidate_mask(records))
+        score = records["score"][rows]
+
+        # Sin límites basta un heap: lo que no supera al peor conservado ni se mira
+        heap = self.buckets.get(())
+        if not self.caps and heap is not None and len(heap) >= self.capacity(()):
+            floor = -heap[0].key[0]
+            rows, score = rows[score >= floor], score[score >= floor]
+
+        rr_ratio = records["rr_ratio_2"][rows]
+        symbols = records.array["symbol"][rows]
+        mappings = [records.attachments.get(label, {}) for label in self.caps]
+
+        for row, s, rr, symbol in zip(rows.tolist(), score.tolist(), rr_ratio.tolist(), symbols.tolist()):
+            labels = tuple(mapping.get(symbol) for mapping in mappings)
+            heap = self.buckets.setdefault(labels, [])
+            entry = RankedAsset(s, rr, symbol, records, row, labels)
+            if len(heap) < self.capacity(labels):
+                heapq.heappush(heap, entry)
+            elif heap[0] < entry:
+                heapq.heapreplace(heap, entry)
+        return self
+
+    def correlations(self, entries):
+        """
+        Matriz de correlación (entradas × entradas) de los retornos diarios,
+        o None si algún lote no trae los cierres. Los retornos que faltan
+        cuentan como 0 y un activo sin variación correla 0 con todos.
+        """
+        if not all("closes" in e.records for e in entries):
+            return None
+        closes = np.stack([e.records.array["closes"][e.row] for e in entries]).astype(np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = np.nan_to_num(closes[:, 1:] / closes[:, :-1] - 1, nan=0.0, posinf=0.0, neginf=0.0)
+            corr = np.atleast_2d(np.corrcoef(returns))
+        return np.nan_to_num(corr, nan=0.0)
+
+    def result(self):
+        """Los top_n en orden de ranking, respetando los límites por grupo y el techo de correlación."""
+        entries = sorted((e for heap in self.buckets.values() for e in heap), key=lambda e: e.key)
+        corr = None
+        if self.max_correlation is not None and len(entries) > 1:
+            entries = entries[:self.pool]
+            corr = self.correlations(entries)
+
+        counts = [dict() for _ in self.caps]
+        chosen, picked = [], []
+        self.rejected = []
+        for i, entry in enumerate(entries):
+            if len(chosen) >= self.top_n:
+                break
+            full = any(
+                value is not None and count.get(value, 0) >= cap
+                for count, cap, value in zip(counts, self.caps.values(), entry.labels)
+            )
+            if full:
+                continue
+            if corr is not None and picked:
+                k = int(np.argmax(corr[i, picked]))
+                if corr[i, picked[k]] > self.max_correlation:
+                    self.rejected.append((entry.key[2], chosen[k].key[2], float(corr[i, picked[k]])))
+                    continue
+            for count, value in zip(counts, entry.labels):
+                if value is not None:
+                    count[value] = count.get(value, 0) + 1
+            chosen.append(entry)
+            picked.append(i)
+
+        if not chosen:
+            return self.template if self.template is not None else AssetRecords.empty()
+        return AssetRecords.concat([e.records.take([e.row]) for e in chosen])
+
 
 class SelectorAgent:
     def __init__(self, config):
         self.config = config
+        self.selection_config = config.get("selection", {})
 
-    def select_top(self, results):
+    def selection(self):
+        """TopNSelection con los criterios de config.json, para alimentarla por lotes."""
+        correlated = self.selection_config.get("mode", "score") == "correlation"
+        return TopNSelection(
+            top_n=self.config.get("top_n", 3),
+            min_rr=self.config.get("targets", {}).get("min_risk_reward_ratio", 5.0),
+            caps={label: self.selection_config.get(key) for label, key in CAPS},
+            max_correlation=self.selection_config.get("max_correlation", 0.7) if correlated else None,
+            pool=self.selection_config.get("correlation_pool", 200)
+        )
+
+    @metrics.timed("stage_seconds", stage="select_top")
+    def select_top(self, results, verbose=True, selection=None):
         """
         Selecciona solo las mejores oportunidades.
         Para capital limitado (€2k-5k): Máxima selectividad.
+        Con verbose=False no imprime estadísticas (backtest día a día).
+        Con `selection` (ya alimentada lote a lote, p. ej. por el pipeline en
+        streaming) solo se leen sus top_n; si no, se pasa `results` entero.
+        Retorna un AssetRecords en orden de ranking; to_dicts() da los dicts del reporte.
         """
-        if not results:
-            return []
+        if selection is None:
+            selection = self.selection().push(self._records(results))
+        top_assets = selection.result()
+
+        # Estadísticas
+        if not verbose:
+            return top_assets
+        if len(top_assets):
+            avg_score = top_assets["score"].mean()
+            strong_signals = int((top_assets["score"] >= 8.5).sum())
+            avg_rr = top_assets["rr_ratio_2"].mean()
 
-        # Normalizar estructura
+            print(f"✅ Selección final: {len(top_assets)} oportunidades de {selection.seen} candidatos")
+            print(f"   📊 Score promedio: {avg_score:.2f}/10")
+            print(f"   🟢 Señales MUY FUERTES (8.5+): {strong_signals}/{len(top_assets)}")
+            print(f"   💎 R/R promedio: {avg_rr:.1f}:1")
+            if selection.rejected:
+                print(f"   🔗 Descartados por correlación > {selection.max_correlation}: {len(selection.rejected)}")
+                for symbol, other, value in selection.rejected[:5]:
+                    print(f"      {symbol} (ρ={value:.2f} con {other})")
+        else:
+            print("⚠️ No hay activos que cumplan todos los criterios esta semana.")
+
+        return top_assets
+
+    @staticmethod
+    def _records(results):
+        """
+        Normaliza la entrada a AssetRecords. Además del contenedor del
+        análisis acepta las formas antiguas: dict símbolo -> métricas y
+        listas de dicts o de tuplas (símbolo, métricas).
+        """
+        if isinstance(results, AssetRecords):
+            return results
         items = []
         if isinstance(results, dict):
             items = [{"symbol": sym, **metrics} for sym, metrics in results.items() if isinstance(metrics, dict)]
@@ -21,49 +230,7 @@ class SelectorAgent:
                 if isinstance(el, tuple) and len(el) == 2:
                     symbol, metrics = el
                     if isinstance(metrics, dict):
-                        metrics["symbol"] = symbol
-                        items.append(metrics)
+                        items.append({**metrics, "symbol": symbol})
                 elif isinstance(el, dict):
                     items.append(el)
-        else:
-            return []
-
-        if not items:
-            return []
-
-        df = pd.DataFrame(items)
-
-        # Filtros de calidad ESTRICTOS
-        df = df.dropna(subset=["score", "rsi", "rr_ratio_2"])
-        
-        # Solo score >= 8.0 (ya viene filtrado del Analysis Agent, pero por si acaso)
-        df = df[df["score"] >= 8.0]
-        
-        # Ratio R/R mínimo de 5:1 para target 2
-        min_rr = self.config.get("targets", {}).get("min_risk_reward_ratio", 5.0)
-        df = df[df["rr_ratio_2"] >= min_rr]
-        
-        # Eliminar valores con volatilidad extrema (ATR > 2%)
-        df = df[df["atr_pct"] <= 2.0]
-        
-        # Ordenar por score (ya viene ordenado, pero reforzamos)
-        df = df.sort_values(by="score", ascending=False)
-
-        # Seleccionar top N
-        top_n = self.config.get("top_n", 3)
-        top_assets = df.head(top_n).to_dict(orient="records")
-
-        # Estadísticas
-        if top_assets:
-            avg_score = sum(a["score"] for a in top_assets) / len(top_assets)
-            strong_signals = sum(1 for a in top_assets if a["score"] >= 8.5)
-            avg_rr = sum(a["rr_ratio_2"] for a in top_assets) / len(top_assets)
-            
-            print(f"✅ Selección final: {len(top_assets)} oportunidades de {len(items)} candidatos")
-            print(f"   📊 Score promedio: {avg_score:.2f}/10")
-            print(f"   🟢 Señales MUY FUERTES (8.5+): {strong_signals}/{len(top_assets)}")
-            print(f"   💎 R/R promedio: {avg_rr:.1f}:1")
-        else:
-            print("⚠️ No hay activos que cumplan todos los criterios esta semana.")
-        
-        return top_assets
+        return AssetRecords.from_dicts(items)
@@ -1,6 +1,16 @@
 import os
-import requests
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from utils.finnhub_client import FinnhubClient
+from utils.response_cache import ResponseCache
+from utils.keyword_scorer import KeywordScorer
+from utils.metrics import metrics
+
+# Antigüedad máxima (días) de cada namespace de la caché: el calendario se
+# guarda por día, insiders por mes y las noticias cubren la última semana
+CACHE_MAX_AGE_DAYS = {"earnings-calendar": 2, "insider-sentiment": 32, "company-news": 8}
 
 class SentimentAgent:
     """
@@ -13,12 +23,29 @@ class SentimentAgent:
         self.sentiment_config = config.get("sentiment", {})
         self.enabled = self.sentiment_config.get("enabled", False)
         self.api_key = os.getenv(self.sentiment_config.get("finnhub_api_key_env", "FINNHUB_API_KEY"))
-        self.base_url = "https://finnhub.io/api/v1"
+        self.base_url = self.sentiment_config.get("base_url", "https://finnhub.io/api/v1")
+        self.concurrency = max(1, int(self.sentiment_config.get("concurrency", 4)))
+        self.client = None
+        self.executor = None  # Peticiones por endpoint; se crea en la primera llamada de cada ejecución
+        self.executor_lock = threading.Lock()
+        self.cache_dir = self.sentiment_config.get("cache_dir", "data_cache/finnhub")
+        self.response_cache = ResponseCache(self.cache_dir, CACHE_MAX_AGE_DAYS)
+        self.news_cache_minutes = self.sentiment_config.get("news_cache_minutes", 60)
+        self.earnings_calendar = None  # símbolo -> fecha, precargado por run
+        self.scorer = KeywordScorer(self.sentiment_config.get("lexicon"))
         
         if self.enabled and not self.api_key:
             print("⚠️ Finnhub API key no configurada. Deshabilitando análisis de sentiment.")
             self.enabled = False
         elif self.enabled:
+            self.client = FinnhubClient(
+                self.api_key,
+                base_url=self.base_url,
+                requests_per_minute=self.sentiment_config.get("requests_per_minute", 60),
+                max_retries=self.sentiment_config.get("max_retries", 3),
+                retry_backoff_sec=self.sentiment_config.get("retry_backoff_sec", 2.0),
+                pool_size=self.concurrency * 3
+            )
             print("✅ Sentiment Agent habilitado con Finnhub API")
     
     def get_company_news(self, symbol, days_back=7):
@@ -27,82 +54,125 @@ class SentimentAgent:
             return []
         
         try:
-            to_date = datetime.now().strftime('%Y-%m-%d')
-            from_date = (datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%d')
+            today = datetime.now()
+            to_date = today.strftime('%Y-%m-%d')
+            from_date = (today - timedelta(days=days_back)).strftime('%Y-%m-%d')
+            
+            # Caché: solo se piden los días que faltan desde la última descarga
+            cached = self.response_cache.get("company-news", symbol)
+            if cached and cached.get('to') == to_date and \
+                    time.time() - cached.get('fetched_at', 0) < self.news_cache_minutes * 60:
+                return self._recent_news(cached['items'], from_date)
+            
+            fetch_from = from_date
+            if cached and from_date <= cached.get('to', '') <= to_date:
+                fetch_from = cached['to']  # Se repite el último día: pudo quedar incompleto
             
-            url = f"{self.base_url}/company-news"
             params = {
                 'symbol': symbol,
-                'from': from_date,
-                'to': to_date,
-                'token': self.api_key
+                'from': fetch_from,
+                'to': to_date
             }
             
-            response = requests.get(url, params=params, timeout=10)
-            if response.status_code == 200:
-                return response.json()[:10]  # Top 10 noticias
-            else:
-                return []
+            data = self.client.get("company-news", params)
+            if data is None:
+                return self._recent_news(cached['items'], from_date) if cached else []
+            
+            items = {self._news_key(n): n for n in (cached['items'] if cached else [])}
+            items.update({self._news_key(n): n for n in data})
+            merged = self._recent_news(list(items.values()), from_date, limit=None)
+            self.response_cache.put("company-news", symbol, {
+                'to': to_date,
+                'fetched_at': time.time(),
+                'items': merged
+            })
+            return merged[:10]  # Top 10 noticias
         except Exception as e:
             print(f"   ⚠️ Error obteniendo noticias de {symbol}: {e}")
             return []
     
+    def _news_key(self, news):
+        return news.get('id') or f"{news.get('datetime')}|{news.get('headline')}"
+    
+    def _recent_news(self, items, from_date, limit=10):
+        """Noticias desde from_date, de la más reciente a la más antigua."""
+        since = datetime.strptime(from_date, '%Y-%m-%d').timestamp()
+        recent = [n for n in items if n.get('datetime', since) >= since]
+        recent.sort(key=lambda n: n.get('datetime', 0), reverse=True)
+        return recent[:limit] if limit else recent
+    
     def calculate_sentiment_score(self, news_list):
         """
         Calcula score de sentiment basado en noticias.
         Retorna: score (-1 a +1), negative_count, positive_count
         """
-        if not news_list:
-            return 0, 0, 0
-        
-        # Palabras clave positivas/negativas simples
-        positive_keywords = ['surge', 'soar', 'beat', 'strong', 'growth', 'profit', 'upgrade', 'buyback', 'deal', 'partnership']
-        negative_keywords = ['plunge', 'crash', 'miss', 'weak', 'loss', 'downgrade', 'investigation', 'lawsuit', 'warning', 'decline']
+        return self.scorer.score_news(news_list)
+    
+    def _earnings_info(self, earnings_date):
+        earnings_dt = datetime.strptime(earnings_date, '%Y-%m-%d')
+        days_until = (earnings_dt - datetime.now()).days
+        return {
+            'date': earnings_date,
+            'days_until': days_until
+        }
+    
+    def prefetch_earnings_calendar(self):
+        """
+        Descarga una sola vez el calendario de earnings de todo el mercado para
+        la ventana de exclusión y lo indexa por símbolo. Se guarda en disco con
+        clave diaria para que las demás ejecuciones del día no repitan la llamada.
+        """
+        if not self.enabled:
+            return None
         
-        sentiment_scores = []
-        negative_count = 0
-        positive_count = 0
+        exclude_days = self.config.get("quality_filters", {}).get("exclude_earnings_days", 7)
+        today = datetime.now()
+        from_date = today.strftime('%Y-%m-%d')
+        to_date = (today + timedelta(days=exclude_days + 1)).strftime('%Y-%m-%d')
+        cache_key = f"{today.strftime('%Y%m%d')}_{exclude_days}d"
         
-        for news in news_list:
-            headline = news.get('headline', '').lower()
-            summary = news.get('summary', '').lower()
-            text = headline + ' ' + summary
+        calendar = self.response_cache.get("earnings-calendar", cache_key)
+        if calendar is not None:
+            print(f"💾 Calendario de earnings desde caché ({len(calendar)} símbolos)")
+        else:
+            data = self.client.get("calendar/earnings", {'from': from_date, 'to': to_date})
+            if data is None:
+                print("⚠️ No se pudo precargar el calendario de earnings. Consulta por símbolo.")
+                self.earnings_calendar = None
+                return None
             
-            score = 0
-            for word in positive_keywords:
-                if word in text:
-                    score += 1
-            for word in negative_keywords:
-                if word in text:
-                    score -= 1
+            calendar = {}
+            for item in data.get('earningsCalendar', []):
+                symbol = item.get('symbol')
+                date = item.get('date')
+                if not symbol or not date or date < from_date:
+                    continue
+                if symbol not in calendar or date < calendar[symbol]:
+                    calendar[symbol] = date
             
-            sentiment_scores.append(score)
-            if score < 0:
-                negative_count += 1
-            elif score > 0:
-                positive_count += 1
+            self.response_cache.put("earnings-calendar", cache_key, calendar)
+            print(f"📅 Calendario de earnings precargado ({len(calendar)} símbolos, {from_date} → {to_date})")
         
-        # Calcular promedio normalizado (-1 a +1)
-        avg_score = sum(sentiment_scores) / len(sentiment_scores) if sentiment_scores else 0
-        normalized_score = max(-1, min(1, avg_score / 3))  # Normalizar
-        
-        return normalized_score, negative_count, positive_count
+        self.earnings_calendar = calendar
+        return calendar
     
     def get_earnings_calendar(self, symbol):
         """Verifica si hay earnings próximos."""
         if not self.enabled:
             return None
         
+        # Servir desde el calendario precargado si existe
+        if self.earnings_calendar is not None:
+            earnings_date = self.earnings_calendar.get(symbol)
+            return self._earnings_info(earnings_date) if earnings_date else None
+        
         try:
-            url = f"{self.base_url}/calendar/earnings"
             params = {
-                'symbol': symbol,
-                'token': self.api_key
+                'symbol': symbol
             }
             
-            response = requests.get(url, params=params, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
+            data = self.client.get("calendar/earnings", params)
+            if data is not None:
                 earnings = data.get('earningsCalendar', [])
                 
                 if earnings:
@@ -111,12 +181,7 @@ class SentimentAgent:
                     earnings_date = next_earnings.get('date')
                     
                     if earnings_date:
-                        earnings_dt = datetime.strptime(earnings_date, '%Y-%m-%d')
-                        days_until = (earnings_dt - datetime.now()).days
-                        return {
-                            'date': earnings_date,
-                            'days_until': days_until
-                        }
+                        return self._earnings_info(earnings_date)
             return None
         except Exception as e:
             return None
@@ -127,17 +192,22 @@ class SentimentAgent:
             return None
         
         try:
-            url = f"{self.base_url}/stock/insider-sentiment"
-            params = {
-                'symbol': symbol,
-                'from': (datetime.now() - timedelta(days=90)).strftime('%Y-%m-%d'),
-                'to': datetime.now().strftime('%Y-%m-%d'),
-                'token': self.api_key
-            }
+            # Datos mensuales: se sirven desde caché el resto del mes
+            cache_key = f"{symbol}_{datetime.now().strftime('%Y%m')}"
+            data = self.response_cache.get("insider-sentiment", cache_key)
             
-            response = requests.get(url, params=params, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
+            if data is None:
+                params = {
+                    'symbol': symbol,
+                    'from': (datetime.now() - timedelta(days=90)).strftime('%Y-%m-%d'),
+                    'to': datetime.now().strftime('%Y-%m-%d')
+                }
+                
+                data = self.client.get("stock/insider-sentiment", params)
+                if data is not None:
+                    self.response_cache.put("insider-sentiment", cache_key, data)
+            
+            if data is not None:
                 if data.get('data'):
                     # Sumar compras y ventas
                     total_change = sum(item.get('change', 0) for item in data['data'])
@@ -158,21 +228,75 @@ class SentimentAgent:
         Retorna dict con toda la información.
         """
         if not self.enabled:
-            return {
-                'enabled': False,
-                'sentiment_score': 0,
-                'passes': True
-            }
+            return self._disabled_analysis()
+        gathered = self._gather(symbol)
+        if gathered["analysis"] is not None:
+            return gathered["analysis"]
+        return self._decide(gathered, *self.calculate_sentiment_score(gathered["news"]))
+    
+    def analyze_batch(self, symbols):
+        """
+        Análisis de varios símbolos: las llamadas a Finnhub van en paralelo
+        (`concurrency` símbolos en vuelo) y las noticias de todos se puntúan
+        después de una sola pasada (KeywordScorer.score_batch).
+        Retorna la lista de análisis en el orden de `symbols`.
+        """
+        if not self.enabled:
+            return [self._disabled_analysis() for _ in symbols]
+        if len(symbols) <= 1 or self.concurrency == 1:
+            gathered = [self._gather(s) for s in symbols]
+        else:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                gathered = list(pool.map(self._gather, symbols))
         
-        # 1. Noticias y sentiment
-        news = self.get_company_news(symbol)
-        sentiment_score, negative_count, positive_count = self.calculate_sentiment_score(news)
+        scores = self.scorer.score_batch({g["symbol"]: g["news"] for g in gathered if g["analysis"] is None})
+        return [g["analysis"] or self._decide(g, *scores[g["symbol"]]) for g in gathered]
+    
+    @staticmethod
+    def _disabled_analysis():
+        return {
+            'enabled': False,
+            'sentiment_score': 0,
+            'passes': True
+        }
+    
+    def _gather(self, symbol):
+        """
+        Descarga noticias, earnings e insiders de un símbolo. Retorna dict con
+        esos datos, y en "analysis" el análisis final si los earnings ya lo descartan.
+        """
+        exclude_days = self.config.get("quality_filters", {}).get("exclude_earnings_days", 7)
+        check_earnings = self.sentiment_config.get("check_earnings_calendar", True)
         
-        # 2. Earnings calendar
-        earnings = self.get_earnings_calendar(symbol)
+        executor = self._executor()
         
-        # 3. Insider sentiment
-        insider = self.get_insider_sentiment(symbol)
+        # Con el calendario precargado, los earnings próximos descartan el valor
+        # sin gastar llamadas en noticias ni insiders
+        earnings_future = None
+        if self.earnings_calendar is not None:
+            earnings = self.get_earnings_calendar(symbol)
+            if check_earnings and earnings and 0 <= earnings['days_until'] <= exclude_days:
+                analysis = self._build_analysis(symbol, 0, [], 0, 0, earnings, None, False,
+                                                [f"Earnings en {earnings['days_until']} días"])
+                return {"symbol": symbol, "analysis": analysis}
+        else:
+            earnings_future = executor.submit(self.get_earnings_calendar, symbol)
+        
+        # Los endpoints restantes se piden en paralelo (el cliente respeta el rate limit)
+        news_future = executor.submit(self.get_company_news, symbol)
+        insider_future = executor.submit(self.get_insider_sentiment, symbol)
+        
+        news = news_future.result()
+        if earnings_future is not None:
+            earnings = earnings_future.result()
+        insider = insider_future.result()
+        return {"symbol": symbol, "analysis": None, "news": news, "earnings": earnings, "insider": insider}
+    
+    def _decide(self, gathered, sentiment_score, negative_count, positive_count):
+        """Aplica los filtros de sentiment, noticias negativas y earnings a lo descargado."""
+        symbol, news, earnings = gathered["symbol"], gathered["news"], gathered["earnings"]
+        exclude_days = self.config.get("quality_filters", {}).get("exclude_earnings_days", 7)
+        check_earnings = self.sentiment_config.get("check_earnings_calendar", True)
         
         # Decidir si pasa los filtros
         passes = True
@@ -191,12 +315,30 @@ class SentimentAgent:
             reasons.append(f"Muchas noticias negativas ({negative_count})")
         
         # Filtro 3: Earnings próximos
-        if self.sentiment_config.get("check_earnings_calendar", True) and earnings:
-            exclude_days = self.config.get("quality_filters", {}).get("exclude_earnings_days", 7)
+        if check_earnings and earnings:
             if 0 <= earnings['days_until'] <= exclude_days:
                 passes = False
                 reasons.append(f"Earnings en {earnings['days_until']} días")
         
+        return self._build_analysis(symbol, sentiment_score, news, positive_count, negative_count,
+                                    earnings, gathered["insider"], passes, reasons)
+    
+    def _executor(self):
+        """Pool de peticiones compartido por los hilos que descargan símbolos (uno solo por ejecución)."""
+        with self.executor_lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.concurrency * 3)
+            return self.executor
+    
+    def shutdown(self):
+        """Cierra el pool de peticiones al terminar una ejecución; la siguiente crea otro."""
+        with self.executor_lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+    
+    def _build_analysis(self, symbol, sentiment_score, news, positive_count, negative_count,
+                        earnings, insider, passes, reasons):
         return {
             'enabled': True,
             'symbol': symbol,
@@ -210,6 +352,7 @@ class SentimentAgent:
             'reject_reasons': reasons
         }
     
+    @metrics.timed("stage_seconds", stage="sentiment_filter")
     def filter_symbols(self, symbols):
         """Filtra símbolos basándose en análisis de sentiment."""
         if not self.enabled:
@@ -221,34 +364,46 @@ class SentimentAgent:
         
         approved = []
         sentiment_data = {}
+        start_time = time.time()
+        start_requests = self.client.request_count
+        start_retries = self.client.retry_count
         
-        for i, symbol in enumerate(symbols, 1):
-            print(f"\n[{i}/{len(symbols)}] Analizando {symbol}...")
-            
-            analysis = self.analyze_symbol(symbol)
+        if self.sentiment_config.get("check_earnings_calendar", True):
+            self.prefetch_earnings_calendar()
+        
+        # Varios símbolos en vuelo a la vez; las noticias se puntúan juntas al final
+        try:
+            analyses = self.analyze_batch(symbols)
+        finally:
+            self.shutdown()
+        for i, (symbol, analysis) in enumerate(zip(symbols, analyses), 1):
+            self._report_analysis(i, len(symbols), symbol, analysis, approved)
             sentiment_data[symbol] = analysis
-            
-            if analysis['passes']:
-                approved.append(symbol)
-                score = analysis['sentiment_score']
-                emoji = "📈" if score > 0.2 else "📊" if score > -0.2 else "📉"
-                print(f"   ✅ {emoji} Sentiment: {score:.2f} | Noticias: {analysis['news_count']}")
-                
-                if analysis.get('insider'):
-                    insider_signal = analysis['insider']['signal']
-                    print(f"      💼 Insiders: {insider_signal}")
-            else:
-                print(f"   ❌ RECHAZADO: {', '.join(analysis['reject_reasons'])}")
-            
-            # Rate limiting: 60 requests/min = 1 request/segundo
-            if i < len(symbols):
-                import time
-                time.sleep(1.1)
+        
+        elapsed = time.time() - start_time
         
         print(f"\n{'='*50}")
         print(f"📊 RESUMEN SENTIMENT:")
         print(f"   ✅ Aprobados: {len(approved)}/{len(symbols)}")
         print(f"   ❌ Rechazados: {len(symbols) - len(approved)}")
+        print(f"   ⏱️ {elapsed:.1f}s | {self.client.request_count - start_requests} llamadas API "
+              f"({self.client.retry_count - start_retries} reintentos)")
         print(f"{'='*50}\n")
         
         return approved, sentiment_data
+    
+    def _report_analysis(self, i, total, symbol, analysis, approved):
+        """Imprime el resultado de un símbolo y lo añade a aprobados si pasa."""
+        print(f"\n[{i}/{total}] Analizando {symbol}...")
+        
+        if analysis['passes']:
+            approved.append(symbol)
+            score = analysis['sentiment_score']
+            emoji = "📈" if score > 0.2 else "📊" if score > -0.2 else "📉"
+            print(f"   ✅ {emoji} Sentiment: {score:.2f} | Noticias: {analysis['news_count']}")
+            
+            if analysis.get('insider'):
+                insider_signal = analysis['insider']['signal']
+                print(f"      💼 Insiders: {insider_signal}")
+        else:
+            print(f"   ❌ RECHAZADO: {', '.join(analysis['reject_reasons'])}")
@@ -0,0 +1,43 @@
+import argparse
+import json
+from datetime import datetime
+from agents.backtest_agent import BacktestAgent
+from orchestrator import load_config, build_universe
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest walk-forward de las señales 8+/10")
+    parser.add_argument("--symbols", nargs="+", help="Símbolos a probar (por defecto el universo de config.json)")
+    parser.add_argument("--years", type=int, help="Años de histórico (por defecto config.json backtest.years)")
+    parser.add_argument("--download", action="store_true",
+                        help="Descargar el histórico completo antes de simular")
+    parser.add_argument("--output", help="Fichero JSON de resultados (por defecto backtest_YYYYMMDD.json)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = load_config()
+    if args.years:
+        config.setdefault("backtest", {})["years"] = args.years
+
+    print("🧪 BACKTEST - Reglas de scoring sobre el histórico local")
+    symbols = args.symbols or build_universe(config)
+
+    agent = BacktestAgent(config)
+    prices = agent.load_history(symbols, download=args.download)
+    if not prices:
+        print("❌ Sin histórico suficiente. Ejecuta con --download.")
+        return
+
+    result = agent.run(prices)
+    agent.print_report(result)
+
+    filename = args.output or f"backtest_{datetime.now().strftime('%Y%m%d')}.json"
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    print(f"💾 Resultados guardados en {filename}")
+
+
+if __name__ == "__main__":
+    main()
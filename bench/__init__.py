@@ -0,0 +1 @@
+"""Benchmarks offline del pipeline con respuestas grabadas de los proveedores."""
@@ -0,0 +1,103 @@
+"""
+Micro-benchmark del SuperTrend: bucle original con iloc vs kernel sobre arrays.
+
+Uso:
+    python bench/bench_supertrend.py [n_simbolos] [n_dias]
+"""
+
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.data_agent import DataAgent
+from utils.indicators import build_panel, supertrend
+
+
+def legacy_supertrend(agent, df, period=7, multiplier=3):
+    """Implementación original (iloc escalar en un bucle Python)."""
+    atr = agent.compute_atr(df, period)
+    hl_avg = (df["High"] + df["Low"]) / 2
+    upper_band = hl_avg + (multiplier * atr)
+    lower_band = hl_avg - (multiplier * atr)
+
+    supertrend_values = pd.Series(index=df.index, dtype=float)
+    direction = pd.Series(index=df.index, dtype=float)
+
+    for i in range(period, len(df)):
+        if df["Close"].iloc[i] > upper_band.iloc[i-1]:
+            supertrend_values.iloc[i] = lower_band.iloc[i]
+            direction.iloc[i] = 1
+        elif df["Close"].iloc[i] < lower_band.iloc[i-1]:
+            supertrend_values.iloc[i] = upper_band.iloc[i]
+            direction.iloc[i] = -1
+        else:
+            supertrend_values.iloc[i] = supertrend_values.iloc[i-1]
+            direction.iloc[i] = direction.iloc[i-1]
+
+    return supertrend_values, direction
+
+
+def synthetic_ohlcv(n_symbols, n_days, seed=42):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=n_days)
+    frames = []
+    for _ in range(n_symbols):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, n_days)))
+        open_ = close * (1 + rng.normal(0, 0.003, n_days))
+        high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.006, n_days)))
+        low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.006, n_days)))
+        volume = rng.integers(100_000, 5_000_000, n_days).astype(float)
+        frames.append(pd.DataFrame(
+            {"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume},
+            index=index
+        ))
+    return frames
+
+
+def main():
+    n_symbols = int(sys.argv[1]) if len(sys.argv) > 1 else 480
+    n_days = int(sys.argv[2]) if len(sys.argv) > 2 else 62
+    period, multiplier = 7, 1.5
+
+    agent = DataAgent([], {})
+    frames = synthetic_ohlcv(n_symbols, n_days)
+
+    # Calentar (compilación de Numba si está instalado)
+    agent.compute_supertrend(frames[0], period, multiplier)
+
+    start = time.perf_counter()
+    legacy = [legacy_supertrend(agent, df, period, multiplier) for df in frames]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    single = [agent.compute_supertrend(df, period, multiplier) for df in frames]
+    single_time = time.perf_counter() - start
+
+    panel = build_panel(frames)
+    start = time.perf_counter()
+    values, direction = supertrend(panel[:, :, 1], panel[:, :, 2], panel[:, :, 3], period, multiplier)
+    batch_time = time.perf_counter() - start
+
+    for j, (old, new) in enumerate(zip(legacy, single)):
+        assert np.array_equal(old[0].to_numpy(), new[0].to_numpy(), equal_nan=True), j
+        assert np.array_equal(old[1].to_numpy(), new[1].to_numpy(), equal_nan=True), j
+        assert np.array_equal(old[0].to_numpy(), values[j], equal_nan=True), j
+        assert np.array_equal(old[1].to_numpy(), direction[j], equal_nan=True), j
+
+    print(f"SuperTrend: {n_symbols} símbolos × {n_days} días")
+    print(f"{'Implementación':<28}{'por símbolo':>14}{'universo':>12}")
+    for name, elapsed in [
+        ("iloc (original)", legacy_time),
+        ("kernel por símbolo", single_time),
+        ("kernel por lote (panel)", batch_time),
+    ]:
+        print(f"{name:<28}{elapsed / n_symbols * 1e6:>11.1f} µs{elapsed:>11.3f}s")
+    print("✅ Valores idénticos a la implementación original")
+
+
+if __name__ == "__main__":
+    main()
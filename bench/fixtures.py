@@ -0,0 +1,192 @@
+"""
+Fixtures sintéticos de datos de mercado para el benchmark.
+
+Cada universo se guarda en bench/fixtures/<n>/ con las respuestas que
+devolverían los proveedores:
+  prices.npz    OHLCV diario (campo × símbolo × día) para yf.download
+  info.json     Ticker.info por símbolo
+  finnhub.json  noticias, calendario de earnings e insider sentiment
+  meta.json     versión del generador y símbolos con patrón de señal
+Las fechas se guardan como antigüedad relativa (días hábiles / segundos) y
+replay.py las ancla al día en que se ejecuta el benchmark.
+
+    python -m bench.fixtures --sizes 500 2000 10000
+"""
+
+import argparse
+import json
+import os
+import numpy as np
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+SIZES = (500, 2000, 10000)
+DAYS = 150
+FIELDS = ("Open", "High", "Low", "Close", "Volume")
+VERSION = 2        # Cambiarlo al modificar generate(): ensure() regenera los fixtures antiguos
+SIGNAL_SHARE = 0.03  # Fracción de símbolos con el patrón que dispara una señal de compra
+
+HEADLINES = [
+    "{name} shares surge after earnings beat",
+    "{name} announces buyback and strong growth outlook",
+    "Analysts upgrade {name} on partnership deal",
+    "{name} reports record profit",
+    "{name} stock plunges on weak guidance",
+    "{name} faces investigation over accounting",
+    "{name} issues profit warning as sales decline",
+    "Lawsuit filed against {name}",
+    "{name} to present at industry conference",
+    "{name} appoints new chief financial officer",
+    "What to watch in {name} this week",
+]
+SECTORS = [
+    "Technology", "Healthcare", "Financial Services", "Energy", "Industrials",
+    "Consumer Cyclical", "Consumer Defensive", "Utilities", "Real Estate",
+    "Basic Materials", "Communication Services",
+]
+
+
+def fixture_path(size):
+    return os.path.join(FIXTURES_DIR, str(size))
+
+
+def seed_signals(close, open_, high, low, volume, rng):
+    """
+    Sustituye la serie de cada fila por una tendencia alcista tranquila que
+    termina en capitulación (3 velas amplias de -5/-7%), 6 días de deriva
+    bajista estrecha y un rebote con volumen triple: RSI y estocástico en
+    sobreventa, MACD girando al alza y ATR(7) bajo, mientras el ATR(10) de
+    Keltner aún incluye la caída y deja el R/R por encima de 5. Con el resto
+    de filas aleatorias la configuración por defecto no detecta ninguna señal.
+    """
+    rows, days = close.shape
+    returns = np.empty((rows, days))
+    width = np.full((rows, days), 0.002)
+    returns[:, :-10] = rng.normal(0.003, 0.001, (rows, days - 10))
+    returns[:, -10:-7] = -rng.uniform(0.05, 0.07, (rows, 1))
+    width[:, -10:-7] = rng.uniform(0.015, 0.025, (rows, 1))
+    returns[:, -7:-1] = -rng.uniform(0.001, 0.002, (rows, 1))
+    width[:, -7:] = 0.001
+    returns[:, -1] = rng.uniform(0.001, 0.003, rows)
+
+    close[:] = close[:, :1] * np.exp(np.cumsum(returns, axis=1))
+    open_[:, 0] = close[:, 0]
+    open_[:, 1:] = close[:, :-1]
+    high[:] = np.maximum(open_, close) * (1 + width)
+    low[:] = np.minimum(open_, close) * (1 - width)
+    volume[:] = volume[:, :1]
+    volume[:, -1] *= 3
+
+
+def generate(size, path=None, seed=0):
+    """Genera el universo sintético de `size` símbolos. Retorna la ruta."""
+    path = path or fixture_path(size)
+    os.makedirs(path, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    symbols = [f"B{i:05d}" for i in range(size)]
+
+    # Paseos aleatorios con deriva y volatilidad por símbolo
+    drift = rng.normal(0.0003, 0.001, (size, 1))
+    vol = rng.uniform(0.006, 0.02, (size, 1))
+    start = rng.uniform(20, 400, (size, 1))
+    close = start * np.exp(np.cumsum(rng.normal(drift, vol, (size, DAYS)), axis=1))
+    open_ = close * (1 + rng.normal(0, 0.003, (size, DAYS)))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.005, (size, DAYS))))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.005, (size, DAYS))))
+    volume = rng.lognormal(14.5, 0.6, (size, 1)) * rng.lognormal(0, 0.3, (size, DAYS))
+
+    # Generador aparte para el patrón de señal: el resto del fixture no cambia
+    seeded = np.random.default_rng(seed + 1).choice(size, max(1, int(size * SIGNAL_SHARE)), replace=False)
+    seeded.sort()
+    parts = [a[seeded] for a in (close, open_, high, low, volume)]
+    seed_signals(*parts, np.random.default_rng(seed + 2))
+    for array, part in zip((close, open_, high, low, volume), parts):
+        array[seeded] = part
+    ohlcv = np.stack([open_, high, low, close, volume]).astype(np.float32)
+    np.savez(os.path.join(path, "prices.npz"), symbols=np.array(symbols), ohlcv=ohlcv)
+
+    # Ticker.info: ~30% no pasa algún filtro de calidad
+    info = {}
+    last = close[:, -1]
+    for i, symbol in enumerate(symbols):
+        price = float(round(last[i], 2))
+        spread = float(rng.choice([0.0005, 0.001, 0.008], p=[0.6, 0.35, 0.05]))
+        info[symbol] = {
+            "marketCap": float(rng.lognormal(23.5, 1.2)),
+            "averageVolume": int(rng.lognormal(14.5, 0.8)),
+            "currentPrice": price,
+            "bid": round(price * (1 - spread / 2), 2),
+            "ask": round(price * (1 + spread / 2), 2),
+            "beta": round(float(rng.uniform(0.4, 2.2)), 2),
+            "shortName": f"Bench Corp {i}",
+            "sector": SECTORS[i % len(SECTORS)],  # Sin tirar del generador: el resto no cambia
+        }
+    with open(os.path.join(path, "info.json"), "w", encoding="utf-8") as f:
+        json.dump(info, f)
+
+    # Finnhub: hasta 8 noticias por símbolo, earnings del ~10% en los próximos 14 días
+    news, insider = {}, {}
+    for i, symbol in enumerate(symbols):
+        news[symbol] = [
+            {
+                "id": i * 100 + j,
+                "age_sec": int(rng.integers(0, 7 * 86400)),
+                "headline": HEADLINES[rng.integers(len(HEADLINES))].format(name=info[symbol]["shortName"]),
+                "summary": "",
+                "source": "bench",
+            }
+            for j in range(int(rng.integers(0, 9)))
+        ]
+        insider[symbol] = {"symbol": symbol, "data": [
+            {"month": m, "change": int(rng.integers(-50000, 50000)), "mspr": float(rng.uniform(-100, 100))}
+            for m in range(3)
+        ]}
+    earnings = [
+        {"symbol": symbol, "days_ahead": int(rng.integers(0, 14))}
+        for symbol in symbols if rng.random() < 0.1
+    ]
+    with open(os.path.join(path, "finnhub.json"), "w", encoding="utf-8") as f:
+        json.dump({"company-news": news, "stock/insider-sentiment": insider, "calendar/earnings": earnings}, f)
+    with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"version": VERSION, "signal_symbols": [symbols[i] for i in seeded]}, f)
+    return path
+
+
+def ensure(size):
+    """Ruta del fixture, generándolo si aún no existe."""
+    path = fixture_path(size)
+    meta = os.path.join(path, "meta.json")
+    version = None
+    if os.path.exists(meta):
+        with open(meta, "r", encoding="utf-8") as f:
+            version = json.load(f).get("version")
+    if version != VERSION:
+        print(f"🧪 Generando fixture de {size} símbolos en {path}...")
+        generate(size, path)
+    return path
+
+
+def load(path):
+    """Carga un fixture: (símbolos, ohlcv, info, finnhub)."""
+    prices = np.load(os.path.join(path, "prices.npz"))
+    with open(os.path.join(path, "info.json"), "r", encoding="utf-8") as f:
+        info = json.load(f)
+    with open(os.path.join(path, "finnhub.json"), "r", encoding="utf-8") as f:
+        finnhub = json.load(f)
+    return [str(s) for s in prices["symbols"]], prices["ohlcv"], info, finnhub
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Genera los fixtures sintéticos del benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="Tamaños del universo")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    for size in args.sizes:
+        print(f"✅ Fixture de {size} símbolos → {generate(size, seed=args.seed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Prueba de carga de las etapas de red contra el servidor simulado: filtro de
+calidad (Yahoo quoteSummary), sentiment (Finnhub), descarga de precios (Yahoo
+chart) y envío del reporte (Telegram), con la concurrencia, reintentos y
+límites de tasa de config.json.
+
+    python -m bench.load --symbols 1000 --latency-ms 80 --error-rate 0.02 \\
+        --rate-limit finnhub=5 --set sentiment.requests_per_minute=600
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from bench.mock_server import add_arguments, build_profiles, start
+from orchestrator import load_config
+from sweep import apply_overrides
+from utils.metrics import metrics
+
+
+def parse_value(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def load_config_for(server, overrides, workdir):
+    """config.json apuntando al servidor simulado, con las sustituciones de --set."""
+    urls = server.base_urls()
+    config = apply_overrides(load_config(), {
+        "yahoo.base_url": urls["yahoo"],
+        "sentiment.base_url": urls["finnhub"],
+        "sentiment.enabled": True,
+        "telegram.base_url": urls["telegram"],
+        "quality_filters.cache": {"enabled": False},
+        "price_store.enabled": False,
+        "indicator_state.enabled": False,
+        **overrides,
+    })
+    config.setdefault("sentiment", {})["cache_dir"] = os.path.join(workdir, "finnhub")  # Caché en frío
+    return config
+
+
+def run(config, symbols):
+    """Ejecuta las etapas de red. Retorna {etapa: (segundos, entrada, salida)}."""
+    from agents.quality_filter_agent import QualityFilterAgent
+    from agents.sentiment_agent import SentimentAgent
+    from agents.data_agent import DataAgent
+    from agents.report_agent import ReportAgent
+
+    stages = {}
+
+    def measure(name, fn, items_in):
+        start = time.perf_counter()
+        with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+            output = fn()
+        stages[name] = (time.perf_counter() - start, items_in, len(output))
+        return output
+
+    approved = measure("quality", lambda: QualityFilterAgent(config).filter_symbols(symbols), len(symbols))
+    sentiment = SentimentAgent(config)
+    measure("sentiment", lambda: sentiment.filter_symbols(approved)[0], len(approved))
+    measure("data", lambda: DataAgent(approved, config).batch_download(), len(approved))
+    telegram = config.get("telegram", {})
+    reporter = ReportAgent("load", "load", "detailed", telegram["base_url"], telegram.get("message_pause_sec", 1.0))
+    measure("report", lambda: [reporter.send_report([])], 1)
+    return stages
+
+
+def print_summary(stages, snapshot, server_stats):
+    print(f"\n{'='*50}")
+    print(f"🌐 PRUEBA DE CARGA")
+    print(f"{'='*50}")
+    print(f"   {'Etapa':<10}{'Entrada':>8}{'Salida':>8}{'Pared':>9}{'Items/s':>9}")
+    for name, (seconds, items_in, items_out) in stages.items():
+        print(f"   {name:<10}{items_in:>8}{items_out:>8}{seconds:>8.2f}s{items_in / seconds if seconds else 0:>9.1f}")
+
+    counters = {}
+    for entry in snapshot["counters"]:
+        vendor = entry["labels"].get("vendor")
+        if vendor and entry["name"].startswith("http_"):
+            counters.setdefault(vendor, {}).setdefault(entry["name"], 0)
+            counters[vendor][entry["name"]] += entry["value"]
+    print(f"\n   {'Proveedor':<10}{'Llamadas':>9}{'Reintentos':>11}{'Errores':>9}  Respuestas del servidor")
+    for vendor, statuses in server_stats.items():
+        c = counters.get(vendor, {})
+        served = ", ".join(f"{status}: {n}" for status, n in sorted(statuses.items()))
+        print(f"   {vendor:<10}{c.get('http_requests', 0):>9}{c.get('http_retries', 0):>11}"
+              f"{c.get('http_errors', 0):>9}  {served or '-'}")
+    print(f"{'='*50}\n")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga contra proveedores simulados")
+    add_arguments(parser)
+    parser.add_argument("--symbols", type=int, help="Símbolos del fixture a usar (por defecto todos)")
+    parser.add_argument("--set", action="append", default=[], metavar="SECCION.PARAM=VALOR",
+                        help="Sustituye un parámetro de config.json (repetible)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    overrides = {}
+    for item in args.set:
+        key, _, value = item.partition("=")
+        overrides[key] = parse_value(value)
+
+    os.environ.setdefault("FINNHUB_API_KEY", "load")
+    server = start(args.size, build_profiles(args))
+    workdir = tempfile.mkdtemp()
+    try:
+        config = load_config_for(server, overrides, workdir)
+        symbols = server.fixture.symbols[:args.symbols]
+        print(f"🚀 {len(symbols)} símbolos contra {server.base_urls()['yahoo'].rsplit('/', 1)[0]} "
+              f"(latencia {args.latency_ms:.0f}±{args.jitter_ms:.0f} ms, errores {args.error_rate:.1%})")
+        metrics.reset()
+        stages = run(config, symbols)
+        print_summary(stages, metrics.finish(), server.stats)
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
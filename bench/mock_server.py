@@ -0,0 +1,180 @@
+"""
+Servidor HTTP local que imita a Yahoo, Finnhub y Telegram con los datos de un
+fixture (bench/fixtures.py), con latencia, tasa de errores 5xx y límite de
+peticiones (429 + Retry-After) ajustables por proveedor.
+
+    python -m bench.mock_server --size 2000 --latency-ms 80 --jitter-ms 40 \\
+        --error-rate 0.02 --rate-limit finnhub=1 --rate-limit yahoo=20
+
+y en config.json:
+    "yahoo":     {"base_url": "http://127.0.0.1:8900/yahoo"}
+    "sentiment": {"base_url": "http://127.0.0.1:8900/finnhub/api/v1"}
+    "telegram":  {"base_url": "http://127.0.0.1:8900/telegram"}
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from bench.fixtures import ensure
+from bench.replay import Fixture
+from utils.rate_limit import TokenBucket
+
+VENDORS = ("yahoo", "finnhub", "telegram")
+
+
+class VendorProfile:
+    """Comportamiento simulado de un proveedor: latencia, errores y límite de tasa."""
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, rate_limit=0.0, burst=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.limiter = TokenBucket(rate_limit, burst) if rate_limit > 0 else None
+
+    def delay(self):
+        return max(0.0, self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+
+
+class MockVendorServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, fixture, profiles):
+        super().__init__(address, MockVendorHandler)
+        self.fixture = fixture
+        self.profiles = profiles
+        self.lock = threading.Lock()
+        self.stats = {vendor: {} for vendor in VENDORS}  # proveedor -> estado HTTP -> nº
+
+    def count(self, vendor, status):
+        with self.lock:
+            self.stats[vendor][status] = self.stats[vendor].get(status, 0) + 1
+
+    def base_urls(self):
+        host, port = self.server_address[:2]
+        root = f"http://{host}:{port}"
+        return {"yahoo": f"{root}/yahoo", "finnhub": f"{root}/finnhub/api/v1", "telegram": f"{root}/telegram"}
+
+
+class MockVendorHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Conexiones persistentes, como los proveedores reales
+
+    def do_GET(self):
+        self._handle()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        self._handle()
+
+    def _handle(self):
+        url = urlparse(self.path)
+        if url.path == "/stats":
+            return self._send(200, self.server.stats)
+
+        vendor, _, path = url.path.lstrip("/").partition("/")
+        profile = self.server.profiles.get(vendor)
+        if profile is None:
+            return self._send(404, {"error": "unknown vendor"})
+
+        time.sleep(profile.delay())
+        if profile.limiter is not None and not profile.limiter.try_acquire():
+            return self._send(429, {"error": "API limit reached"}, vendor, {"Retry-After": "1"})
+        if profile.error_rate and random.random() < profile.error_rate:
+            return self._send(503, {"error": "service unavailable"}, vendor)
+
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        payload = self._route(vendor, path, query)
+        if payload is None:
+            return self._send(404, {"error": "not found"}, vendor)
+        self._send(200, payload, vendor)
+
+    def _route(self, vendor, path, query):
+        fixture = self.server.fixture
+        if vendor == "yahoo":
+            if path.startswith("v8/finance/chart/"):
+                return fixture.chart(path.rsplit("/", 1)[-1], query.get("period1"))
+            if path.startswith("v10/finance/quoteSummary/"):
+                return fixture.quote_summary(path.rsplit("/", 1)[-1])
+            return None
+        if vendor == "finnhub":
+            return fixture.finnhub_response(path.replace("api/v1/", "", 1), query)
+        if vendor == "telegram" and path.endswith("/sendMessage"):
+            return {"ok": True, "result": {"message_id": random.randint(1, 10**6)}}
+        return None
+
+    def _send(self, status, payload, vendor=None, headers=None):
+        if vendor is not None:
+            self.server.count(vendor, status)
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start(size, profiles, host="127.0.0.1", port=0):
+    """Arranca el servidor en un hilo. Retorna el servidor (base_urls() da las URLs)."""
+    server = MockVendorServer((host, port), Fixture(ensure(size)), profiles)
+    threading.Thread(target=server.serve_forever, name="mock-vendor", daemon=True).start()
+    return server
+
+
+def build_profiles(args):
+    """Perfiles por proveedor desde los argumentos (--rate-limit proveedor=req/s)."""
+    limits = {}
+    for item in args.rate_limit or []:
+        vendor, _, rate = item.partition("=")
+        if vendor not in VENDORS:
+            raise ValueError(f"Proveedor desconocido: {vendor}")
+        limits[vendor] = float(rate)
+    return {
+        vendor: VendorProfile(args.latency_ms, args.jitter_ms, args.error_rate, limits.get(vendor, 0.0), args.burst)
+        for vendor in VENDORS
+    }
+
+
+def add_arguments(parser):
+    parser.add_argument("--size", type=int, default=2000, help="Fixture (nº de símbolos)")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Latencia media por petición")
+    parser.add_argument("--jitter-ms", type=float, default=20.0, help="Variación uniforme de la latencia")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fracción de respuestas 503")
+    parser.add_argument("--rate-limit", action="append", metavar="PROVEEDOR=REQ/S",
+                        help="Límite de tasa por proveedor; el exceso recibe 429 (repetible)")
+    parser.add_argument("--burst", type=float, help="Ráfaga máxima del límite de tasa")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor simulado de Yahoo, Finnhub y Telegram")
+    add_arguments(parser)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = start(args.size, build_profiles(args), args.host, args.port)
+    print(f"🧪 Proveedores simulados ({args.size} símbolos) escuchando:")
+    for vendor, url in server.base_urls().items():
+        print(f"   {vendor:<9} {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"📊 Respuestas por proveedor y estado: {json.dumps(server.stats)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Sustituye las llamadas a Yahoo, Finnhub y Telegram por las respuestas de un
+fixture (bench/fixtures.py) mientras el context manager está activo.
+"""
+
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+import pandas as pd
+import requests
+import yfinance as yf
+from bench.fixtures import FIELDS, load
+from utils.yahoo_client import period_start
+
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self.payload = payload
+        self.status_code = status_code
+        self.headers = {}
+        self.text = ""
+
+    def json(self):
+        return self.payload
+
+
+class Fixture:
+    """
+    Respuestas de los proveedores construidas desde un fixture, con las fechas
+    ancladas a hoy. Las usan Replay (en proceso) y mock_server (por HTTP).
+    """
+
+    def __init__(self, path):
+        self.symbols, self.ohlcv, self.info, self.finnhub = load(path)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=self.ohlcv.shape[2])
+
+    def first_day(self, period=None, start=None):
+        """Índice del primer día servido para period="90d" o start (fecha o Timestamp)."""
+        if period:
+            start = period_start(period)
+        return self.dates.searchsorted(pd.Timestamp(start)) if start is not None else 0
+
+    def download(self, tickers, period=None, start=None):
+        """Respuesta de yf.download(group_by="ticker"): columnas (símbolo, campo)."""
+        batch = [s for s in tickers if s in self.index]
+        first = self.first_day(period, start)
+        rows = self.ohlcv[:, [self.index[s] for s in batch], first:]  # campo × símbolo × día
+        values = rows.transpose(2, 1, 0).reshape(rows.shape[2], -1).astype(float)
+        columns = pd.MultiIndex.from_product([batch, FIELDS])
+        return pd.DataFrame(values, index=self.dates[first:], columns=columns)
+
+    def chart(self, symbol, period1=None):
+        """Respuesta de Yahoo /v8/finance/chart/{símbolo} (None si no existe)."""
+        if symbol not in self.index:
+            return None
+        first = self.first_day(start=pd.Timestamp(int(period1), unit="s") if period1 else None)
+        rows = self.ohlcv[:, self.index[symbol], first:].astype(float)
+        quote = {field.lower(): [round(v, 4) for v in rows[i].tolist()] for i, field in enumerate(FIELDS)}
+        return {"chart": {"result": [{
+            "meta": {"symbol": symbol, "currency": "USD"},
+            "timestamp": [int(d.timestamp()) for d in self.dates[first:]],
+            "indicators": {"quote": [quote]},
+        }], "error": None}}
+
+    def quote_summary(self, symbol):
+        """Respuesta de Yahoo /v10/finance/quoteSummary/{símbolo} (módulos price, summaryDetail y assetProfile)."""
+        info = self.info.get(symbol)
+        if info is None:
+            return None
+        raw = lambda value: {"raw": value}
+        return {"quoteSummary": {"result": [{
+            "price": {"regularMarketPrice": raw(info["currentPrice"]), "marketCap": raw(info["marketCap"]),
+                      "shortName": info["shortName"]},
+            "summaryDetail": {"averageVolume": raw(info["averageVolume"]), "bid": raw(info["bid"]),
+                              "ask": raw(info["ask"]), "beta": raw(info["beta"])},
+            "assetProfile": {"sector": info.get("sector")},
+        }], "error": None}}
+
+    def finnhub_response(self, endpoint, params):
+        """Payload de Finnhub para el endpoint (None si no existe)."""
+        now = time.time()
+        if endpoint == "company-news":
+            since = datetime.strptime(params.get("from"), "%Y-%m-%d").timestamp()
+            items = [
+                {**{k: v for k, v in item.items() if k != "age_sec"}, "datetime": int(now - item["age_sec"])}
+                for item in self.finnhub["company-news"].get(params.get("symbol"), [])
+            ]
+            return [item for item in items if item["datetime"] >= since]
+        if endpoint == "calendar/earnings":
+            today = datetime.now()
+            return {"earningsCalendar": [
+                {"symbol": e["symbol"], "date": (today + timedelta(days=e["days_ahead"])).strftime("%Y-%m-%d")}
+                for e in self.finnhub["calendar/earnings"]
+                if "symbol" not in params or e["symbol"] == params["symbol"]
+            ]}
+        if endpoint == "stock/insider-sentiment":
+            return self.finnhub["stock/insider-sentiment"].get(params.get("symbol"), {"data": []})
+        return None
+
+
+class Replay(Fixture):
+    """
+    Reproduce un fixture en proceso: yf.download, yf.Ticker(...).info,
+    requests.Session.get hacia Finnhub y requests.post hacia Telegram.
+    Cuenta las llamadas servidas por proveedor en `calls`.
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.calls = {"yahoo": 0, "finnhub": 0, "telegram": 0}
+        self.originals = None
+
+    def __enter__(self):
+        self.originals = (yf.download, yf.Ticker, requests.Session.get, requests.post)
+        replay = self
+
+        class Ticker:
+            def __init__(self, symbol):
+                self.symbol = symbol
+
+            @property
+            def info(self):
+                replay.calls["yahoo"] += 1
+                return dict(replay.info.get(self.symbol, {}))
+
+        session_get = self.originals[2]
+
+        def get(session, url, *args, **kwargs):
+            if "finnhub.io" not in url:
+                return session_get(session, url, *args, **kwargs)
+            return self.finnhub_get(url, kwargs.get("params") or {})
+
+        yf.download = self.download_call
+        yf.Ticker = Ticker
+        requests.Session.get = get
+        requests.post = self.post
+        return self
+
+    def __exit__(self, *exc):
+        yf.download, yf.Ticker, requests.Session.get, requests.post = self.originals
+
+    def download_call(self, tickers, period=None, start=None, **kwargs):
+        self.calls["yahoo"] += 1
+        return self.download(tickers, period, start)
+
+    def finnhub_get(self, url, params):
+        self.calls["finnhub"] += 1
+        payload = self.finnhub_response(urlparse(url).path.split("/api/v1/", 1)[-1], params)
+        return FakeResponse(payload, 200) if payload is not None else FakeResponse({}, 404)
+
+    def post(self, url, *args, **kwargs):
+        self.calls["telegram"] += 1
+        return FakeResponse({"ok": True})
@@ -0,0 +1,243 @@
+"""
+Benchmark offline del pipeline: calidad → sentiment → datos → análisis →
+selección → reporte sobre universos sintéticos, con las respuestas de Yahoo,
+Finnhub y Telegram reproducidas desde bench/fixtures.
+
+Cada tamaño corre en su propio proceso (la memoria máxima no se arrastra de un
+tamaño a otro) en dos pasadas: la primera mide tiempo de pared y memoria
+residente máxima por etapa; la segunda, con tracemalloc, las asignaciones.
+
+    python -m bench.run --sizes 500 2000 10000
+    python -m bench.run --sizes 500 --compare bench/results/bench_<commit>_<fecha>.json
+"""
+
+import argparse
+import contextlib
+import copy
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+STAGES = ("quality", "sentiment", "data", "analysis", "selection", "report")
+
+
+def peak_rss_mb():
+    # ru_maxrss está en KB en Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1) if resource else None
+
+
+def bench_config(config, workdir):
+    """
+    Configuración del repositorio con las cachés en un directorio temporal
+    (ejecución en frío) y sin límites de tasa: se mide el cómputo, no la espera.
+    """
+    config = copy.deepcopy(config)
+    quality = config.setdefault("quality_filters", {})
+    quality["requests_per_second"] = 0
+    quality.setdefault("cache", {})["path"] = os.path.join(workdir, "fundamentals.sqlite")
+    sentiment = config.setdefault("sentiment", {})
+    sentiment.update(enabled=True, requests_per_minute=0, cache_dir=os.path.join(workdir, "finnhub"))
+    config.setdefault("price_store", {})["path"] = os.path.join(workdir, "prices")
+    config.setdefault("indicator_state", {})["path"] = os.path.join(workdir, "indicator_state.npz")
+    return config
+
+
+def run_pipeline(config, symbols, measure):
+    """Ejecuta las etapas en secuencia; measure(etapa, fn, entradas) ejecuta y mide cada una."""
+    from agents.quality_filter_agent import QualityFilterAgent
+    from agents.sentiment_agent import SentimentAgent
+    from agents.data_agent import DataAgent
+    from agents.analysis_agent import AnalysisAgent
+    from agents.selector_agent import SelectorAgent
+    from agents.report_agent import ReportAgent
+
+    quality = QualityFilterAgent(config)
+    sentiment = SentimentAgent(config)
+    approved = measure("quality", lambda: quality.filter_symbols(symbols), len(symbols))
+    approved = measure("sentiment", lambda: sentiment.filter_symbols(approved)[0], len(approved))
+
+    data_agent = DataAgent(approved, config)
+    data_agent.sleep_sec = 0  # Pausa de cortesía entre lotes de Yahoo: no es cómputo
+    data = measure("data", data_agent.batch_download, len(approved))
+
+    results = measure("analysis", lambda: AnalysisAgent(config).analyze(data), len(data))
+    top = measure("selection", lambda: SelectorAgent(config).select_top(results), len(results))
+    # Sin selección el reporte no mide nada: los fixtures siembran símbolos con señal
+    assert len(top), "selección vacía: el fixture no produjo señales (bench/fixtures.py, seed_signals)"
+    reporter = ReportAgent(token="bench", chat_id="bench", report_type="detailed")
+    measure("report", lambda: reporter.send_report(top.to_dicts())["top_assets"], len(top))
+
+
+def run_size(size):
+    """Benchmark de un tamaño (en el proceso hijo). Retorna el dict de resultados."""
+    from bench.fixtures import ensure
+    from bench.replay import Replay
+    from orchestrator import load_config
+    from utils.metrics import metrics
+
+    os.environ.setdefault("FINNHUB_API_KEY", "bench")
+    repo_config = load_config()
+    with Replay(ensure(size)) as replay:
+        baseline_rss = peak_rss_mb()
+        stages = {}
+        devnull = open(os.devnull, "w", encoding="utf-8")
+
+        def timed(name, fn, items_in):
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(devnull):
+                output = fn()
+            stages[name] = {
+                "wall_sec": round(time.perf_counter() - start, 4),
+                "items_in": items_in,
+                "items_out": len(output),
+                "peak_rss_mb": peak_rss_mb(),
+            }
+            return output
+
+        def traced(name, fn, items_in):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            with contextlib.redirect_stdout(devnull):
+                output = fn()
+            current, peak = tracemalloc.get_traced_memory()
+            stages[name]["alloc_peak_mb"] = round((peak - before) / 2**20, 2)
+            stages[name]["alloc_net_mb"] = round((current - before) / 2**20, 2)
+            return output
+
+        symbols = replay.symbols
+        metrics.reset()
+        start = time.perf_counter()
+        with tempfile.TemporaryDirectory() as workdir:
+            run_pipeline(bench_config(repo_config, workdir), symbols, timed)
+        total = time.perf_counter() - start
+        calls = dict(replay.calls)
+        snapshot = metrics.finish()
+
+        tracemalloc.start()
+        with tempfile.TemporaryDirectory() as workdir:
+            run_pipeline(bench_config(repo_config, workdir), symbols, traced)
+        tracemalloc.stop()
+        devnull.close()
+
+    return {
+        "symbols": size,
+        "total_sec": round(total, 3),
+        "baseline_rss_mb": baseline_rss,
+        "peak_rss_mb": max(s["peak_rss_mb"] or 0 for s in stages.values()),
+        "calls": calls,
+        "http_requests": {
+            entry["labels"].get("vendor", "?"): entry["value"]
+            for entry in snapshot["counters"] if entry["name"] == "http_requests"
+        },
+        "stages": stages,
+    }
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    capture_output=True, text=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def print_table(result):
+    print(f"\n{'='*50}")
+    print(f"⏱️ BENCHMARK: {result['symbols']} símbolos en {result['total_sec']:.2f}s "
+          f"(RSS máx. {result['peak_rss_mb']} MB)")
+    print(f"   {'Etapa':<10}{'Entrada':>8}{'Salida':>8}{'Pared':>9}{'RSS':>8}{'Asig.':>9}")
+    for name in STAGES:
+        stage = result["stages"].get(name)
+        if stage:
+            print(f"   {name:<10}{stage['items_in']:>8}{stage['items_out']:>8}{stage['wall_sec']:>8.2f}s"
+                  f"{stage['peak_rss_mb']:>7.0f}M{stage.get('alloc_peak_mb', 0):>8.1f}M")
+    print(f"{'='*50}")
+
+
+def print_comparison(previous, current):
+    """Tiempo por etapa frente a un resultado anterior (ratio < 1 = más rápido)."""
+    print(f"\n📊 Comparación con {previous.get('commit')} ({previous.get('date', '')[:16]})")
+    for size, result in current["sizes"].items():
+        before = previous.get("sizes", {}).get(size)
+        if before is None:
+            continue
+        print(f"   {size} símbolos")
+        for name in STAGES + ("total",):
+            old = before["total_sec"] if name == "total" else before["stages"].get(name, {}).get("wall_sec")
+            new = result["total_sec"] if name == "total" else result["stages"].get(name, {}).get("wall_sec")
+            if old and new:
+                print(f"      {name:<10}{old:>8.2f}s → {new:>7.2f}s  ×{new / old:.2f}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark offline del pipeline")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 2000, 10000],
+                        help="Tamaños del universo sintético")
+    parser.add_argument("--output", help="Fichero JSON (por defecto bench/results/bench_<commit>_<fecha>.json)")
+    parser.add_argument("--compare", metavar="JSON", help="Resultado anterior con el que comparar")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.child:
+        with open(args.result, "w", encoding="utf-8") as f:
+            json.dump(run_size(args.child), f)
+        return
+
+    commit, dirty = git_commit()
+    output = {
+        "commit": commit,
+        "dirty": dirty,
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "sizes": {},
+    }
+    for size in args.sizes:
+        print(f"🚀 Benchmark de {size} símbolos...")
+        with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+            result_path = f.name
+        try:
+            subprocess.run([sys.executable, "-m", "bench.run", "--child", str(size), "--result", result_path],
+                           check=True)
+            with open(result_path, "r", encoding="utf-8") as f:
+                output["sizes"][str(size)] = json.load(f)
+        finally:
+            os.remove(result_path)
+        print_table(output["sizes"][str(size)])
+
+    filename = args.output
+    if filename is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        filename = os.path.join(RESULTS_DIR, f"bench_{commit or 'nogit'}{'-dirty' if dirty else ''}_{stamp}.json")
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2, ensure_ascii=False)
+    print(f"💾 Resultados guardados en {filename}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            print_comparison(json.load(f), output)
+
+
+if __name__ == "__main__":
+    main()
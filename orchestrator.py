@@ -1,101 +1,178 @@
+import argparse
+import glob
+import importlib
 import json
 import os
 import sys
+import time
 from datetime import datetime
-from agents.data_agent import DataAgent
-from agents.analysis_agent import AnalysisAgent
-from agents.selector_agent import SelectorAgent
-from agents.report_agent import ReportAgent
-from agents.quality_filter_agent import QualityFilterAgent
-from agents.sentiment_agent import SentimentAgent
-from utils.tickers_sp500 import symbols_sp500
-from utils.tickers_nasdaq100 import symbols_nasdaq
-from utils.tickers_stoxx50 import symbols_stoxx
-from utils.tickers_dax40 import symbols_dax40
-from utils.tickers_ftse100 import symbols_ftse100
-from utils.tickers_russell2000 import symbols_russell2000
-from utils.tickers_etfs import symbols_etfs
-
-
-def main():
-    # Cargar configuración
-    with open("config.json", "r", encoding="utf-8") as f:
-        config = json.load(f)
+from utils.import_profile import ImportProfiler
+from utils.metrics import metrics
 
-    # Determinar tipo de reporte según el día
-    today = datetime.utcnow().weekday()  # 0=Lunes, 4=Viernes
-    
-    # Permitir override desde argumentos
-    report_type = "detailed"  # Por defecto viernes
-    if len(sys.argv) > 1:
-        report_type = sys.argv[1]  # "detailed" o "update"
-    else:
-        # Auto-detectar según día
-        if today == 0:  # Lunes
-            report_type = "update"
-        elif today == 4:  # Viernes
-            report_type = "detailed"
-    
-    print(f"{'='*50}")
-    print(f"🚀 SWING TRADING ANALYZER")
-    print(f"📅 Día: {datetime.utcnow().strftime('%A, %d %B %Y')}")
-    print(f"📊 Tipo de reporte: {report_type.upper()}")
-    print(f"{'='*50}\n")
+# Mercados: (grupo en config, clave, módulo, variable, etiqueta). Los módulos
+# de tickers solo se importan si el mercado está activado.
+MARKETS = [
+    ("usa", "sp500", "utils.tickers_sp500", "symbols_sp500", "S&P 500"),
+    ("usa", "nasdaq100", "utils.tickers_nasdaq100", "symbols_nasdaq", "NASDAQ 100"),
+    ("usa", "russell2000", "utils.tickers_russell2000", "symbols_russell2000", "Russell 2000"),
+    ("europe", "stoxx50", "utils.tickers_stoxx50", "symbols_stoxx", "STOXX 50"),
+    ("europe", "dax40", "utils.tickers_dax40", "symbols_dax40", "DAX 40"),
+    ("europe", "ftse100", "utils.tickers_ftse100", "symbols_ftse100", "FTSE 100"),
+    ("etfs", "sector_etfs", "utils.tickers_etfs", "symbols_etfs", "ETFs"),
+]
 
-    # Unificar símbolos según mercados configurados
+
+def load_config(path="config.json"):
+    """Carga la configuración."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Swing Trading Analyzer")
+    parser.add_argument("report_type", nargs="?", choices=["detailed", "update"],
+                        help="Tipo de reporte (por defecto según el día)")
+    parser.add_argument("--mode", choices=["sequential", "streaming", "technical_first"],
+                        help="Modo de ejecución (por defecto config.json execution.mode)")
+    parser.add_argument("--full", action="store_true",
+                        help="En el reporte update, re-ejecutar el pipeline completo en vez del refresco intradía")
+    parser.add_argument("--import-profile", action="store_true",
+                        help="Mostrar al final el tiempo de import por módulo y la memoria máxima")
+    return parser.parse_args(argv)
+
+
+def build_universe(config):
+    """Unifica símbolos según mercados configurados."""
     markets_config = config.get("markets", {})
     all_symbols = []
-    
-    # USA
-    if "sp500" in markets_config.get("usa", []):
-        all_symbols.extend(symbols_sp500)
-        print(f"   ├─ S&P 500: {len(symbols_sp500)} valores")
-    
-    if "nasdaq100" in markets_config.get("usa", []):
-        all_symbols.extend(symbols_nasdaq)
-        print(f"   ├─ NASDAQ 100: {len(symbols_nasdaq)} valores")
-    
-    if "russell2000" in markets_config.get("usa", []):
-        all_symbols.extend(symbols_russell2000)
-        print(f"   ├─ Russell 2000: {len(symbols_russell2000)} valores")
-    
-    # Europa
-    if "stoxx50" in markets_config.get("europe", []):
-        all_symbols.extend(symbols_stoxx)
-        print(f"   ├─ STOXX 50: {len(symbols_stoxx)} valores")
-    
-    if "dax40" in markets_config.get("europe", []):
-        all_symbols.extend(symbols_dax40)
-        print(f"   ├─ DAX 40: {len(symbols_dax40)} valores")
-    
-    if "ftse100" in markets_config.get("europe", []):
-        all_symbols.extend(symbols_ftse100)
-        print(f"   ├─ FTSE 100: {len(symbols_ftse100)} valores")
-    
-    # ETFs
-    if "sector_etfs" in markets_config.get("etfs", []):
-        all_symbols.extend(symbols_etfs)
-        print(f"   └─ ETFs: {len(symbols_etfs)} valores")
+
+    for group, key, module, variable, label in MARKETS:
+        if key in markets_config.get(group, []):
+            symbols = getattr(importlib.import_module(module), variable)
+            all_symbols.extend(symbols)
+            branch = "└─" if group == "etfs" else "├─"
+            print(f"   {branch} {label}: {len(symbols)} valores")
     
     # Eliminar duplicados
     all_symbols = list(set(all_symbols))
     print(f"\n🔍 Total único: {len(all_symbols)} símbolos")
     print()
+    return all_symbols
+
+
+def symbol_markets(config):
+    """Mercado (clave de config.json markets) de cada símbolo; si está en varios, el primero."""
+    markets_config = config.get("markets", {})
+    markets = {}
+    for group, key, module, variable, label in MARKETS:
+        if key in markets_config.get(group, []):
+            for symbol in getattr(importlib.import_module(module), variable):
+                markets.setdefault(symbol, key)
+    return markets
+
 
+class DisabledSentiment:
+    """
+    Sustituto de SentimentAgent cuando sentiment.enabled es false: deja pasar
+    todos los símbolos sin importar el agente ni su cliente HTTP.
+    """
+    enabled = False
+    concurrency = 1
+
+    def __init__(self, config):
+        self.sentiment_config = config.get("sentiment", {})
+
+    def filter_symbols(self, symbols):
+        return symbols, {}
+
+    def shutdown(self):
+        pass
+
+
+class PipelineContext:
+    """
+    Estado reutilizable entre ejecuciones del mismo proceso (scheduler):
+    configuración, universo de símbolos y agentes con sus sesiones HTTP y
+    cachés abiertas. Se reconstruye si config.json cambia en disco.
+    """
+
+    def __init__(self, path="config.json"):
+        self.path = path
+        self.mtime = None
+        self.runs = 0
+        self.refresh()
+
+    def refresh(self):
+        """Recarga config.json y los agentes si el fichero cambió. Retorna True si recargó."""
+        mtime = os.path.getmtime(self.path)
+        if mtime == self.mtime:
+            return False
+
+        if self.mtime is not None:
+            print("🔄 config.json modificado: recargando configuración y agentes")
+        self.mtime = mtime
+        self.config = load_config(self.path)
+        self.universe = None
+        self.markets = None
+        self.agents = {}
+        return True
+
+    def _agent(self, name, module, cls):
+        """Crea el agente la primera vez que se usa (el import pesado va con él)."""
+        if name not in self.agents:
+            self.agents[name] = getattr(importlib.import_module(module), cls)(self.config)
+        return self.agents[name]
+
+    @property
+    def quality_filter(self):
+        return self._agent("quality_filter", "agents.quality_filter_agent", "QualityFilterAgent")
+
+    @property
+    def sentiment_agent(self):
+        if not self.config.get("sentiment", {}).get("enabled", False):
+            return self.agents.setdefault("sentiment", DisabledSentiment(self.config))
+        return self._agent("sentiment", "agents.sentiment_agent", "SentimentAgent")
+
+    @property
+    def analysis_agent(self):
+        return self._agent("analysis", "agents.analysis_agent", "AnalysisAgent")
+
+    @property
+    def selector(self):
+        return self._agent("selector", "agents.selector_agent", "SelectorAgent")
+
+    def symbols(self):
+        """Universo de símbolos (se construye una vez por configuración)."""
+        if self.universe is None:
+            self.universe = build_universe(self.config)
+        else:
+            print(f"🔍 Universo en memoria: {len(self.universe)} símbolos\n")
+        return self.universe
+
+    def labels(self):
+        """Etiquetas por símbolo para los límites de selección por mercado y sector."""
+        if self.markets is None:
+            self.markets = symbol_markets(self.config)
+        return {"market": self.markets, "sector": self.quality_filter.sectors}
+
+
+def run_sequential(context, all_symbols):
+    """Pasos 1-4 en secuencia. Retorna dict con los resultados de cada etapa o None si aborta."""
+    config = context.config
     # PASO 1: Filtros de calidad (capitalización, volumen, spread)
     print("🔍 PASO 1/6: Aplicando filtros de calidad...")
-    quality_filter = QualityFilterAgent(config)
+    quality_filter = context.quality_filter
     filtered_symbols = quality_filter.filter_symbols(all_symbols)
     
     if not filtered_symbols:
         print("⚠️ Ningún símbolo pasó los filtros de calidad. Abortando.\n")
-        return
+        return None
     
     print(f"✅ {len(filtered_symbols)} símbolos pasaron filtros de calidad\n")
 
     # PASO 2: Análisis de sentiment (noticias, earnings, insiders)
     print("📰 PASO 2/6: Analizando sentiment y contexto fundamental...")
-    sentiment_agent = SentimentAgent(config)
+    sentiment_agent = context.sentiment_agent
     sentiment_filtered, sentiment_data = sentiment_agent.filter_symbols(filtered_symbols)
     
     if not sentiment_filtered:
@@ -106,55 +183,304 @@ def main():
 
     # PASO 3: Descargar datos históricos con todos los indicadores
     print("📥 PASO 3/6: Descargando datos históricos...")
+    from agents.data_agent import DataAgent
     data_agent = DataAgent(sentiment_filtered, config)
     data = data_agent.batch_download()
 
     if not data:
         print("⚠️ No se pudieron descargar datos. Abortando.\n")
-        return
+        return None
 
     print(f"✅ Datos descargados: {len(data)} activos procesados\n")
 
     # PASO 4: Analizar con criterios ultra-estrictos
     print("🔬 PASO 4/6: Analizando oportunidades (score 8+)...")
-    analysis_agent = AnalysisAgent(config)
+    analysis_agent = context.analysis_agent
     results = analysis_agent.analyze(data)
 
-    # Añadir datos de sentiment a los resultados
-    if sentiment_data:
-        for result in results:
-            symbol = result.get('symbol')
-            if symbol in sentiment_data:
-                result['sentiment'] = sentiment_data[symbol]
+    return {
+        "filtered_symbols": filtered_symbols,
+        "sentiment_filtered": sentiment_filtered,
+        "sentiment_data": sentiment_data,
+        "data": data,
+        "results": results
+    }
+
+
+def run_streaming(context, all_symbols):
+    """Pasos 1-4 en streaming: las etapas se solapan conectadas por colas."""
+    from pipeline import StreamingPipeline
+
+    print("⚙️ PASOS 1-4/6: Calidad → Sentiment → Datos → Análisis en streaming...")
+    pipeline = StreamingPipeline(context.config, context)
+    results = pipeline.run(all_symbols)
+
+    if not pipeline.data:
+        print("⚠️ No se pudieron descargar datos. Abortando.\n")
+        return None
+
+    return {
+        "filtered_symbols": pipeline.filtered_symbols,
+        "sentiment_filtered": pipeline.sentiment_filtered,
+        "sentiment_data": pipeline.sentiment_data,
+        "data": pipeline.data,
+        "results": results,
+        "selection": pipeline.selection  # Ya alimentada lote a lote
+    }
+
+
+def run_technical_first(context, all_symbols):
+    """
+    Plan "technical-first": primero precios e indicadores en bloque y los
+    criterios eliminatorios baratos; fundamentales y sentiment solo para los
+    supervivientes.
+    """
+    config = context.config
+    # PASO 1: Descargar datos históricos de todo el universo
+    print("📥 PASO 1/6: Descargando datos históricos de todo el universo...")
+    from agents.data_agent import DataAgent
+    data_agent = DataAgent(all_symbols, config)
+    data = data_agent.batch_download()
+
+    if not data:
+        print("⚠️ No se pudieron descargar datos. Abortando.\n")
+        return None
+
+    # PASO 2: Criterios técnicos eliminatorios (vectorizados)
+    print("⚡ PASO 2/6: Aplicando criterios técnicos eliminatorios...")
+    analysis_agent = context.analysis_agent
+    candidates = analysis_agent.prescreen(data)
+    print(f"✅ {len(candidates)}/{len(data)} activos superan el pre-score técnico\n")
+
+    if not len(candidates):
+        print("⚠️ Ningún activo supera el pre-score técnico: se omiten calidad y sentiment.\n")
+        return {
+            "filtered_symbols": [],
+            "sentiment_filtered": [],
+            "sentiment_data": {},
+            "data": data,
+            "results": candidates
+        }
+
+    # PASO 3: Filtros de calidad solo para los supervivientes
+    print("🔍 PASO 3/6: Aplicando filtros de calidad a los candidatos...")
+    filtered_symbols = context.quality_filter.filter_symbols(candidates.symbols)
+
+    sentiment_filtered, sentiment_data = [], {}
+    if not filtered_symbols:
+        print("⚠️ Ningún candidato pasó los filtros de calidad.\n")
+    else:
+        # PASO 4: Sentiment solo para los que pasan calidad
+        print("📰 PASO 4/6: Analizando sentiment de los candidatos...")
+        sentiment_filtered, sentiment_data = context.sentiment_agent.filter_symbols(filtered_symbols)
+        if not sentiment_filtered:
+            print("⚠️ Ningún símbolo pasó análisis de sentiment.\n")
+            sentiment_filtered = filtered_symbols  # Igual que run_sequential y el streaming
+
+    results = analysis_agent.analyze(candidates.select(sentiment_filtered))
+
+    return {
+        "filtered_symbols": filtered_symbols,
+        "sentiment_filtered": sentiment_filtered,
+        "sentiment_data": sentiment_data,
+        "data": data,
+        "results": results
+    }
+
+
+def load_last_report(report_type="detailed", max_age_days=7):
+    """Último report_{tipo}_YYYYMMDD.json del directorio actual (o None si no hay uno reciente)."""
+    files = sorted(glob.glob(f"report_{report_type}_*.json"))
+    if not files:
+        return None
+
+    filename = files[-1]
+    try:
+        report_date = datetime.strptime(filename[-13:-5], "%Y%m%d")
+    except ValueError:
+        return None
+    if (datetime.utcnow() - report_date).days > max_age_days:
+        print(f"⚠️ {filename} tiene más de {max_age_days} días.")
+        return None
+
+    with open(filename, "r", encoding="utf-8") as f:
+        return filename, json.load(f)
+
+
+def run_update(context):
+    """
+    Refresco intradía del reporte update: toma los top_assets del último
+    reporte detallado, descarga solo sus cotizaciones en una llamada y
+    revalúa zonas de entrada, stop y objetivos. Retorna None si no hay reporte.
+    """
+    config = context.config
+    update_config = config.get("update_report", {})
+    loaded = load_last_report("detailed", update_config.get("max_report_age_days", 7))
+    if loaded is None:
+        return None
+
+    filename, report = loaded
+    report_date = datetime.strptime(filename[-13:-5], "%Y%m%d")
+    top_assets = report.get("top_assets", [])
+    print(f"📂 Reporte base: {filename} ({len(top_assets)} activos)")
+    if not top_assets:
+        return []
+
+    print("📥 Descargando cotizaciones actuales...")
+    from agents.data_agent import DataAgent
+    quotes = DataAgent([a["symbol"] for a in top_assets], config).fetch_quotes(since=report_date)
+
+    analysis_agent = context.analysis_agent
+    updated = []
+    for asset in top_assets:
+        quote = quotes.get(asset["symbol"])
+        if quote is None:
+            print(f"   ⚠️ {asset['symbol']}: sin cotización, se mantiene el cierre del reporte")
+            updated.append(asset)
+            continue
+        updated.append(analysis_agent.reevaluate_levels(asset, quote))
+        print(f"   💰 {asset['symbol']}: ${quote['price']:.2f} ({updated[-1]['change_pct']:+.1f}%)")
+    return updated
+
+
+def save_report(report, report_type):
+    """Guarda el resultado localmente. Retorna el nombre del fichero."""
+    filename = f"report_{report_type}_{datetime.utcnow().strftime('%Y%m%d')}.json"
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+    return filename
+
+
+def save_metrics(snapshot):
+    """Guarda las métricas de la ejecución junto al reporte. Retorna el nombre del fichero."""
+    report_type = snapshot["info"].get("report_type", "run")
+    return metrics.save(f"metrics_{report_type}_{datetime.utcnow().strftime('%Y%m%d')}.json", snapshot)
+
+
+def record_run(config, snapshot, report, metrics_file):
+    """Añade la ejecución al histórico SQLite (run_history en config.json)."""
+    history_config = config.get("run_history", {})
+    if not history_config.get("enabled", True):
+        return
+    from utils.run_history import RunHistory
+    report_type = snapshot["info"].get("report_type")
+    report_file = f"report_{report_type}_{datetime.utcnow().strftime('%Y%m%d')}.json" if report else None
+    try:
+        history = RunHistory(history_config.get("path", "data_cache/run_history.sqlite"))
+        try:
+            history.record(snapshot, report, report_file, metrics_file)
+        finally:
+            history.close()
+    except Exception as e:
+        print(f"⚠️ No se pudo guardar el histórico de ejecuciones: {e}")
+
+
+def run_report(args, context):
+    """
+    Ejecuta el análisis completo. El contexto del scheduler reutiliza la
+    configuración, el universo y los agentes de ejecuciones anteriores.
+    Retorna el reporte enviado, o None si el pipeline aborta.
+    """
+    config = context.config
+
+    # Determinar tipo de reporte según el día
+    today = datetime.utcnow().weekday()  # 0=Lunes, 4=Viernes
+    
+    # Permitir override desde argumentos
+    report_type = "detailed"  # Por defecto viernes
+    if args.report_type:
+        report_type = args.report_type  # "detailed" o "update"
+    else:
+        # Auto-detectar según día
+        if today == 0:  # Lunes
+            report_type = "update"
+        elif today == 4:  # Viernes
+            report_type = "detailed"
+    
+    mode = args.mode or config.get("execution", {}).get("mode", "sequential")
+    metrics.set_info(report_type=report_type, mode=mode)
+    
+    print(f"{'='*50}")
+    print(f"🚀 SWING TRADING ANALYZER")
+    print(f"📅 Día: {datetime.utcnow().strftime('%A, %d %B %Y')}")
+    print(f"📊 Tipo de reporte: {report_type.upper()}")
+    print(f"⚙️ Modo de ejecución: {mode}")
+    print(f"{'='*50}\n")
+
+    from agents.report_agent import ReportAgent
+    token = os.getenv("TELEGRAM_TOKEN")
+    chat_id = os.getenv("TELEGRAM_CHAT_ID")
+    telegram_config = config.get("telegram", {})
+    telegram = {"base_url": telegram_config.get("base_url", "https://api.telegram.org"),
+                "pause_sec": telegram_config.get("message_pause_sec", 1.0)}
+
+    if report_type == "update" and not args.full and \
+            config.get("update_report", {}).get("intraday_refresh", True):
+        start = time.time()
+        top_assets = run_update(context)
+        if top_assets is not None:
+            print(f"\n📨 Generando reporte {report_type}...")
+            reporter = ReportAgent(token=token, chat_id=chat_id, report_type=report_type, **telegram)
+            report = reporter.send_report(top_assets)
+            filename = save_report(report, report_type)
+            metrics.set("symbols", len(top_assets), stage="top")
+
+            print(f"\n{'='*50}")
+            print(f"✅ ACTUALIZACIÓN COMPLETADA en {time.time() - start:.1f}s")
+            print(f"   ⭐ Activos revisados: {len(top_assets)}")
+            print(f"   💾 Guardado en: {filename}")
+            print(f"{'='*50}\n")
+            return report
+        print("⚠️ Sin reporte detallado reciente: se ejecuta el pipeline completo.\n")
+
+    all_symbols = context.symbols()
+
+    if mode == "streaming":
+        stages = run_streaming(context, all_symbols)
+    elif mode == "technical_first":
+        stages = run_technical_first(context, all_symbols)
+    else:
+        stages = run_sequential(context, all_symbols)
+    
+    if stages is None:
+        return
+
+    results = stages["results"]
+    sentiment_data = stages["sentiment_data"]
 
     if not results:
         print("⚠️ No hay oportunidades que cumplan los criterios.\n")
-        results = []
 
-    # PASO 5: Seleccionar los top
+    # PASO 5: Seleccionar los top (mercado y sector para los límites de config.json selection)
     print(f"\n🎯 PASO 5/6: Seleccionando mejores oportunidades...")
-    selector = SelectorAgent(config)
-    top_assets = selector.select_top(results)
+    for name, mapping in context.labels().items():
+        results.attach(name, mapping)
+    selector = context.selector
+    top = selector.select_top(results, selection=stages.get("selection"))
+
+    # Añadir datos de sentiment a los seleccionados (to_dicts los incorpora por símbolo)
+    if sentiment_data:
+        top.attach("sentiment", sentiment_data)
+    top_assets = top.to_dicts()  # Dicts solo para el reporte y el JSON
 
     # PASO 6: Generar y enviar reporte
     print(f"\n📨 PASO 6/6: Generando reporte {report_type}...")
-    token = os.getenv("TELEGRAM_TOKEN")
-    chat_id = os.getenv("TELEGRAM_CHAT_ID")
-    
-    reporter = ReportAgent(token=token, chat_id=chat_id, report_type=report_type)
+    reporter = ReportAgent(token=token, chat_id=chat_id, report_type=report_type, **telegram)
     report = reporter.send_report(top_assets)
 
     # Guardar resultado localmente
-    filename = f"report_{report_type}_{datetime.utcnow().strftime('%Y%m%d')}.json"
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(report, f, indent=4, ensure_ascii=False)
+    filename = save_report(report, report_type)
+    for stage, count in (("universe", len(all_symbols)), ("quality", len(stages["filtered_symbols"])),
+                         ("sentiment", len(stages["sentiment_filtered"])), ("data", len(stages["data"])),
+                         ("signals", len(results)), ("top", len(top_assets))):
+        metrics.set("symbols", count, stage=stage)
 
     print(f"\n{'='*50}")
     print(f"✅ PROCESO COMPLETADO")
     print(f"   📊 Símbolos iniciales: {len(all_symbols)}")
-    print(f"   🔍 Post-filtros calidad: {len(filtered_symbols)}")
-    print(f"   📰 Post-sentiment: {len(sentiment_filtered)}")
-    print(f"   📥 Datos descargados: {len(data)}")
+    print(f"   🔍 Post-filtros calidad: {len(stages['filtered_symbols'])}")
+    print(f"   📰 Post-sentiment: {len(stages['sentiment_filtered'])}")
+    print(f"   📥 Datos descargados: {len(stages['data'])}")
     print(f"   🎯 Oportunidades detectadas: {len(results)}")
     print(f"   ⭐ Top seleccionados: {len(top_assets)}")
     print(f"   💾 Guardado en: {filename}")
@@ -162,6 +488,36 @@ def main():
         avg_score = sum(a.get("score", 0) for a in top_assets) / len(top_assets)
         print(f"   📈 Score promedio: {avg_score:.2f}/10")
     print(f"{'='*50}\n")
+    return report
+
+
+def main(argv=None, context=None):
+    args = parse_args(argv)
+    profiler = ImportProfiler().start() if args.import_profile else None
+    metrics.reset()
+
+    # Cargar configuración
+    if context is None:
+        context = PipelineContext()
+    else:
+        context.refresh()
+
+    report = None
+    try:
+        with metrics.timer("run_seconds"):
+            report = run_report(args, context)
+        metrics.set_info(status="ok" if report is not None else "aborted")
+        return report
+    except BaseException:
+        metrics.set_info(status="error")
+        raise
+    finally:
+        snapshot = metrics.finish()
+        metrics_file = save_metrics(snapshot)
+        print(f"📏 Métricas guardadas en {metrics_file}")
+        record_run(context.config, snapshot, report, metrics_file)
+        if profiler is not None:
+            profiler.print_report()
 
 
 if __name__ == "__main__":
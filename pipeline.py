@@ -0,0 +1,247 @@
+"""
+Ejecución en streaming del pipeline: calidad → sentiment → datos → análisis.
+
+Cada etapa corre en su propio hilo y se comunica con la siguiente mediante
+colas acotadas, de modo que la descarga de precios y el cálculo de indicadores
+empiezan con los primeros símbolos aprobados mientras los demás se siguen
+filtrando. La duración total queda acotada por la etapa más lenta.
+"""
+
+import queue
+import threading
+import time
+from utils.metrics import metrics
+from utils.records import AssetRecords
+
+END = object()  # Marca de fin de flujo
+
+
+class StageStats:
+    """Contadores de una etapa: elementos de entrada/salida y tiempo ocupado."""
+
+    def __init__(self, name):
+        self.name = name
+        self.items_in = 0
+        self.items_out = 0
+        self.busy = 0.0
+        self.started = None
+        self.finished = None
+
+    @property
+    def wall(self):
+        if self.started is None or self.finished is None:
+            return 0.0
+        return self.finished - self.started
+
+    def throughput(self):
+        return self.items_in / self.busy if self.busy > 0 else 0.0
+
+
+class StreamingPipeline:
+    def __init__(self, config, context=None):
+        self.config = config
+        execution = config.get("execution", {})
+        self.queue_size = execution.get("queue_size", 200)
+        self.chunk_size = execution.get("chunk_size", 25)
+        self.batch_linger_sec = execution.get("batch_linger_sec", 2.0)
+
+        # Con un contexto (scheduler) se reutilizan los agentes y sus cachés
+        if context is not None:
+            self.quality_filter = context.quality_filter
+            self.sentiment_agent = context.sentiment_agent
+            self.analysis_agent = context.analysis_agent
+            selector = context.selector
+            self.labels = context.labels()
+        else:
+            from agents.quality_filter_agent import QualityFilterAgent
+            from agents.sentiment_agent import SentimentAgent
+            from agents.analysis_agent import AnalysisAgent
+            from agents.selector_agent import SelectorAgent
+            self.quality_filter = QualityFilterAgent(config)
+            self.sentiment_agent = SentimentAgent(config)
+            self.analysis_agent = AnalysisAgent(config)
+            selector = SelectorAgent(config)
+            self.labels = {"sector": self.quality_filter.sectors}
+
+        # Top-N incremental: cada lote del análisis entra en cuanto sale
+        self.selection = selector.selection()
+
+        self.stats = {name: StageStats(name) for name in ("calidad", "sentiment", "datos", "análisis")}
+        self.filtered_symbols = []
+        self.sentiment_filtered = []
+        self.sentiment_data = {}
+        self.data = []     # Lotes AssetRecords de la etapa de datos
+        self.results = []  # Lotes AssetRecords del análisis
+
+    def _take(self, source, max_items, linger=0.0):
+        """
+        Extrae hasta max_items de la cola. Bloquea hasta el primer elemento y
+        espera como mucho `linger` segundos a completar el lote.
+        Retorna (lote, fin_de_flujo).
+        """
+        item = source.get()
+        if item is END:
+            return [], True
+
+        batch = [item]
+        deadline = time.monotonic() + linger
+        while len(batch) < max_items:
+            timeout = deadline - time.monotonic()
+            try:
+                item = source.get(timeout=timeout) if timeout > 0 else source.get_nowait()
+            except queue.Empty:
+                break
+            if item is END:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _stage(self, name, worker, source, sink, max_items, linger=0.0, on_end=None):
+        """
+        Bucle genérico de etapa: toma lotes, los procesa y emite resultados.
+        on_end() puede emitir elementos adicionales al agotarse la entrada.
+        """
+        stats = self.stats[name]
+        stats.started = time.time()
+        try:
+            done = False
+            while not done:
+                batch, done = self._take(source, max_items, linger)
+                if not batch:
+                    continue
+                stats.items_in += sum(len(item) if isinstance(item, AssetRecords) else 1 for item in batch)
+                start = time.time()
+                try:
+                    outputs = worker(batch)
+                except Exception as e:
+                    print(f"⚠️ Error en etapa {name}: {e}")
+                    outputs = []
+                stats.busy += time.time() - start
+                stats.items_out += len(outputs)
+                if sink is None:
+                    continue
+                if isinstance(outputs, AssetRecords):
+                    sink.put(outputs)  # Un lote columnar viaja entero, sin trocearlo por activo
+                else:
+                    for output in outputs:
+                        sink.put(output)
+            if on_end is not None and sink is not None:
+                for output in on_end():
+                    stats.items_out += 1
+                    sink.put(output)
+        finally:
+            stats.finished = time.time()
+            if sink is not None:
+                sink.put(END)
+
+    def _quality_worker(self, batch):
+        if not self.quality_filter.enabled:
+            self.filtered_symbols.extend(batch)
+            return batch
+
+        approved = []
+        for symbol, stock_info in zip(batch, self.quality_filter.fetch_stock_infos(batch)):
+            passes, reason = self.quality_filter.passes_quality_filters(stock_info)
+            if passes:
+                approved.append(symbol)
+                self.quality_filter.sectors[symbol] = stock_info.get("sector")
+                print(f"   ✅ {symbol}: {stock_info.get('short_name', '')}")
+            else:
+                print(f"   ❌ {symbol}: {reason}")
+        self.filtered_symbols.extend(approved)
+        return approved
+
+    def _sentiment_worker(self, batch):
+        if not self.sentiment_agent.enabled:
+            self.sentiment_filtered.extend(batch)
+            return batch
+
+        approved = []
+        for symbol, analysis in zip(batch, self.sentiment_agent.analyze_batch(batch)):
+            self.sentiment_data[symbol] = analysis
+            if analysis["passes"]:
+                approved.append(symbol)
+            else:
+                print(f"   ❌ {symbol}: {', '.join(analysis['reject_reasons'])}")
+        self.sentiment_filtered.extend(approved)
+        return approved
+
+    def _sentiment_end(self):
+        """Como run_sequential: si sentiment no aprueba ninguno, se sigue sin su filtro."""
+        if not self.sentiment_agent.enabled or self.sentiment_filtered or not self.filtered_symbols:
+            return []
+        print("⚠️ Ningún símbolo pasó análisis de sentiment.\n")
+        self.sentiment_filtered = list(self.filtered_symbols)
+        return self.sentiment_filtered
+
+    def _data_worker(self, batch):
+        records = self.data_agent.batch_download(batch, save_state=False)
+        self.data.append(records)
+        return records
+
+    def _analysis_worker(self, batch):
+        results = self.analysis_agent.analyze(AssetRecords.concat(batch))
+        for name, mapping in self.labels.items():
+            results.attach(name, mapping)
+        self.results.append(results)
+        self.selection.push(results)
+        return results
+
+    def run(self, symbols):
+        """Ejecuta el pipeline completo sobre la lista de símbolos."""
+        symbols_queue = queue.Queue()
+        quality_out = queue.Queue(maxsize=self.queue_size)
+        sentiment_out = queue.Queue(maxsize=self.queue_size)
+        data_out = queue.Queue(maxsize=self.queue_size)
+
+        if self.sentiment_agent.enabled and \
+                self.sentiment_agent.sentiment_config.get("check_earnings_calendar", True):
+            self.sentiment_agent.prefetch_earnings_calendar()
+
+        self.quality_filter.reset_stats()
+
+        # Un solo DataAgent por ejecución: el estado incremental se carga y guarda una vez
+        from agents.data_agent import DataAgent
+        self.data_agent = DataAgent([], self.config)
+        data_batch = self.data_agent.batch_size
+        stages = [
+            ("calidad", self._quality_worker, symbols_queue, quality_out, self.chunk_size, 0.0),
+            ("sentiment", self._sentiment_worker, quality_out, sentiment_out, self.chunk_size, 0.0,
+             self._sentiment_end),
+            ("datos", self._data_worker, sentiment_out, data_out, data_batch, self.batch_linger_sec),
+            ("análisis", self._analysis_worker, data_out, None, data_batch, 0.0),
+        ]
+        threads = [
+            threading.Thread(target=self._stage, args=stage, name=f"stage-{stage[0]}", daemon=True)
+            for stage in stages
+        ]
+
+        start = time.time()
+        for thread in threads:
+            thread.start()
+        for symbol in symbols:
+            symbols_queue.put(symbol)
+        symbols_queue.put(END)
+        for thread in threads:
+            thread.join()
+        self.sentiment_agent.shutdown()
+        self.data_agent.save_state()
+        self.quality_filter.print_cache_summary()
+        elapsed = time.time() - start
+        for stats in self.stats.values():
+            metrics.set("pipeline_busy_seconds", round(stats.busy, 3), stage=stats.name)
+            metrics.set("pipeline_items", stats.items_in, stage=stats.name)
+
+        self.data = AssetRecords.concat(self.data)
+        self.results = AssetRecords.concat(self.results)
+        self.print_stats(elapsed)
+        return self.results
+
+    def print_stats(self, elapsed):
+        print(f"\n{'='*50}")
+        print(f"⚙️ PIPELINE EN STREAMING: {elapsed:.1f}s en total")
+        print(f"   {'Etapa':<11}{'Entrada':>8}{'Salida':>8}{'Ocupada':>10}{'Pared':>9}{'Items/s':>10}")
+        for stats in self.stats.values():
+            print(f"   {stats.name:<11}{stats.items_in:>8}{stats.items_out:>8}"
+                  f"{stats.busy:>9.1f}s{stats.wall:>8.1f}s{stats.throughput():>10.0f}")
+        print(f"{'='*50}\n")
@@ -4,14 +4,19 @@ Scheduler para Render.com con Keep-Alive
 """
 
 import os
-import subprocess
+import sys
+import json
+import queue
 import logging
 from datetime import datetime
 from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
 import threading
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 import time
+from utils.metrics import metrics, to_prometheus
+from utils.run_history import RunHistory
 
 logging.basicConfig(
     level=logging.INFO,
@@ -21,17 +26,68 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+_history = None
+
+
+def get_history():
+    """Conexión de solo lectura al histórico de ejecuciones (None si aún no existe)."""
+    global _history
+    if _history is None:
+        with open("config.json", "r", encoding="utf-8") as f:
+            path = json.load(f).get("run_history", {}).get("path", "data_cache/run_history.sqlite")
+        if os.path.exists(path):
+            _history = RunHistory(path, readonly=True)
+    return _history
+
+
 class HealthCheckHandler(BaseHTTPRequestHandler):
     def do_GET(self):
-        if self.path == '/health':
+        url = urlparse(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if url.path in ('/runs', '/trends'):
+            try:
+                self._send_history(url.path, query)
+            except (ValueError, KeyError) as e:
+                self._send_json({"error": str(e)}, 400)
+        elif self.path == '/health':
             self.send_response(200)
             self.send_header('Content-type', 'text/plain')
             self.end_headers()
             self.wfile.write(b'OK')
+        elif self.path == '/metrics':
+            # Métricas de la última ejecución terminada del análisis
+            body = to_prometheus(metrics.last).encode()
+            self.send_response(200)
+            self.send_header('Content-type', 'text/plain; version=0.0.4')
+            self.end_headers()
+            self.wfile.write(body)
         else:
             self.send_response(404)
             self.end_headers()
     
+    def _send_history(self, path, query):
+        """
+        /runs?limit=20&type=detailed&symbol=AAPL -> últimas ejecuciones
+        /trends?days=30&stage=batch_download&type=detailed -> latencia por etapa y día
+        """
+        history = get_history()
+        if path == '/runs':
+            body = history.recent_runs(
+                int(query.get('limit', 20)), query.get('type'), query.get('symbol')
+            ) if history else []
+        else:
+            body = history.stage_trends(
+                int(query.get('days', 30)), query.get('stage'), query.get('type')
+            ) if history else {}
+        self._send_json(body)
+
+    def _send_json(self, body, status=200):
+        data = json.dumps(body, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json; charset=utf-8')
+        self.end_headers()
+        self.wfile.write(data)
+
     def log_message(self, format, *args):
         pass
 
@@ -43,38 +99,108 @@ def start_health_server():
     server.serve_forever()
 
 
+RUN_TIMEOUT_SEC = 1800  # Como el timeout del antiguo subprocess.run
+
+
+class AnalysisWorker:
+    """
+    Hilo persistente que ejecuta orchestrator.main en el propio proceso.
+    Mantiene un PipelineContext entre ejecuciones (config, universo, sesiones
+    HTTP y cachés de precios/fundamentales) y mide la latencia desde el
+    disparo del cron hasta el envío del reporte.
+
+    Cada ejecución corre en un hilo vigilado: si supera timeout_sec (p. ej.
+    un socket de yfinance o Finnhub colgado) se registra como "timeout" en el
+    histórico, se abandona el hilo y su contexto, y el worker queda libre
+    para el siguiente disparo.
+    """
+
+    def __init__(self, timeout_sec=RUN_TIMEOUT_SEC):
+        self.timeout_sec = timeout_sec
+        self.jobs = queue.Queue()
+        self.context = None
+        self.lock = threading.Lock()
+        self.busy = False  # Hay una ejecución pendiente o en curso (se cambia bajo self.lock)
+        self.thread = threading.Thread(target=self._loop, name="analysis-worker", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def submit(self, trigger, argv=()):
+        """Encola una ejecución. Se descarta si ya hay una en curso o pendiente."""
+        with self.lock:
+            if self.busy:
+                logger.warning(f"⏭️ {trigger}: ya hay un análisis en curso, se omite")
+                return False
+            self.busy = True
+        self.jobs.put((time.time(), trigger, list(argv)))
+        return True
+
+    def _loop(self):
+        while True:
+            fired_at, trigger, argv = self.jobs.get()
+            try:
+                runner = threading.Thread(target=self._run, args=(fired_at, trigger, argv),
+                                          name="analysis-run", daemon=True)
+                runner.start()
+                runner.join(self.timeout_sec)
+                if runner.is_alive():
+                    self._timed_out(trigger)
+            finally:
+                with self.lock:
+                    self.busy = False
+
+    def _timed_out(self, trigger):
+        """Registra la ejecución colgada como fallida y descarta su contexto."""
+        logger.error(f"⏰ Análisis ({trigger}) sin terminar tras {self.timeout_sec}s: se abandona")
+        context, self.context = self.context, None  # El hilo colgado sigue usándolo; la siguiente empieza en frío
+        try:
+            import orchestrator
+            metrics.set_info(status="timeout")
+            config = context.config if context is not None else orchestrator.load_config()
+            orchestrator.record_run(config, metrics.finish(), None, None)
+        except Exception as e:
+            logger.exception(f"❌ No se pudo registrar el timeout: {e}")
+
+    def _run(self, fired_at, trigger, argv):
+        started = time.time()
+        day = datetime.now().strftime("%A")
+        hour = datetime.now().strftime("%H:%M")
+
+        logger.info("="*60)
+        logger.info(f"🚀 Iniciando análisis ({trigger}) - {day} {hour} UTC")
+        logger.info("="*60)
+
+        try:
+            import orchestrator
+            context = self.context
+            warm = context is not None
+            if not warm:
+                context = self.context = orchestrator.PipelineContext()
+            report = orchestrator.main(argv, context=context)
+            context.runs += 1
+
+            finished = time.time()
+            if report is None:
+                logger.warning("⚠️ Análisis abortado sin reporte")
+            else:
+                logger.info("✅ Análisis completado")
+            logger.info(
+                f"⏱️ Latencia disparo→reporte: {finished - fired_at:.1f}s "
+                f"(cola {started - fired_at:.1f}s, ejecución {finished - started:.1f}s, "
+                f"{'caliente' if warm else 'en frío'}, ejecución nº {context.runs})"
+            )
+        except Exception as e:
+            logger.exception(f"❌ Error: {e}")
+
+        logger.info("="*60)
+
+
+worker = AnalysisWorker()
+
+
 def run_analysis():
-    day = datetime.now().strftime("%A")
-    hour = datetime.now().strftime("%H:%M")
-    
-    logger.info("="*60)
-    logger.info(f"🚀 Iniciando análisis - {day} {hour} UTC")
-    logger.info("="*60)
-    
-    try:
-        result = subprocess.run(
-            ["python", "orchestrator.py"],
-            capture_output=True,
-            text=True,
-            timeout=1800
-        )
-        
-        if result.stdout:
-            print(result.stdout)
-        
-        if result.returncode == 0:
-            logger.info("✅ Análisis completado")
-        else:
-            logger.error("❌ Error en análisis")
-            if result.stderr:
-                print(result.stderr)
-                
-    except subprocess.TimeoutExpired:
-        logger.error("⚠️ Timeout")
-    except Exception as e:
-        logger.error(f"❌ Error: {e}")
-    
-    logger.info("="*60)
+    worker.submit("cron")
 
 
 def keep_alive_ping():
@@ -102,8 +228,12 @@ def main():
     
     logger.info("")
     
+    # Salida en streaming: cada línea del pipeline llega al log al imprimirse
+    sys.stdout.reconfigure(line_buffering=True)
+
     health_thread = threading.Thread(target=start_health_server, daemon=True)
     health_thread.start()
+    worker.start()
     
     scheduler = BackgroundScheduler(timezone='UTC')
     
@@ -152,7 +282,7 @@ def main():
     logger.info("")
     
     logger.info("🔥 Ejecutando análisis inicial...")
-    run_analysis()
+    worker.submit("inicial")
     
     try:
         while True:
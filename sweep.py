@@ -0,0 +1,195 @@
+"""
+Barrido de parámetros de scoring, signal_thresholds y targets sobre el backtest.
+
+La línea temporal de indicadores se calcula una sola vez y se guarda como
+ficheros .npy en disco; cada proceso del pool los abre con memory-map, de modo
+que todos comparten las mismas páginas en memoria en vez de recibir una copia
+serializada del panel con cada tarea.
+"""
+
+import argparse
+import copy
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+import numpy as np
+from agents.backtest_agent import BacktestAgent
+from orchestrator import load_config, build_universe
+
+SWEEP_SECTIONS = ("scoring", "signal_thresholds", "targets")
+_timeline = None  # Línea temporal compartida (memory-map) de cada proceso
+
+
+def save_timeline(path, dates, symbols, ohlc, records):
+    """Guarda la línea temporal como .npy para abrirla con memory-map."""
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, "dates.npy"), dates)
+    np.save(os.path.join(path, "symbols.npy"), symbols.astype(str))
+    for name, values in ohlc.items():
+        np.save(os.path.join(path, f"ohlc_{name}.npy"), values)
+    for name, values in records.items():
+        if values.dtype != object:  # La tendencia (texto) no interviene en el score
+            np.save(os.path.join(path, f"record_{name}.npy"), values)
+
+
+def load_timeline(path):
+    """Abre la línea temporal guardada por save_timeline() sin copiarla."""
+    dates = np.load(os.path.join(path, "dates.npy"))
+    symbols = np.load(os.path.join(path, "symbols.npy")).astype(object)
+    ohlc, records = {}, {}
+    for filename in sorted(os.listdir(path)):
+        name, _ = os.path.splitext(filename)
+        if name.startswith("ohlc_"):
+            ohlc[name[5:]] = np.load(os.path.join(path, filename), mmap_mode="r")
+        elif name.startswith("record_"):
+            records[name[7:]] = np.load(os.path.join(path, filename), mmap_mode="r")
+    return dates, symbols, ohlc, records
+
+
+def _init_worker(path):
+    global _timeline
+    _timeline = load_timeline(path)
+
+
+def _evaluate(config, overrides):
+    """Tarea del pool: backtest de una combinación de parámetros."""
+    start = time.time()
+    config = apply_overrides(config, overrides)
+    summary = BacktestAgent(config).simulate(*_timeline)["summary"]
+    return {"params": overrides, "summary": summary, "pid": os.getpid(), "elapsed": time.time() - start}
+
+
+def apply_overrides(config, overrides):
+    """Copia la configuración con claves "seccion.parametro" sustituidas."""
+    config = copy.deepcopy(config)
+    for key, value in overrides.items():
+        section, name = key.split(".", 1)
+        config.setdefault(section, {})[name] = value
+    return config
+
+
+def build_combinations(grid, samples=None, seed=42):
+    """Rejilla completa o, con `samples`, una muestra aleatoria sin repetición."""
+    keys = list(grid)
+    for key in keys:
+        if key.split(".", 1)[0] not in SWEEP_SECTIONS:
+            raise ValueError(f"Parámetro fuera de {SWEEP_SECTIONS}: {key}")
+
+    total = 1
+    for key in keys:
+        total *= len(grid[key])
+
+    if samples is None or samples >= total:
+        return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+    rng = random.Random(seed)
+    chosen = set()
+    while len(chosen) < samples:
+        chosen.add(tuple(rng.randrange(len(grid[k])) for k in keys))
+    return [{k: grid[k][i] for k, i in zip(keys, indexes)} for indexes in sorted(chosen)]
+
+
+def rank(results, rank_by, min_trades):
+    """Ordena de mejor a peor; las combinaciones con pocas operaciones van al final."""
+    def key(result):
+        summary = result["summary"]
+        value = summary.get(rank_by)
+        enough = summary.get("trades", 0) >= min_trades
+        return (enough, value if value is not None else float("-inf"))
+    return sorted(results, key=key, reverse=True)
+
+
+def print_table(ranked, rank_by, limit=20):
+    print(f"\n{'='*50}")
+    print(f"🏆 RANKING DE CONFIGURACIONES (por {rank_by})")
+    print(f"{'='*50}")
+    print(f"   {'#':>3} {'Ops':>5} {'Acierto':>8} {'Esp.%':>7} {'Esp.R':>6} {'PF':>5} {'DD%':>7}  Parámetros")
+    for position, result in enumerate(ranked[:limit], 1):
+        s = result["summary"]
+        fmt = lambda value, spec: format(value, spec) if value is not None else "-"
+        params = ", ".join(f"{k.split('.', 1)[1]}={v}" for k, v in result["params"].items())
+        print(f"   {position:>3} {s.get('trades', 0):>5} {fmt(s.get('hit_rate_pct'), '>7.1f')}% "
+              f"{fmt(s.get('expectancy_pct'), '>+7.3f')} {fmt(s.get('expectancy_r'), '>+6.2f')} "
+              f"{fmt(s.get('profit_factor'), '>5.2f')} {fmt(s.get('max_drawdown_pct'), '>7.2f')}  {params}")
+
+
+def print_throughput(results, wall, workers):
+    print(f"\n⚙️ {len(results)} configuraciones en {wall:.1f}s con {workers} procesos "
+          f"({len(results) / wall:.2f} config/s)")
+    per_process = {}
+    for result in results:
+        stats = per_process.setdefault(result["pid"], [0, 0.0])
+        stats[0] += 1
+        stats[1] += result["elapsed"]
+    print(f"   {'Proceso':>8}{'Configs':>9}{'Ocupado':>10}{'Config/s':>10}")
+    for pid, (count, busy) in sorted(per_process.items()):
+        print(f"   {pid:>8}{count:>9}{busy:>9.1f}s{count / busy if busy else 0:>10.3f}")
+    print(f"{'='*50}\n")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Barrido paralelo de parámetros sobre el backtest")
+    parser.add_argument("--symbols", nargs="+", help="Símbolos (por defecto el universo de config.json)")
+    parser.add_argument("--random", type=int, metavar="N", help="Muestra aleatoria de N combinaciones")
+    parser.add_argument("--workers", type=int, help="Procesos (por defecto config.json sweep.workers o nº de CPUs)")
+    parser.add_argument("--output", help="Fichero JSON de resultados (por defecto sweep_YYYYMMDD.json)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = load_config()
+    sweep_config = config.get("sweep", {})
+    workers = args.workers or sweep_config.get("workers") or os.cpu_count() or 1
+    rank_by = sweep_config.get("rank_by", "expectancy_r")
+    panel_dir = sweep_config.get("panel_dir", "data_cache/sweep")
+
+    combinations = build_combinations(
+        sweep_config.get("grid", {}),
+        args.random or sweep_config.get("samples"),
+        sweep_config.get("seed", 42)
+    )
+    print(f"🔁 BARRIDO DE PARÁMETROS: {len(combinations)} combinaciones")
+
+    symbols = args.symbols or build_universe(config)
+    agent = BacktestAgent(config)
+    prices = agent.load_history(symbols)
+    if not prices:
+        print("❌ Sin histórico suficiente. Ejecuta antes python backtest.py --download.")
+        return
+
+    start = time.time()
+    save_timeline(panel_dir, *agent.build_timeline(prices))
+    print(f"⚡ Línea temporal precalculada en {time.time() - start:.1f}s → {panel_dir}")
+
+    start = time.time()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(panel_dir,)) as pool:
+        futures = [pool.submit(_evaluate, config, overrides) for overrides in combinations]
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"⚠️ Error en combinación: {e}")
+            if done % max(1, len(futures) // 10) == 0:
+                print(f"   ⏳ {done}/{len(futures)}")
+    wall = time.time() - start
+
+    ranked = rank(results, rank_by, sweep_config.get("min_trades", 20))
+    print_table(ranked, rank_by)
+    print_throughput(results, wall, workers)
+
+    filename = args.output or f"sweep_{datetime.now().strftime('%Y%m%d')}.json"
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump({"rank_by": rank_by, "wall_sec": round(wall, 2), "workers": workers,
+                   "results": [{"params": r["params"], "summary": r["summary"]} for r in ranked]},
+                  f, indent=2, ensure_ascii=False)
+    print(f"💾 Resultados guardados en {filename}")
+
+
+if __name__ == "__main__":
+    main()
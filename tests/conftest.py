@@ -0,0 +1,33 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def config():
+    with open(os.path.join(ROOT, "config.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def make_prices(symbols, days=130, seed=0):
+    """DataFrames OHLCV sintéticos (paseo aleatorio) en días hábiles hasta hoy."""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=days, name="Date")
+    frames = {}
+    for symbol in symbols:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, days)))
+        open_ = close * (1 + rng.normal(0, 0.003, days))
+        high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.006, days)))
+        low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.006, days)))
+        volume = rng.integers(100_000, 5_000_000, days).astype(float)
+        frames[symbol] = pd.DataFrame(
+            {"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume}, index=index
+        )
+    return frames
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from agents.data_agent import DataAgent
+from conftest import make_prices
+from utils.indicators import build_panel, compute_indicator_panel
+from utils.records import round_values
+
+
+@pytest.fixture
+def prices():
+    frames = make_prices(["AAA", "BBB", "CCC", "DDD"])
+    frames["BBB"] = frames["BBB"].iloc[40:]  # Historias de distinta longitud: el panel rellena con NaN
+    frames["DDD"] = frames["DDD"].iloc[25:]
+    return frames
+
+
+def test_panel_matches_compute_indicators(config, prices):
+    agent = DataAgent([], config)
+    symbols = list(prices)
+    panel = compute_indicator_panel(build_panel([prices[s] for s in symbols]), config["indicators"])
+
+    for j, symbol in enumerate(symbols):
+        df = agent.compute_indicators(prices[symbol].copy())
+        for column, values in panel.items():
+            expected = df[column].to_numpy(dtype=float)
+            actual = values[j, -len(df):]
+            if column == "VWAP":
+                # compute_indicators solo calcula el VWAP de las 20 últimas barras
+                expected, actual = expected[-1:], actual[-1:]
+            np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-9, equal_nan=True, err_msg=column)
+
+
+def test_panel_records_match_build_record(config, prices):
+    agent = DataAgent([], config)
+    symbols = list(prices)
+    panel = compute_indicator_panel(build_panel([prices[s] for s in symbols]), config["indicators"])
+
+    records = agent.build_panel_records(symbols, panel).to_dicts()
+    expected = [agent.build_record(s, agent.compute_indicators(prices[s].copy())) for s in symbols]
+    assert records == expected
+
+
+def test_round_values_matches_builtin_round():
+    values = np.array([[417.785, 1.005, 2.675], [np.nan, -0.125, 1234.5678]])
+    expected = [[round(v, 2) for v in row] for row in values.tolist()]
+    np.testing.assert_array_equal(round_values(values, 2), expected)
+    assert round_values(np.array([417.785]), 2)[0] == 417.79  # np.round da 417.78
@@ -0,0 +1,63 @@
+import pandas as pd
+import pytest
+
+from conftest import make_prices
+from utils.price_store import PriceStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PriceStore(str(tmp_path / "prices"))
+
+
+@pytest.fixture
+def history():
+    return make_prices(["AAA"], days=60)["AAA"]
+
+
+def test_merge_into_empty_store(store, history):
+    merged = store.merge("AAA", history)
+    pd.testing.assert_frame_equal(merged, history, check_freq=False, check_index_type=False)
+    pd.testing.assert_frame_equal(store.load("AAA"), history, check_freq=False, check_index_type=False)
+    assert store.last_date("AAA") == history.index[-1]
+
+
+def test_merge_overwrites_overlap_and_appends(store, history):
+    store.merge("AAA", history.iloc[:50])
+    tail = history.iloc[45:].copy()
+    tail.loc[tail.index[4], "Close"] += 1  # Última barra guardada: la sesión pudo seguir abierta
+
+    merged = store.merge("AAA", tail)
+    assert merged.index.equals(history.index)
+    assert merged.loc[tail.index[4], "Close"] == tail.loc[tail.index[4], "Close"]
+    pd.testing.assert_frame_equal(merged.iloc[:45], history.iloc[:45], check_freq=False, check_index_type=False)
+
+
+def test_merge_normalizes_timezone(store, history):
+    aware = history.tz_localize("America/New_York")
+    merged = store.merge("AAA", aware)
+    assert merged.index.tz is None
+    assert merged.index.equals(history.index)
+
+
+def test_matches_detects_readjusted_history(store, history):
+    assert store.matches("AAA", history)  # Sin histórico guardado no hay nada que comparar
+    store.merge("AAA", history.iloc[:50])
+
+    assert store.matches("AAA", history.iloc[45:])
+    split = history.iloc[45:].copy()
+    split[["Open", "High", "Low", "Close"]] /= 2
+    assert not store.matches("AAA", split)
+
+    # La última barra guardada no cuenta y sin solape no hay comparación
+    last_only = history.iloc[49:].copy()
+    last_only["Close"] /= 2
+    assert store.matches("AAA", last_only)
+    assert store.matches("AAA", history.iloc[55:] / 2)
+
+
+def test_replace_discards_stored_history(store, history):
+    store.merge("AAA", history)
+    adjusted = history.iloc[10:] / 2
+    store.replace("AAA", adjusted)
+    pd.testing.assert_frame_equal(store.load("AAA"), adjusted, check_freq=False, check_index_type=False)
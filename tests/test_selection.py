@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from agents.selector_agent import TopNSelection
+from utils.records import AssetRecords
+
+
+def make_records(symbols, score, rr_ratio, atr_pct, closes=None):
+    columns = {
+        "symbol": np.array(symbols, dtype=object),
+        "score": np.asarray(score, dtype=float),
+        "rsi": np.full(len(symbols), 30.0),
+        "rr_ratio_2": np.asarray(rr_ratio, dtype=float),
+        "atr_pct": np.asarray(atr_pct, dtype=float),
+    }
+    if closes is not None:
+        columns["closes"] = np.asarray(closes, dtype=float)
+    return AssetRecords.from_columns(columns, {"score": 2, "rr_ratio_2": 2, "atr_pct": 2})
+
+
+def reference(rows, top_n, min_rr, caps):
+    """Selección de referencia: filtra, ordena entero y aplica los límites en orden."""
+    rows = [r for r in rows if r["score"] >= 8.0 and r["rr_ratio_2"] >= min_rr and r["atr_pct"] <= 2.0]
+    rows.sort(key=lambda r: (-r["score"], -r["rr_ratio_2"], r["symbol"]))
+    counts = {label: {} for label in caps}
+    chosen = []
+    for r in rows:
+        if len(chosen) >= top_n:
+            break
+        if any(cap and r[label] is not None and counts[label].get(r[label], 0) >= cap
+               for label, cap in caps.items()):
+            continue
+        for label in caps:
+            if r[label] is not None:
+                counts[label][r[label]] = counts[label].get(r[label], 0) + 1
+        chosen.append(r["symbol"])
+    return chosen
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_caps_match_reference(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(0, 200))
+    symbols = [f"S{i:04d}" for i in rng.permutation(n)]
+    score = rng.choice([7.5, 8.0, 8.25, 8.5, 9.0, 9.5], n)
+    rr_ratio = rng.choice([0.5, 1.0, 2.0, 3.0], n)
+    atr_pct = np.round(rng.uniform(0.5, 2.5, n), 2)
+    markets = {s: rng.choice(["sp500", "dax40", "sector_etfs", None]) for s in symbols}
+    sectors = {s: rng.choice(["Technology", "Healthcare", "Energy", None]) for s in symbols}
+    top_n = int(rng.integers(1, 8))
+    caps = {"market": [None, 1, 2][rng.integers(3)], "sector": [None, 1, 2][rng.integers(3)]}
+
+    # Varios lotes, como en el pipeline en streaming
+    selection = TopNSelection(top_n, 1.0, caps=caps)
+    bounds = [0] + sorted(rng.integers(0, n + 1, 3).tolist()) + [n]
+    for a, b in zip(bounds, bounds[1:]):
+        records = make_records(symbols[a:b], score[a:b], rr_ratio[a:b], atr_pct[a:b])
+        selection.push(records.attach("market", markets).attach("sector", sectors))
+
+    result = selection.result()
+    rows = [{"symbol": s, "score": float(sc), "rr_ratio_2": float(rr), "atr_pct": float(atr),
+             "market": markets[s], "sector": sectors[s]}
+            for s, sc, rr, atr in zip(symbols, score, rr_ratio, atr_pct)]
+    assert (result.symbols if len(result) else []) == reference(rows, top_n, 1.0, caps)
+
+
+def test_cap_skips_to_next_group():
+    records = make_records(["AAA", "BBB", "CCC"], [9.5, 9.0, 8.5], [6, 6, 6], [1, 1, 1])
+    records.attach("sector", {"AAA": "Technology", "BBB": "Technology", "CCC": "Energy"})
+    selection = TopNSelection(2, 5.0, caps={"sector": 1}).push(records)
+    assert selection.result().symbols == ["AAA", "CCC"]
+
+
+def test_correlation_rejects_duplicate_returns():
+    rng = np.random.default_rng(0)
+    base = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 61)))
+    other = 50 * np.exp(np.cumsum(rng.normal(0, 0.01, 61)))
+    closes = [base, base * 2, other]  # BBB tiene los mismos retornos que AAA
+    records = make_records(["AAA", "BBB", "CCC"], [9.5, 9.0, 8.5], [6, 6, 6], [1, 1, 1], closes)
+
+    selection = TopNSelection(2, 5.0, max_correlation=0.7).push(records)
+    assert selection.result().symbols == ["AAA", "CCC"]
+    assert [(s, other) for s, other, _ in selection.rejected] == [("BBB", "AAA")]
@@ -0,0 +1,74 @@
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from utils.rate_limit import SlidingWindowRateLimiter
+from utils.metrics import metrics
+
+
+class FinnhubClient:
+    """
+    Cliente HTTP para la API de Finnhub.
+    Reutiliza conexiones (pool de requests.Session), respeta el límite de
+    peticiones por minuto con una ventana deslizante compartida entre hilos y
+    reintenta los 429/5xx con backoff exponencial.
+    """
+
+    def __init__(self, api_key, base_url="https://finnhub.io/api/v1", requests_per_minute=60,
+                 max_retries=3, retry_backoff_sec=2.0, pool_size=10, timeout=10):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.retry_backoff_sec = retry_backoff_sec
+        self.timeout = timeout
+        self.rate_limiter = SlidingWindowRateLimiter(requests_per_minute, 60.0)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.lock = threading.Lock()
+        self.request_count = 0
+        self.retry_count = 0
+
+    def get(self, path, params=None):
+        """
+        GET a un endpoint de Finnhub. Retorna el JSON o None si falla.
+        """
+        params = {**(params or {}), "token": self.api_key}
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        endpoint = path.strip("/")
+
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            with self.lock:
+                self.request_count += 1
+            metrics.inc("http_requests", vendor="finnhub", endpoint=endpoint)
+            try:
+                with metrics.timer("http_request_seconds", vendor="finnhub", endpoint=endpoint):
+                    response = self.session.get(url, params=params, timeout=self.timeout)
+            except requests.RequestException:
+                response = None
+
+            if response is not None and response.status_code == 200:
+                return response.json()
+
+            status = response.status_code if response is not None else "error"
+            metrics.inc("http_errors", vendor="finnhub", endpoint=endpoint, status=status)
+            retryable = response is None or response.status_code == 429 or response.status_code >= 500
+            if not retryable or attempt == self.max_retries:
+                return None
+
+            with self.lock:
+                self.retry_count += 1
+            metrics.inc("http_retries", vendor="finnhub", endpoint=endpoint)
+            wait = self.retry_backoff_sec * (2 ** attempt)
+            if response is not None and response.headers.get("Retry-After", "").isdigit():
+                wait = max(wait, int(response.headers["Retry-After"]))
+            time.sleep(wait)
+
+        return None
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,71 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# TTL por defecto (horas). 0 = siempre fresco (no se sirve desde caché): con
+# precio y bid/ask a 0, un valor que supera los filtros lentos se descarga en
+# cada ejecución y la caché solo ahorra los rechazos por campos lentos
+DEFAULT_TTL_HOURS = {
+    "market_cap": 168,
+    "beta": 168,
+    "avg_volume": 24,
+    "short_name": 720,
+    "sector": 720,
+    "current_price": 0,
+    "bid": 0,
+    "ask": 0,
+}
+
+
+class FundamentalsCache:
+    """
+    Caché persistente (SQLite) de información fundamental por símbolo.
+    Cada campo tiene su propio TTL: capitalización y beta cambian despacio,
+    precio y bid/ask deben ser frescos.
+    """
+
+    def __init__(self, path="data_cache/fundamentals.sqlite", ttl_hours=None):
+        self.path = path
+        self.ttl_hours = {**DEFAULT_TTL_HOURS, **(ttl_hours or {})}
+        self.volatile_fields = {field for field, ttl in self.ttl_hours.items() if ttl <= 0}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS fundamentals ("
+            "symbol TEXT PRIMARY KEY, data TEXT NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def lookup(self, symbol):
+        """
+        Retorna (info, campos_caducados). info es None si no hay entrada.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT data, fetched_at FROM fundamentals WHERE symbol = ?", (symbol,)
+            ).fetchone()
+        if row is None:
+            return None, set(self.ttl_hours)
+
+        info = json.loads(row[0])
+        age_hours = (time.time() - row[1]) / 3600
+        stale = {field for field, ttl in self.ttl_hours.items() if age_hours >= ttl}
+        return info, stale
+
+    def store(self, symbol, info):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO fundamentals (symbol, data, fetched_at) VALUES (?, ?, ?)",
+                (symbol, json.dumps(info), time.time())
+            )
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
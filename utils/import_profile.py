@@ -0,0 +1,86 @@
+import builtins
+import importlib.util
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class ImportProfiler:
+    """
+    Mide el tiempo de cada import nuevo (como python -X importtime) sustituyendo
+    builtins.__import__ mientras está activo. Para cada módulo guarda el tiempo
+    acumulado (con sus dependencias) y el propio (sin ellas).
+    """
+
+    def __init__(self):
+        self.records = {}  # módulo -> (acumulado, propio)
+        self.local = threading.local()
+        self.original = None
+        self.started = None
+
+    def start(self):
+        self.original = builtins.__import__
+        builtins.__import__ = self._import
+        self.started = time.perf_counter()
+        return self
+
+    def stop(self):
+        if self.original is not None:
+            builtins.__import__ = self.original
+            self.original = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        try:
+            package = (globals or {}).get("__package__") if level else None
+            absolute = importlib.util.resolve_name("." * level + name, package) if level else name
+        except (ImportError, ValueError):
+            absolute = name
+        if absolute in sys.modules:
+            return self.original(name, globals, locals, fromlist, level)
+
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self.original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            if absolute not in self.records:
+                self.records[absolute] = (elapsed, elapsed - children)
+
+    def print_report(self, top=15):
+        """Resumen por paquete raíz (tiempo propio sumado) y los imports más lentos."""
+        self.stop()
+        packages = {}
+        for module, (_, own) in self.records.items():
+            root = module.split(".")[0]
+            count, total = packages.get(root, (0, 0.0))
+            packages[root] = (count + 1, total + own)
+
+        total = sum(own for _, own in self.records.values())
+        print(f"\n{'='*50}")
+        print(f"📦 PERFIL DE IMPORTS: {len(self.records)} módulos en {total:.2f}s")
+        print(f"{'='*50}")
+        print(f"   {'Paquete':<24}{'Módulos':>8}{'Propio':>10}")
+        for root, (count, own) in sorted(packages.items(), key=lambda x: -x[1][1])[:top]:
+            print(f"   {root:<24}{count:>8}{own:>9.3f}s")
+
+        print(f"\n   {'Import más lento':<32}{'Acumulado':>10}")
+        for module, (cumulative, _) in sorted(self.records.items(), key=lambda x: -x[1][0])[:top]:
+            print(f"   {module:<32}{cumulative:>9.3f}s")
+
+        if resource is not None:
+            # ru_maxrss está en KB en Linux
+            peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            print(f"\n   🧠 Memoria residente máxima: {peak_mb:.0f} MB")
+        print(f"{'='*50}\n")
@@ -0,0 +1,397 @@
+"""
+Estado incremental de indicadores por símbolo.
+
+Guarda, para cada símbolo (una fila), las ventanas y recurrencias necesarias
+para avanzar todos los indicadores de compute_indicator_panel con una barra
+nueva en O(1): EMAs, MACD, RSI, estocástico, ATR, ADX, Keltner, SuperTrend,
+VWAP y medias de volumen. La actualización está vectorizada por símbolos y
+reproduce las mismas operaciones que el motor de panel, de modo que el
+resultado coincide con recalcular todo el histórico desde la primera barra
+del estado (ver verify()).
+
+El estado se guarda en un único .npz junto con una copia del estado anterior
+a la última barra, para poder rehacer esa barra si se descargó con la sesión
+todavía abierta.
+"""
+
+import json
+import os
+import numpy as np
+from utils.indicators import build_panel, compute_indicator_panel, HIGH, LOW, CLOSE, VOLUME
+
+OUTPUTS = [
+    "Close", "EMA_short", "EMA_long", "EMA_trend", "RSI", "Stoch_K", "Stoch_D",
+    "MACD", "MACD_Signal", "MACD_Histogram", "ATR", "ADX",
+    "Keltner_Upper", "Keltner_Mid", "Keltner_Lower", "SuperTrend", "ST_Direction",
+    "VWAP", "Volume_MA", "Volume_Ratio", "Momentum", "Volatility", "Support", "Resistance",
+]
+SCALARS = [
+    "count", "origin_day", "last_day", "prev_close", "prev_high", "prev_low",
+    "ema_short", "ema_long", "ema_trend", "ema_fast", "ema_slow", "macd_signal", "keltner_mid",
+    "st_value", "st_direction", "st_upper", "st_lower",
+]
+TREND_WINDOW = 20
+ROLLING_WINDOW = 20  # VWAP, volumen medio, soporte y resistencia
+VOLATILITY_WINDOW = 10
+
+
+def _params(indicators_config):
+    stoch = indicators_config.get("stochastic", [9, 3, 3])
+    return {
+        "ema_short": indicators_config.get("ema_short", 5),
+        "ema_long": indicators_config.get("ema_long", 20),
+        "ema_trend": indicators_config.get("ema_trend", 50),
+        "rsi_period": indicators_config.get("rsi_period", 9),
+        "stoch_k": stoch[0], "stoch_d": stoch[1], "stoch_smooth": stoch[2],
+        "macd_fast": indicators_config.get("macd_fast", 5),
+        "macd_slow": indicators_config.get("macd_slow", 13),
+        "macd_signal": indicators_config.get("macd_signal", 5),
+        "keltner_period": indicators_config.get("keltner_period", 10),
+        "keltner_multiplier": indicators_config.get("keltner_multiplier", 2.0),
+        "atr_period": indicators_config.get("atr_period", 7),
+        "adx_period": indicators_config.get("adx_period", 14),
+        "supertrend_period": indicators_config.get("supertrend_period", 7),
+        "supertrend_multiplier": indicators_config.get("supertrend_multiplier", 1.5),
+    }
+
+
+def _ema(prev, current, span):
+    """Un paso de ema() de utils.indicators."""
+    alpha = 2.0 / (span + 1)
+    return np.where(np.isnan(prev), current, alpha * current + (1 - alpha) * prev)
+
+
+class IndicatorState:
+    def __init__(self, indicators_config, symbols=()):
+        self.indicators_config = indicators_config
+        self.params = _params(indicators_config)
+        p = self.params
+        self.widths = {
+            "close": TREND_WINDOW,
+            "high": max(p["stoch_k"], ROLLING_WINDOW),
+            "low": max(p["stoch_k"], ROLLING_WINDOW),
+            "volume": ROLLING_WINDOW,
+            "tpv": ROLLING_WINDOW,
+            "gain": p["rsi_period"],
+            "loss": p["rsi_period"],
+            "stoch_raw": p["stoch_smooth"],
+            "stoch_k": p["stoch_d"],
+            "tr": max(p["atr_period"], p["keltner_period"], p["supertrend_period"], p["adx_period"]),
+            "plus_dm": p["adx_period"],
+            "minus_dm": p["adx_period"],
+            "dx": p["adx_period"],
+            "returns": VOLATILITY_WINDOW,
+        }
+        self.symbols = []
+        self.index = {}
+        self.buffers = {name: np.full((0, width), np.nan) for name, width in self.widths.items()}
+        self.scalars = {name: np.full(0, np.nan) for name in SCALARS}
+        self.outputs = {name: np.full(0, np.nan) for name in OUTPUTS}
+        self.previous = self._copy()
+        self.rows(symbols)
+
+    # ------------------------------------------------------------------
+    # Filas
+    # ------------------------------------------------------------------
+    def _groups(self):
+        return self.buffers, self.scalars, self.outputs
+
+    def _copy(self):
+        return tuple({name: values.copy() for name, values in group.items()} for group in self._groups())
+
+    def rows(self, symbols):
+        """Índices de fila de los símbolos; añade filas vacías para los nuevos."""
+        new = [s for s in dict.fromkeys(symbols) if s not in self.index]
+        if new:
+            for s in new:
+                self.index[s] = len(self.symbols)
+                self.symbols.append(s)
+            for state in (self._groups(), self.previous):
+                for group in state:
+                    for name, values in group.items():
+                        blank = np.full((len(new),) + values.shape[1:], np.nan)
+                        group[name] = np.concatenate([values, blank])
+            for state in (self.scalars, self.previous[1]):
+                state["count"][-len(new):] = 0
+        return np.array([self.index[s] for s in symbols], dtype=int)
+
+    def prune(self, min_day):
+        """
+        Elimina las filas cuya última barra es anterior a `min_day` (ordinal
+        del día): símbolos que salieron del universo o que advance() tendría
+        que reconstruir de todos modos. Retorna cuántas se eliminaron.
+        """
+        keep = self.scalars["last_day"] >= min_day  # NaN (filas vacías) también se eliminan
+        dropped = len(self.symbols) - int(keep.sum())
+        if dropped:
+            self.symbols = [s for s, k in zip(self.symbols, keep) if k]
+            self.index = {s: i for i, s in enumerate(self.symbols)}
+            for state in (self._groups(), self.previous):
+                for group in state:
+                    for name, values in group.items():
+                        group[name] = values[keep]
+        return dropped
+
+    def reset(self, rows):
+        for state in (self._groups(), self.previous):
+            for group in state:
+                for values in group.values():
+                    values[rows] = np.nan
+            state[1]["count"][rows] = 0
+
+    def _snapshot(self, mask):
+        for current, previous in zip(self._groups(), self.previous):
+            for name, values in current.items():
+                previous[name][mask] = values[mask]
+
+    def _restore(self, rows):
+        for current, previous in zip(self._groups(), self.previous):
+            for name, values in current.items():
+                values[rows] = previous[name][rows]
+
+    # ------------------------------------------------------------------
+    # Actualización
+    # ------------------------------------------------------------------
+    def _push(self, name, values, mask):
+        buffer = self.buffers[name]
+        buffer[mask, :-1] = buffer[mask, 1:]
+        buffer[mask, -1] = values[mask]
+
+    def _tail(self, name, window):
+        return self.buffers[name][:, -window:]
+
+    def update(self, bars, days, mask):
+        """
+        Avanza una barra en las filas de `mask`.
+        bars: array (filas × 5) Open, High, Low, Close, Volume; days: ordinal del día.
+        """
+        if not mask.any():
+            return
+        self._snapshot(mask)
+        p = self.params
+        s = self.scalars
+        high, low, close, volume = bars[:, HIGH], bars[:, LOW], bars[:, CLOSE], bars[:, VOLUME]
+        prev_close = s["prev_close"]
+        out = {"Close": close}
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Ventanas de precios
+            for name, values in (("close", close), ("high", high), ("low", low), ("volume", volume),
+                                 ("tpv", (high + low + close) / 3 * volume)):
+                self._push(name, values, mask)
+
+            # EMAs y MACD
+            ema_short = _ema(s["ema_short"], close, p["ema_short"])
+            ema_long = _ema(s["ema_long"], close, p["ema_long"])
+            ema_trend = _ema(s["ema_trend"], close, p["ema_trend"])
+            ema_fast = _ema(s["ema_fast"], close, p["macd_fast"])
+            ema_slow = _ema(s["ema_slow"], close, p["macd_slow"])
+            macd_line = ema_fast - ema_slow
+            macd_signal = _ema(s["macd_signal"], macd_line, p["macd_signal"])
+            out["EMA_short"], out["EMA_long"], out["EMA_trend"] = ema_short, ema_long, ema_trend
+            out["MACD"], out["MACD_Signal"], out["MACD_Histogram"] = macd_line, macd_signal, macd_line - macd_signal
+
+            # RSI (la primera diferencia cuenta como 0, como en el panel)
+            delta = close - prev_close
+            self._push("gain", np.where(delta > 0, delta, 0.0), mask)
+            self._push("loss", np.where(delta < 0, -delta, 0.0), mask)
+            rs = np.mean(self._tail("gain", p["rsi_period"]), axis=1) / \
+                np.mean(self._tail("loss", p["rsi_period"]), axis=1)
+            out["RSI"] = 100 - (100 / (1 + rs))
+
+            # Estocástico
+            low_min = np.min(self._tail("low", p["stoch_k"]), axis=1)
+            high_max = np.max(self._tail("high", p["stoch_k"]), axis=1)
+            self._push("stoch_raw", 100 * (close - low_min) / (high_max - low_min), mask)
+            self._push("stoch_k", np.mean(self._tail("stoch_raw", p["stoch_smooth"]), axis=1), mask)
+            out["Stoch_K"] = self.buffers["stoch_k"][:, -1]
+            out["Stoch_D"] = np.mean(self._tail("stoch_k", p["stoch_d"]), axis=1)
+
+            # True range y medias
+            true_range = np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+            self._push("tr", true_range, mask)
+            tr_mean = lambda period: np.mean(self._tail("tr", period), axis=1)
+            out["ATR"] = tr_mean(p["atr_period"])
+
+            # ADX
+            plus_dm = high - s["prev_high"]
+            minus_dm = -(low - s["prev_low"])
+            plus_dm[plus_dm < 0] = 0
+            minus_dm[minus_dm < 0] = 0
+            self._push("plus_dm", plus_dm, mask)
+            self._push("minus_dm", minus_dm, mask)
+            adx_tr = tr_mean(p["adx_period"])
+            plus_di = 100 * (np.mean(self._tail("plus_dm", p["adx_period"]), axis=1) / adx_tr)
+            minus_di = 100 * (np.mean(self._tail("minus_dm", p["adx_period"]), axis=1) / adx_tr)
+            self._push("dx", 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di), mask)
+            out["ADX"] = np.mean(self._tail("dx", p["adx_period"]), axis=1)
+
+            # Keltner
+            keltner_mid = _ema(s["keltner_mid"], close, p["keltner_period"])
+            band = p["keltner_multiplier"] * tr_mean(p["keltner_period"])
+            out["Keltner_Upper"], out["Keltner_Mid"], out["Keltner_Lower"] = \
+                keltner_mid + band, keltner_mid, keltner_mid - band
+
+            # SuperTrend: arrastre contra las bandas de la barra anterior
+            st_atr = tr_mean(p["supertrend_period"])
+            hl_avg = (high + low) / 2
+            upper_band = hl_avg + (p["supertrend_multiplier"] * st_atr)
+            lower_band = hl_avg - (p["supertrend_multiplier"] * st_atr)
+            up = close > s["st_upper"]
+            down = ~up & (close < s["st_lower"])
+            st_value = np.where(up, lower_band, np.where(down, upper_band, s["st_value"]))
+            st_direction = np.where(up, 1, np.where(down, -1, s["st_direction"]))
+            out["SuperTrend"], out["ST_Direction"] = st_value, st_direction
+
+            # VWAP, volumen, momentum, volatilidad, soporte y resistencia
+            out["VWAP"] = np.sum(self.buffers["tpv"], axis=1) / np.sum(self.buffers["volume"], axis=1)
+            out["Volume_MA"] = np.mean(self.buffers["volume"], axis=1)
+            out["Volume_Ratio"] = volume / out["Volume_MA"]
+            out["Momentum"] = close / self.buffers["close"][:, -6] - 1
+            self._push("returns", close / prev_close - 1, mask)
+            out["Volatility"] = np.std(self.buffers["returns"], axis=1, ddof=1)
+            out["Support"] = np.min(self._tail("low", ROLLING_WINDOW), axis=1)
+            out["Resistance"] = np.max(self._tail("high", ROLLING_WINDOW), axis=1)
+
+        for name, values in out.items():
+            self.outputs[name][mask] = values[mask]
+
+        updates = {
+            "prev_close": close, "prev_high": high, "prev_low": low,
+            "ema_short": ema_short, "ema_long": ema_long, "ema_trend": ema_trend,
+            "ema_fast": ema_fast, "ema_slow": ema_slow, "macd_signal": macd_signal,
+            "keltner_mid": keltner_mid, "st_value": st_value, "st_direction": st_direction,
+            "st_upper": upper_band, "st_lower": lower_band, "last_day": days,
+        }
+        for name, values in updates.items():
+            s[name][mask] = values[mask]
+        s["origin_day"][mask & (s["count"] == 0)] = days[mask & (s["count"] == 0)]
+        s["count"][mask] += 1
+
+    def advance(self, frames):
+        """
+        Incorpora las barras nuevas de cada DataFrame OHLCV (dict símbolo -> df).
+        La barra del último día guardado se rehace (pudo guardarse con la sesión
+        abierta). Si el estado no enlaza con los datos se reconstruye desde el
+        principio del DataFrame. Retorna el número de barras procesadas.
+        """
+        symbols = list(frames)
+        rows = self.rows(symbols)
+        pending = []
+        for s, row in zip(symbols, rows):
+            df = frames[s]
+            days = df.index.values.astype("datetime64[D]").astype("int64")
+            last = self.scalars["last_day"][row]
+
+            if self.scalars["count"][row] == 0 or np.isnan(last) or last < days[0]:
+                self.reset(row)
+                start = 0
+            elif last > days[-1]:
+                continue
+            else:
+                start = int(np.searchsorted(days, last))
+                if days[start] != last:
+                    self.reset(row)
+                    start = 0
+                else:
+                    self._restore(row)
+            pending.append((row, df.iloc[start:], days[start:]))
+
+        if not pending:
+            return 0
+
+        panel = build_panel([df for _, df, _ in pending])
+        length = panel.shape[1]
+        day_panel = np.full((len(pending), length), np.nan)
+        for j, (_, _, days) in enumerate(pending):
+            day_panel[j, length - len(days):] = days
+        pending_rows = np.array([row for row, _, _ in pending])
+
+        bars = np.full((len(self.symbols), 5), np.nan)
+        days = np.full(len(self.symbols), np.nan)
+        for t in range(length):
+            bars[:] = np.nan
+            days[:] = np.nan
+            bars[pending_rows] = panel[:, t, :]
+            days[pending_rows] = day_panel[:, t]
+            self.update(bars, days, ~np.isnan(bars[:, CLOSE]))
+        return int(np.sum(~np.isnan(panel[:, :, CLOSE])))
+
+    def indicators(self, rows):
+        """
+        Indicadores actuales de las filas en el formato de compute_indicator_panel
+        (una sola columna; Close con las últimas barras para la tendencia).
+        """
+        out = {name: values[rows][:, None] for name, values in self.outputs.items()}
+        out["Close"] = self.buffers["close"][rows]
+        return out
+
+    # ------------------------------------------------------------------
+    # Persistencia y verificación
+    # ------------------------------------------------------------------
+    def save(self, path):
+        """Guarda el estado completo (escritura atómica)."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        arrays = {"symbols": np.array(self.symbols, dtype=str), "params": np.array(json.dumps(self.params))}
+        for prefix, groups in (("", self._groups()), ("prev_", self.previous)):
+            for kind, group in zip(("buffer", "scalar", "output"), groups):
+                for name, values in group.items():
+                    arrays[f"{prefix}{kind}:{name}"] = values
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, indicators_config):
+        """Carga el estado; si no existe, está corrupto o cambió la config, empieza vacío."""
+        state = cls(indicators_config)
+        if not os.path.exists(path):
+            return state
+        try:
+            with np.load(path) as data:
+                if json.loads(str(data["params"])) != state.params:
+                    print("   ⚠️ Parámetros de indicadores cambiados: se reconstruye el estado")
+                    return state
+                symbols = [str(s) for s in data["symbols"]]
+                state.rows(symbols)
+                for prefix, groups in (("", state._groups()), ("prev_", state.previous)):
+                    for kind, group in zip(("buffer", "scalar", "output"), groups):
+                        for name in group:
+                            group[name] = data[f"{prefix}{kind}:{name}"].copy()
+        except (OSError, ValueError, KeyError) as e:
+            print(f"   ⚠️ Estado de indicadores corrupto: {e}")
+            return cls(indicators_config)
+        return state
+
+    def origin(self, symbol):
+        """Primera fecha incluida en el estado del símbolo (o None)."""
+        row = self.index.get(symbol)
+        if row is None or self.scalars["count"][row] == 0:
+            return None
+        return np.datetime64(int(self.scalars["origin_day"][row]), "D")
+
+    def verify(self, frames, rtol=1e-9):
+        """
+        Compara el estado con un recálculo completo del panel sobre las barras
+        desde el origen de cada símbolo hasta su última barra.
+        Retorna la lista de discrepancias (símbolo, indicador, estado, recálculo).
+        """
+        symbols = [s for s in frames if self.origin(s) is not None]
+        if not symbols:
+            return []
+        rows = self.rows(symbols)
+        windows = []
+        for s, row in zip(symbols, rows):
+            days = frames[s].index.values.astype("datetime64[D]").astype("int64")
+            keep = (days >= self.scalars["origin_day"][row]) & (days <= self.scalars["last_day"][row])
+            windows.append(frames[s][keep])
+
+        full = compute_indicator_panel(build_panel(windows), self.indicators_config)
+        mismatches = []
+        for name in OUTPUTS:
+            expected = full[name][:, -1]
+            actual = self.outputs[name][rows]
+            close = np.isclose(actual, expected, rtol=rtol, atol=1e-12, equal_nan=True)
+            for j in np.flatnonzero(~close):
+                mismatches.append((symbols[j], name, float(actual[j]), float(expected[j])))
+        return mismatches
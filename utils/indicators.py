@@ -0,0 +1,267 @@
+"""
+Motor de indicadores vectorizado sobre un panel (símbolos × días × campos).
+
+Cada función opera sobre arrays 2-D (símbolos × días) a lo largo del eje del
+tiempo, de modo que todos los símbolos se calculan a la vez. Las series están
+alineadas a la derecha (última barra en la última columna) y rellenas con NaN
+por la izquierda, lo que reproduce el cálculo por símbolo de DataAgent.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+try:
+    from numba import njit
+except ImportError:  # Numba es opcional: se usa la versión NumPy
+    njit = None
+
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+OPEN, HIGH, LOW, CLOSE, VOLUME = range(5)
+
+
+def build_panel(frames):
+    """
+    Construye el panel (símbolos × días × 5) a partir de DataFrames OHLCV.
+    Cada símbolo se alinea a la derecha; los huecos iniciales quedan en NaN.
+    """
+    length = max((len(df) for df in frames), default=0)
+    panel = np.full((len(frames), length, len(FIELDS)), np.nan)
+    for j, df in enumerate(frames):
+        for k, field in enumerate(FIELDS):
+            values = df[field].to_numpy(dtype=float)
+            panel[j, length - len(values):, k] = values
+    return panel
+
+
+def _shift(x, n=1):
+    out = np.full_like(x, np.nan)
+    out[:, n:] = x[:, :-n]
+    return out
+
+
+def _diff(x, n=1):
+    return x - _shift(x, n)
+
+
+def _rolling(x, window, func, **kwargs):
+    out = np.full_like(x, np.nan)
+    if x.shape[1] >= window:
+        out[:, window - 1:] = func(sliding_window_view(x, window, axis=1), axis=-1, **kwargs)
+    return out
+
+
+def rolling_mean(x, window):
+    return _rolling(x, window, np.mean)
+
+
+def rolling_std(x, window):
+    return _rolling(x, window, np.std, ddof=1)
+
+
+def rolling_min(x, window):
+    return _rolling(x, window, np.min)
+
+
+def rolling_max(x, window):
+    return _rolling(x, window, np.max)
+
+
+def rolling_sum(x, window):
+    return _rolling(x, window, np.sum)
+
+
+def ema(x, span):
+    """EMA con adjust=False; arranca en la primera barra válida de cada símbolo."""
+    alpha = 2.0 / (span + 1)
+    out = np.full_like(x, np.nan)
+    prev = np.full(x.shape[0], np.nan)
+    for t in range(x.shape[1]):
+        current = x[:, t]
+        prev = np.where(np.isnan(prev), current, alpha * current + (1 - alpha) * prev)
+        out[:, t] = prev
+    return out
+
+
+def rsi(close, period=14):
+    delta = _diff(close)
+    # Como en pandas: la primera diferencia (NaN) cuenta como 0
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    missing = np.isnan(close)
+    gain[missing] = np.nan
+    loss[missing] = np.nan
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = rolling_mean(gain, period) / rolling_mean(loss, period)
+        return 100 - (100 / (1 + rs))
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    macd_line = ema(close, fast) - ema(close, slow)
+    signal_line = ema(macd_line, signal)
+    return macd_line, signal_line, macd_line - signal_line
+
+
+def stochastic(high, low, close, k_period=14, d_period=3, smooth=3):
+    low_min = rolling_min(low, k_period)
+    high_max = rolling_max(high, k_period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        k = 100 * (close - low_min) / (high_max - low_min)
+    k_smooth = rolling_mean(k, smooth)
+    return k_smooth, rolling_mean(k_smooth, d_period)
+
+
+def true_range(high, low, close):
+    prev_close = _shift(close)
+    return np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+
+
+def atr(high, low, close, period=14):
+    return rolling_mean(true_range(high, low, close), period)
+
+
+def adx(high, low, close, period=14):
+    plus_dm = _diff(high)
+    minus_dm = -_diff(low)
+    plus_dm[plus_dm < 0] = 0
+    minus_dm[minus_dm < 0] = 0
+
+    tr_mean = rolling_mean(true_range(high, low, close), period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        plus_di = 100 * (rolling_mean(plus_dm, period) / tr_mean)
+        minus_di = 100 * (rolling_mean(minus_dm, period) / tr_mean)
+        dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+    return rolling_mean(dx, period)
+
+
+def keltner_channels(high, low, close, period=20, multiplier=2):
+    mid = ema(close, period)
+    band = multiplier * atr(high, low, close, period)
+    return mid + band, mid, mid - band
+
+
+def _supertrend_numpy(close, upper_band, lower_band, start):
+    values = np.full_like(close, np.nan)
+    direction = np.full_like(close, np.nan)
+    for i in range(start, close.shape[1]):
+        up = close[:, i] > upper_band[:, i - 1]
+        down = ~up & (close[:, i] < lower_band[:, i - 1])
+        values[:, i] = np.where(up, lower_band[:, i], np.where(down, upper_band[:, i], values[:, i - 1]))
+        direction[:, i] = np.where(up, 1, np.where(down, -1, direction[:, i - 1]))
+    return values, direction
+
+
+def _supertrend_loop(close, upper_band, lower_band, start):
+    values = np.full_like(close, np.nan)
+    direction = np.full_like(close, np.nan)
+    for j in range(close.shape[0]):
+        for i in range(start, close.shape[1]):
+            if close[j, i] > upper_band[j, i - 1]:
+                values[j, i] = lower_band[j, i]
+                direction[j, i] = 1
+            elif close[j, i] < lower_band[j, i - 1]:
+                values[j, i] = upper_band[j, i]
+                direction[j, i] = -1
+            else:
+                values[j, i] = values[j, i - 1]
+                direction[j, i] = direction[j, i - 1]
+    return values, direction
+
+
+_supertrend_compiled = njit(cache=True)(_supertrend_loop) if njit else None
+
+
+def supertrend_kernel(close, upper_band, lower_band, start):
+    """
+    Recurrencia de arrastre de bandas del SuperTrend sobre arrays (símbolos × días).
+    Usa Numba si está instalado; si no, un bucle temporal vectorizado por símbolos
+    (o el bucle escalar para lotes pequeños, donde np.where no compensa).
+    Las comparaciones con NaN son falsas, igual que en el bucle original.
+    """
+    close = np.ascontiguousarray(close, dtype=float)
+    upper_band = np.ascontiguousarray(upper_band, dtype=float)
+    lower_band = np.ascontiguousarray(lower_band, dtype=float)
+    if _supertrend_compiled is not None:
+        return _supertrend_compiled(close, upper_band, lower_band, start)
+    if close.shape[0] < 8:
+        return _supertrend_loop(close, upper_band, lower_band, start)
+    return _supertrend_numpy(close, upper_band, lower_band, start)
+
+
+def supertrend(high, low, close, period=7, multiplier=3):
+    atr_values = atr(high, low, close, period)
+    hl_avg = (high + low) / 2
+    upper_band = hl_avg + (multiplier * atr_values)
+    lower_band = hl_avg - (multiplier * atr_values)
+    return supertrend_kernel(close, upper_band, lower_band, period)
+
+
+def vwap(high, low, close, volume, window=20):
+    """VWAP de las últimas `window` barras."""
+    typical_price = (high + low + close) / 3
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return rolling_sum(typical_price * volume, window) / rolling_sum(volume, window)
+
+
+def trend(close, window=20):
+    """Tendencia por pendiente de las últimas `window` barras."""
+    slope = (close[:, -1] - close[:, -window]) / window
+    labels = np.full(close.shape[0], "lateral", dtype=object)
+    labels[slope > 0.5] = "alcista"
+    labels[slope < -0.5] = "bajista"
+    return labels
+
+
+def compute_indicator_panel(panel, indicators_config):
+    """
+    Calcula todos los indicadores de config.json["indicators"] para todo el panel.
+    Retorna dict columna -> array (símbolos × días) con los mismos nombres que
+    las columnas de DataAgent.compute_indicators.
+    """
+    high = np.ascontiguousarray(panel[:, :, HIGH])
+    low = np.ascontiguousarray(panel[:, :, LOW])
+    close = np.ascontiguousarray(panel[:, :, CLOSE])
+    volume = np.ascontiguousarray(panel[:, :, VOLUME])
+    out = {"Close": close}
+
+    out["EMA_short"] = ema(close, indicators_config.get("ema_short", 5))
+    out["EMA_long"] = ema(close, indicators_config.get("ema_long", 20))
+    out["EMA_trend"] = ema(close, indicators_config.get("ema_trend", 50))
+
+    out["RSI"] = rsi(close, indicators_config.get("rsi_period", 9))
+
+    stoch_params = indicators_config.get("stochastic", [9, 3, 3])
+    out["Stoch_K"], out["Stoch_D"] = stochastic(high, low, close, *stoch_params)
+
+    out["MACD"], out["MACD_Signal"], out["MACD_Histogram"] = macd(
+        close,
+        indicators_config.get("macd_fast", 5),
+        indicators_config.get("macd_slow", 13),
+        indicators_config.get("macd_signal", 5)
+    )
+
+    out["ATR"] = atr(high, low, close, indicators_config.get("atr_period", 7))
+    out["ADX"] = adx(high, low, close, indicators_config.get("adx_period", 14))
+
+    out["Keltner_Upper"], out["Keltner_Mid"], out["Keltner_Lower"] = keltner_channels(
+        high, low, close,
+        indicators_config.get("keltner_period", 10),
+        indicators_config.get("keltner_multiplier", 2.0)
+    )
+
+    out["SuperTrend"], out["ST_Direction"] = supertrend(
+        high, low, close,
+        indicators_config.get("supertrend_period", 7),
+        indicators_config.get("supertrend_multiplier", 1.5)
+    )
+
+    out["VWAP"] = vwap(high, low, close, volume)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out["Volume_MA"] = rolling_mean(volume, 20)
+        out["Volume_Ratio"] = volume / out["Volume_MA"]
+        out["Momentum"] = close / _shift(close, 5) - 1
+        out["Volatility"] = rolling_std(close / _shift(close) - 1, 10)
+
+    out["Support"] = rolling_min(low, 20)
+    out["Resistance"] = rolling_max(high, 20)
+    return out
@@ -0,0 +1,110 @@
+import re
+
+# Léxico por defecto (peso 1 por palabra, como el scorer original)
+DEFAULT_LEXICON = {
+    "positive": {
+        "surge": 1.0, "soar": 1.0, "beat": 1.0, "strong": 1.0, "growth": 1.0,
+        "profit": 1.0, "upgrade": 1.0, "buyback": 1.0, "deal": 1.0, "partnership": 1.0
+    },
+    "negative": {
+        "plunge": 1.0, "crash": 1.0, "miss": 1.0, "weak": 1.0, "loss": 1.0,
+        "downgrade": 1.0, "investigation": 1.0, "lawsuit": 1.0, "warning": 1.0, "decline": 1.0
+    }
+}
+
+SUFFIXES = ("", "s", "es", "d", "ed", "ing")
+
+
+def _word_forms(word):
+    """Formas flexionadas simples de una palabra (surge -> surges, surged, surging...)."""
+    forms = {word + suffix for suffix in SUFFIXES}
+    if word.endswith("e"):
+        forms.add(word[:-1] + "ing")
+    return forms
+
+
+class KeywordScorer:
+    """
+    Scorer de sentiment por palabras clave con un único regex precompilado.
+    Coincide con límites de palabra (incluye flexiones simples) y cada palabra
+    del léxico cuenta una vez por texto con su peso.
+    """
+
+    def __init__(self, lexicon=None):
+        lexicon = lexicon or DEFAULT_LEXICON
+        self.weights = {}
+        for word, weight in lexicon.get("positive", {}).items():
+            self.weights[word.lower()] = abs(float(weight))
+        for word, weight in lexicon.get("negative", {}).items():
+            self.weights[word.lower()] = -abs(float(weight))
+
+        self.base_word = {}
+        for word in self.weights:
+            for form in _word_forms(word):
+                self.base_word.setdefault(form, word)
+
+        alternatives = sorted(self.base_word, key=len, reverse=True)
+        self.pattern = re.compile(r"\b(" + "|".join(map(re.escape, alternatives)) + r")\b", re.IGNORECASE)
+        # Para lotes: el salto de línea que separa los textos también coincide (vacío = otro texto)
+        self.batch_pattern = re.compile(r"\n|\b(?:" + "|".join(map(re.escape, alternatives)) + r")\b", re.IGNORECASE)
+
+    def score_text(self, text):
+        """Suma de pesos de las palabras del léxico presentes en el texto."""
+        matched = {self.base_word[m.lower()] for m in self.pattern.findall(text)}
+        return sum(self.weights[word] for word in matched)
+
+    def score_texts(self, texts):
+        """
+        Scores de varios textos con una sola pasada del regex sobre todos ellos
+        unidos por saltos de línea: cada salto encontrado cierra un texto.
+        """
+        if not texts:
+            return []
+        joined = "\n".join(text.replace("\n", " ") for text in texts)
+        matched = [set()]
+        for token in self.batch_pattern.findall(joined):
+            if token == "\n":
+                matched.append(set())
+            else:
+                matched[-1].add(self.base_word[token.lower()])
+        return [sum(self.weights[word] for word in words) for words in matched]
+
+    @staticmethod
+    def _news_text(news):
+        return f"{news.get('headline', '')} {news.get('summary', '')}"
+
+    def score_news(self, news_list):
+        """
+        Score de sentiment de una lista de noticias.
+        Retorna: score normalizado (-1 a +1), negative_count, positive_count
+        """
+        return self._summarize(self.score_texts([self._news_text(news) for news in news_list or []]))
+
+    def score_batch(self, news_by_symbol):
+        """
+        Puntúa las noticias de todos los símbolos con una sola pasada del regex.
+        Retorna {símbolo: (score, negative_count, positive_count)}.
+        """
+        symbols = list(news_by_symbol)
+        texts = [self._news_text(news) for s in symbols for news in news_by_symbol[s] or []]
+        scores = self.score_texts(texts)
+        out = {}
+        position = 0
+        for s in symbols:
+            count = len(news_by_symbol[s] or [])
+            out[s] = self._summarize(scores[position:position + count])
+            position += count
+        return out
+
+    @staticmethod
+    def _summarize(scores):
+        """Score normalizado y recuentos a partir de los scores por noticia."""
+        if not scores:
+            return 0, 0, 0
+
+        negative_count = sum(1 for score in scores if score < 0)
+        positive_count = sum(1 for score in scores if score > 0)
+
+        avg_score = sum(scores) / len(scores)
+        normalized_score = max(-1, min(1, avg_score / 3))
+        return normalized_score, negative_count, positive_count
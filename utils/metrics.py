@@ -0,0 +1,181 @@
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# Límites (segundos) de los histogramas de latencia
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+class Histogram:
+    """Distribución de observaciones en cubetas acumulativas (estilo Prometheus)."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "min": round(self.min, 6) if self.min is not None else None,
+            "max": round(self.max, 6) if self.max is not None else None,
+            "buckets": {str(bound): n for bound, n in zip(self.buckets, self.counts)},
+        }
+
+
+class Metrics:
+    """
+    Registro de métricas de una ejecución: contadores, gauges e histogramas,
+    cada uno identificado por nombre y etiquetas. Seguro entre hilos.
+    Las etapas se miden con el context manager timer().
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.last = None  # Snapshot de la última ejecución terminada
+        self.reset()
+
+    def reset(self, **info):
+        """Empieza una ejecución nueva (el snapshot anterior se conserva en `last`)."""
+        with self.lock:
+            self.counters = {}
+            self.gauges = {}
+            self.histograms = {}
+            self.info = dict(info)
+            self.started = time.time()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self.lock:
+            self.gauges[self._key(name, labels)] = value
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observa en el histograma `name` los segundos que tarda el bloque."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timed(self, name, **labels):
+        """Decorador equivalente a timer() para un método completo."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def set_info(self, **info):
+        with self.lock:
+            self.info.update(info)
+
+    def snapshot(self):
+        """Estado actual como dict serializable a JSON."""
+        with self.lock:
+            entries = lambda items, fn: [
+                {"name": name, "labels": dict(labels), **fn(value)}
+                for (name, labels), value in sorted(items.items())
+            ]
+            now = time.time()
+            return {
+                "info": dict(self.info),
+                "started": datetime.utcfromtimestamp(self.started).isoformat() + "Z",
+                "duration_sec": round(now - self.started, 3),
+                "counters": entries(self.counters, lambda v: {"value": v}),
+                "gauges": entries(self.gauges, lambda v: {"value": v}),
+                "histograms": entries(self.histograms, lambda h: h.to_dict()),
+            }
+
+    def finish(self):
+        """Cierra la ejecución: guarda el snapshot en `last` y lo retorna."""
+        self.last = self.snapshot()
+        return self.last
+
+    def save(self, filename, snapshot=None):
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(snapshot or self.snapshot(), f, indent=2, ensure_ascii=False)
+        return filename
+
+
+def _labels(labels, extra=None):
+    items = list(labels.items()) + (list(extra.items()) if extra else [])
+    if not items:
+        return ""
+    escape = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in items) + "}"
+
+
+def to_prometheus(snapshot, prefix="swing"):
+    """Formato de exposición de texto de Prometheus para un snapshot."""
+    if not snapshot:
+        return ""
+    lines = []
+    declared = set()
+
+    def declare(name, kind):
+        if name not in declared:
+            declared.add(name)
+            lines.append(f"# TYPE {name} {kind}")
+
+    for entry in snapshot["counters"]:
+        name = f"{prefix}_{entry['name']}_total"
+        declare(name, "counter")
+        lines.append(f"{name}{_labels(entry['labels'])} {entry['value']}")
+
+    for entry in snapshot["gauges"]:
+        name = f"{prefix}_{entry['name']}"
+        declare(name, "gauge")
+        lines.append(f"{name}{_labels(entry['labels'])} {entry['value']}")
+
+    for entry in snapshot["histograms"]:
+        name = f"{prefix}_{entry['name']}"
+        declare(name, "histogram")
+        for bound, count in entry["buckets"].items():
+            lines.append(f"{name}_bucket{_labels(entry['labels'], {'le': bound})} {count}")
+        lines.append(f"{name}_bucket{_labels(entry['labels'], {'le': '+Inf'})} {entry['count']}")
+        lines.append(f"{name}_sum{_labels(entry['labels'])} {entry['sum']}")
+        lines.append(f"{name}_count{_labels(entry['labels'])} {entry['count']}")
+
+    name = f"{prefix}_run_duration_seconds"
+    declare(name, "gauge")
+    lines.append(f"{name}{_labels(snapshot.get('info', {}))} {snapshot['duration_sec']}")
+    return "\n".join(lines) + "\n"
+
+
+# Registro compartido por todos los agentes del proceso
+metrics = Metrics()
@@ -0,0 +1,116 @@
+import os
+import numpy as np
+import pandas as pd
+
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+class PriceStore:
+    """
+    Almacén local de precios OHLCV diarios.
+    Un fichero .npy por símbolo (columnas: día, Open, High, Low, Close, Volume)
+    que se lee con memory-map. Permite saber la última fecha guardada de cada
+    ticker para descargar solo la cola que falta.
+    """
+
+    def __init__(self, path="data_cache/prices", max_history_days=3650):
+        self.path = path
+        self.max_history_days = max_history_days
+        os.makedirs(self.path, exist_ok=True)
+
+    def _file(self, symbol):
+        safe = symbol.replace("/", "_").replace("^", "_")
+        return os.path.join(self.path, f"{safe}.npy")
+
+    def load(self, symbol):
+        """Devuelve el histórico guardado como DataFrame (o None si no existe)."""
+        filename = self._file(symbol)
+        if not os.path.exists(filename):
+            return None
+        try:
+            raw = np.load(filename, mmap_mode="r")
+        except (OSError, ValueError) as e:
+            print(f"   ⚠️ Histórico corrupto para {symbol}: {e}")
+            return None
+        if raw.size == 0:
+            return None
+
+        index = pd.DatetimeIndex(raw[:, 0].astype("int64").astype("datetime64[D]"), name="Date")
+        return pd.DataFrame(np.array(raw[:, 1:]), index=index, columns=FIELDS)
+
+    def last_date(self, symbol):
+        """Última fecha almacenada para el símbolo (o None)."""
+        filename = self._file(symbol)
+        if not os.path.exists(filename):
+            return None
+        try:
+            raw = np.load(filename, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        if raw.size == 0:
+            return None
+        return pd.Timestamp(np.datetime64(int(raw[-1, 0]), "D"))
+
+    def save(self, symbol, df):
+        """Guarda el histórico completo del símbolo (escritura atómica)."""
+        df = df[FIELDS].dropna(subset=["Close"])
+        if self.max_history_days:
+            cutoff = pd.Timestamp.today().normalize() - pd.Timedelta(days=self.max_history_days)
+            df = df[df.index >= cutoff]
+
+        days = df.index.values.astype("datetime64[D]").astype("int64").astype(float)
+        raw = np.column_stack([days, df.to_numpy(dtype=float)])
+
+        filename = self._file(symbol)
+        tmp = filename + ".tmp.npy"
+        np.save(tmp, raw)
+        os.replace(tmp, filename)
+
+    @staticmethod
+    def _normalize(df):
+        df = df[FIELDS].dropna(subset=["Close"])
+        df.index = pd.DatetimeIndex(df.index).tz_localize(None).normalize()
+        return df
+
+    def matches(self, symbol, new_df, rtol=1e-4):
+        """
+        Comprueba que las barras descargadas coinciden con las guardadas en las
+        fechas comunes (salvo la última guardada, que pudo ser de una sesión
+        abierta). Con precios ajustados, un split o dividendo reajusta todo el
+        histórico hacia atrás y el guardado deja de enlazar con la cola nueva.
+        """
+        stored = self.load(symbol)
+        if stored is None or len(stored) < 2:
+            return True
+        new_df = self._normalize(new_df)
+        common = stored.index[:-1].intersection(new_df.index)
+        if common.empty:
+            return True
+        return bool(np.allclose(new_df.loc[common, "Close"].to_numpy(), stored.loc[common, "Close"].to_numpy(),
+                                rtol=rtol, atol=0))
+
+    def replace(self, symbol, new_df):
+        """Sustituye el histórico guardado por las barras descargadas."""
+        new_df = self._normalize(new_df).sort_index()
+        if not new_df.empty:
+            self.save(symbol, new_df)
+        return new_df
+
+    def merge(self, symbol, new_df):
+        """
+        Fusiona barras nuevas con el histórico guardado.
+        Las fechas repetidas se sobrescriben con el dato nuevo (la última barra
+        pudo guardarse con la sesión todavía abierta).
+        """
+        new_df = self._normalize(new_df)
+
+        stored = self.load(symbol)
+        if stored is not None and not stored.empty:
+            merged = pd.concat([stored, new_df])
+            merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+        else:
+            merged = new_df.sort_index()
+
+        if not merged.empty:
+            self.save(symbol, merged)
+        return merged
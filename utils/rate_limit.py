@@ -0,0 +1,73 @@
+import threading
+import time
+from collections import deque
+
+
+class TokenBucket:
+    """
+    Limitador de tasa token-bucket seguro entre hilos.
+    Permite ráfagas de hasta `capacity` peticiones y repone `rate` tokens/segundo.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """Bloquea hasta disponer de `tokens` tokens."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def try_acquire(self, tokens=1):
+        """Como acquire() pero sin esperar: retorna False si no hay tokens."""
+        if self.rate <= 0:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+
+class SlidingWindowRateLimiter:
+    """
+    Limitador de ventana deslizante: como máximo `max_calls` llamadas en
+    cualquier intervalo de `period` segundos (p. ej. 60 req/min de Finnhub).
+    """
+
+    def __init__(self, max_calls, period=60.0):
+        self.max_calls = int(max_calls)
+        self.period = float(period)
+        self.calls = deque()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Bloquea hasta que la llamada cabe en la ventana."""
+        if self.max_calls <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                while self.calls and now - self.calls[0] >= self.period:
+                    self.calls.popleft()
+                if len(self.calls) < self.max_calls:
+                    self.calls.append(now)
+                    return
+                wait = self.period - (now - self.calls[0])
+            time.sleep(wait)
@@ -0,0 +1,178 @@
+"""
+Contenedor columnar de activos que recorre datos → análisis → selección.
+
+Un único array estructurado de NumPy con una fila por activo. Los campos
+numéricos con decimales fijos (precios e indicadores redondeados) se guardan
+en float32 y column() los devuelve redondeados de nuevo a float64, así que
+los valores son idénticos a los del dict por activo que sustituye. Si una
+columna no cabe sin pérdida en float32 (p. ej. precios de más de siete
+cifras significativas) se queda en float64.
+
+Los dicts por activo solo se construyen en to_dicts(), al llegar al reporte
+o al JSON, y normalmente para unos pocos activos.
+"""
+
+import numpy as np
+
+
+def round_values(values, digits):
+    """
+    round() de Python elemento a elemento, para arrays de cualquier forma.
+    np.round escala y redondea en binario y puede diferir en medios céntimos
+    (417.785 -> 417.78 frente a 417.79): solo los valores próximos a un empate
+    se redondean con round(), el resto ya coincide. Todos los caminos que
+    generan registros redondean con esta función.
+    """
+    values = np.asarray(values, dtype=float)
+    rounded = np.round(values, digits)
+    with np.errstate(invalid="ignore"):
+        near_tie = np.abs(values * 10.0 ** digits % 1 - 0.5) < 1e-6
+    if near_tie.any():
+        rounded[near_tie] = [round(v, digits) for v in values[near_tie].tolist()]
+    return rounded
+
+
+class AssetRecords:
+    __slots__ = ("array", "digits", "attachments")
+
+    def __init__(self, array, digits=None, attachments=None):
+        self.array = array                    # ndarray estructurado, una fila por activo
+        self.digits = digits or {}            # campo -> decimales con los que se redondeó
+        self.attachments = attachments or {}  # nombre -> {símbolo: objeto}, p. ej. sentiment
+
+    @classmethod
+    def from_columns(cls, columns, digits=None, attachments=None):
+        """
+        Construye el contenedor desde dict campo -> array (mismo orden de
+        filas). Los float con decimales en `digits` se compactan a float32
+        cuando el redondeo los recupera sin pérdida; los textos pasan a
+        unicode de ancho fijo. Un array 2D es un campo vectorial por fila
+        (p. ej. los cierres para la correlación).
+        """
+        digits = dict(digits or {})
+        arrays = {}
+        for name, values in columns.items():
+            values = np.asarray(values)
+            if values.dtype.kind == "O":
+                values = values.astype(str) if len(values) else np.empty(0, dtype="U1")
+            elif values.dtype.kind == "f" and digits.get(name) is not None:
+                compact = values.astype(np.float32)
+                if np.array_equal(np.round(compact.astype(np.float64), digits[name]), values, equal_nan=True):
+                    values = compact
+            arrays[name] = values
+
+        size = len(next(iter(arrays.values()))) if arrays else 0
+        array = np.empty(size, dtype=[(name, values.dtype, values.shape[1:]) for name, values in arrays.items()])
+        for name, values in arrays.items():
+            array[name] = values
+        return cls(array, {k: v for k, v in digits.items() if k in arrays}, attachments)
+
+    @classmethod
+    def from_dicts(cls, items, digits=None):
+        """Compatibilidad con las listas de dicts por activo (campos de la primera fila)."""
+        items = list(items)
+        if not items:
+            return cls.empty()
+        names = list(items[0])
+        columns = {}
+        for name in names:
+            values = [item.get(name) for item in items]
+            if all(isinstance(v, (int, float, np.number)) and not isinstance(v, bool) for v in values):
+                columns[name] = np.array(values)
+            elif all(isinstance(v, str) for v in values):
+                columns[name] = np.array(values, dtype=object)
+        attachments = {
+            name: {item["symbol"]: item[name] for item in items if name in item}
+            for name in names if name not in columns and "symbol" in columns
+        }
+        return cls.from_columns(columns, digits, attachments)
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty(0, dtype=[("symbol", "U1")]))
+
+    @classmethod
+    def concat(cls, parts):
+        """Une varios contenedores con los mismos campos (lotes del pipeline)."""
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return cls.empty()
+        if len(parts) == 1:
+            return parts[0]
+        digits, attachments = {}, {}
+        for part in parts:
+            digits.update(part.digits)
+            for name, mapping in part.attachments.items():
+                current = attachments.get(name)
+                if current is None:
+                    attachments[name] = mapping
+                elif current is not mapping:  # Los lotes suelen compartir el mismo mapping
+                    attachments[name] = {**current, **mapping}
+        columns = {name: np.concatenate([p.column(name) for p in parts]) for name in parts[0].fields}
+        return cls.from_columns(columns, digits, attachments)
+
+    def __len__(self):
+        return len(self.array)
+
+    def __contains__(self, name):
+        return name in self.array.dtype.names
+
+    def __getitem__(self, name):
+        return self.column(name)
+
+    @property
+    def fields(self):
+        return self.array.dtype.names
+
+    @property
+    def symbols(self):
+        return self.array["symbol"].tolist()
+
+    @property
+    def nbytes(self):
+        return self.array.nbytes
+
+    def column(self, name):
+        """Columna como array; los float32 vuelven a float64 con su redondeo original."""
+        values = self.array[name]
+        if values.dtype == np.float32 and name in self.digits:
+            return np.round(values.astype(np.float64), self.digits[name])
+        return values
+
+    def frame(self, fields=None):
+        """DataFrame por columnas (sin dicts intermedios) para el análisis vectorizado."""
+        import pandas as pd
+        fields = fields or self.fields
+        return pd.DataFrame({name: self.column(name) for name in fields})
+
+    def take(self, index):
+        """Filas por máscara booleana o por posiciones, en un solo indexado."""
+        return AssetRecords(self.array[np.asarray(index)], self.digits, dict(self.attachments))
+
+    def select(self, symbols):
+        """Filas de los símbolos dados, en el orden actual."""
+        return self.take(np.isin(self.array["symbol"], list(symbols)))
+
+    def with_columns(self, columns, digits=None):
+        """Nuevo contenedor con los campos añadidos (o sustituidos) al final."""
+        merged = {name: self.column(name) for name in self.fields if name not in columns}
+        merged.update(columns)
+        return AssetRecords.from_columns(merged, {**self.digits, **(digits or {})}, dict(self.attachments))
+
+    def attach(self, name, mapping):
+        """
+        Asocia objetos no numéricos por símbolo (p. ej. el análisis de
+        sentiment) sin meterlos en el array; to_dicts() los añade.
+        """
+        self.attachments[name] = mapping
+        return self
+
+    def to_dicts(self):
+        """Un dict por activo con escalares de Python, para el reporte y el JSON."""
+        names = [name for name in self.fields if self.array.dtype[name].ndim == 0]  # Sin campos vectoriales
+        rows = [dict(zip(names, values)) for values in zip(*(self.column(n).tolist() for n in names))]
+        for name, mapping in self.attachments.items():
+            for row in rows:
+                if row.get("symbol") in mapping:
+                    row[name] = mapping[row["symbol"]]
+        return rows
@@ -0,0 +1,67 @@
+import json
+import os
+import time
+
+PRUNE_INTERVAL_SEC = 86400  # Como mucho una limpieza al día desde put()
+
+
+class ResponseCache:
+    """
+    Caché en disco de respuestas JSON de APIs externas.
+    Un fichero por (endpoint, clave); la clave incluye la ventana de fechas
+    para que cada entrada sea válida mientras lo sea su ventana. Las claves
+    de días o meses pasados no se vuelven a leer: prune() las borra según la
+    antigüedad máxima de su namespace (al crear la caché y, como mucho una
+    vez al día, al escribir).
+    """
+
+    def __init__(self, path="data_cache/finnhub", max_age_days=None):
+        self.path = path
+        self.max_age_days = max_age_days or {}  # namespace -> días; sin entrada = no caduca
+        self.pruned_at = 0.0
+        self.prune()
+
+    def _file(self, namespace, key):
+        safe_key = str(key).replace("/", "_").replace("^", "_")
+        return os.path.join(self.path, namespace, f"{safe_key}.json")
+
+    def get(self, namespace, key):
+        """Retorna el payload guardado, o None si no existe o no se puede leer."""
+        filename = self._file(namespace, key)
+        if not os.path.exists(filename):
+            return None
+        try:
+            with open(filename, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry.get("payload")
+
+    def prune(self):
+        """Borra las entradas más antiguas que el máximo de su namespace. Retorna cuántas."""
+        self.pruned_at = time.time()
+        removed = 0
+        for namespace, days in self.max_age_days.items():
+            cutoff = self.pruned_at - days * 86400
+            try:
+                entries = list(os.scandir(os.path.join(self.path, namespace)))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                try:
+                    if entry.is_file() and entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                        removed += 1
+                except OSError:
+                    pass  # Otro hilo o proceso la borró o la está reemplazando
+        return removed
+
+    def put(self, namespace, key, payload):
+        filename = self._file(namespace, key)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        tmp = f"{filename}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"saved_at": time.time(), "payload": payload}, f)
+        os.replace(tmp, filename)
+        if time.time() - self.pruned_at > PRUNE_INTERVAL_SEC:
+            self.prune()
@@ -0,0 +1,184 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started TEXT NOT NULL,
+    date TEXT NOT NULL,
+    report_type TEXT,
+    mode TEXT,
+    status TEXT,
+    duration_sec REAL,
+    http_requests INTEGER,
+    http_retries INTEGER,
+    http_errors INTEGER,
+    report_file TEXT,
+    metrics_file TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_date ON runs (date);
+CREATE TABLE IF NOT EXISTS run_stages (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    stage TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    calls INTEGER NOT NULL,
+    PRIMARY KEY (run_id, stage)
+);
+CREATE INDEX IF NOT EXISTS idx_run_stages_stage ON run_stages (stage, run_id);
+CREATE TABLE IF NOT EXISTS run_counts (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    stage TEXT NOT NULL,
+    symbols INTEGER NOT NULL,
+    PRIMARY KEY (run_id, stage)
+);
+CREATE TABLE IF NOT EXISTS run_assets (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    rank INTEGER NOT NULL,
+    symbol TEXT NOT NULL,
+    score REAL,
+    signal TEXT,
+    close REAL,
+    entry_optimal REAL,
+    stop_loss REAL,
+    target_2 REAL,
+    rr_ratio_2 REAL,
+    PRIMARY KEY (run_id, rank)
+);
+CREATE INDEX IF NOT EXISTS idx_run_assets_symbol ON run_assets (symbol, run_id);
+"""
+
+ASSET_FIELDS = ("score", "signal", "close", "entry_optimal", "stop_loss", "target_2", "rr_ratio_2")
+
+
+class RunHistory:
+    """
+    Histórico de ejecuciones en SQLite: duración y llamadas HTTP de cada run,
+    tiempo por etapa, símbolos supervivientes por paso y activos seleccionados.
+    Índices por fecha, etapa y símbolo para consultar un año de runs sin
+    abrir los JSON de cada día. Con readonly=True solo se consulta.
+    """
+
+    def __init__(self, path="data_cache/run_history.sqlite", readonly=False):
+        self.path = path
+        self.lock = threading.Lock()
+        if readonly:
+            self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")  # Lecturas del scheduler mientras se escribe
+            self.conn.executescript(SCHEMA)
+            self.conn.commit()
+        self.conn.row_factory = sqlite3.Row
+
+    def record(self, snapshot, report=None, report_file=None, metrics_file=None):
+        """Guarda una ejecución a partir del snapshot de métricas. Retorna su id."""
+        info = snapshot.get("info", {})
+        started = snapshot["started"]
+        http = {"http_requests": 0, "http_retries": 0, "http_errors": 0}
+        for entry in snapshot.get("counters", []):
+            if entry["name"] in http:
+                http[entry["name"]] += entry["value"]
+
+        stages = [(e["labels"]["stage"], e["sum"], e["count"]) for e in snapshot.get("histograms", [])
+                  if e["name"] == "stage_seconds" and "stage" in e["labels"]]
+        stages.append(("total", snapshot["duration_sec"], 1))
+        counts = [(e["labels"]["stage"], e["value"]) for e in snapshot.get("gauges", [])
+                  if e["name"] == "symbols" and "stage" in e["labels"]]
+        assets = (report or {}).get("top_assets", [])
+
+        with self.lock, self.conn:
+            run_id = self.conn.execute(
+                "INSERT INTO runs (started, date, report_type, mode, status, duration_sec, http_requests, "
+                "http_retries, http_errors, report_file, metrics_file) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (started, started[:10], info.get("report_type"), info.get("mode"), info.get("status"),
+                 snapshot["duration_sec"], http["http_requests"], http["http_retries"], http["http_errors"],
+                 report_file, metrics_file)
+            ).lastrowid
+            self.conn.executemany(
+                "INSERT INTO run_stages (run_id, stage, seconds, calls) VALUES (?, ?, ?, ?)",
+                [(run_id, stage, seconds, calls) for stage, seconds, calls in stages]
+            )
+            self.conn.executemany(
+                "INSERT INTO run_counts (run_id, stage, symbols) VALUES (?, ?, ?)",
+                [(run_id, stage, symbols) for stage, symbols in counts]
+            )
+            self.conn.executemany(
+                f"INSERT INTO run_assets (run_id, rank, symbol, {', '.join(ASSET_FIELDS)}) "
+                f"VALUES (?, ?, ?, {', '.join('?' * len(ASSET_FIELDS))})",
+                [(run_id, rank, asset.get("symbol"), *(asset.get(f) for f in ASSET_FIELDS))
+                 for rank, asset in enumerate(assets, 1)]
+            )
+        return run_id
+
+    def recent_runs(self, limit=20, report_type=None, symbol=None):
+        """
+        Últimas ejecuciones (más reciente primero) con sus etapas, recuentos y
+        activos. Con `symbol`, solo las que seleccionaron ese símbolo.
+        """
+        where, params = [], []
+        if report_type:
+            where.append("report_type = ?")
+            params.append(report_type)
+        if symbol:
+            where.append("id IN (SELECT run_id FROM run_assets WHERE symbol = ?)")
+            params.append(symbol)
+        sql = "SELECT * FROM runs" + (f" WHERE {' AND '.join(where)}" if where else "")
+        with self.lock:
+            runs = [dict(row) for row in self.conn.execute(f"{sql} ORDER BY id DESC LIMIT ?", (*params, limit))]
+            if not runs:
+                return []
+            ids = [run["id"] for run in runs]
+            marks = ",".join("?" * len(ids))
+            stages = self.conn.execute(f"SELECT * FROM run_stages WHERE run_id IN ({marks})", ids).fetchall()
+            counts = self.conn.execute(f"SELECT * FROM run_counts WHERE run_id IN ({marks})", ids).fetchall()
+            assets = self.conn.execute(
+                f"SELECT * FROM run_assets WHERE run_id IN ({marks}) ORDER BY run_id, rank", ids
+            ).fetchall()
+
+        by_id = {run["id"]: {**run, "stages": {}, "symbols": {}, "top_assets": []} for run in runs}
+        for row in stages:
+            by_id[row["run_id"]]["stages"][row["stage"]] = {"seconds": row["seconds"], "calls": row["calls"]}
+        for row in counts:
+            by_id[row["run_id"]]["symbols"][row["stage"]] = row["symbols"]
+        for row in assets:
+            by_id[row["run_id"]]["top_assets"].append(
+                {"symbol": row["symbol"], **{f: row[f] for f in ASSET_FIELDS}}
+            )
+        return [by_id[run_id] for run_id in ids]
+
+    def stage_trends(self, days=30, stage=None, report_type=None):
+        """
+        Latencia por etapa y día en los últimos `days` días, con media, mínimo
+        y máximo del periodo. Retorna dict etapa -> {mean, min, max, series}.
+        """
+        since = (datetime.utcnow() - timedelta(days=days)).strftime("%Y-%m-%d")
+        sql = ("SELECT s.stage, r.date, AVG(s.seconds) AS seconds, COUNT(*) AS runs "
+               "FROM runs r JOIN run_stages s ON s.run_id = r.id WHERE r.date >= ?")
+        params = [since]
+        if stage:
+            sql += " AND s.stage = ?"
+            params.append(stage)
+        if report_type:
+            sql += " AND r.report_type = ?"
+            params.append(report_type)
+        sql += " GROUP BY s.stage, r.date ORDER BY s.stage, r.date"
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+
+        trends = {}
+        for row in rows:
+            trend = trends.setdefault(row["stage"], {"series": []})
+            trend["series"].append({"date": row["date"], "seconds": round(row["seconds"], 3), "runs": row["runs"]})
+        for trend in trends.values():
+            values = [point["seconds"] for point in trend["series"]]
+            trend.update(mean=round(sum(values) / len(values), 3), min=min(values), max=max(values))
+        return trends
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,162 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from utils.metrics import metrics
+
+FIELDS = ("Open", "High", "Low", "Close", "Volume")
+PERIOD_UNITS = {"d": "days", "wk": "weeks", "mo": "months", "y": "years"}
+
+
+def period_start(period):
+    """
+    Fecha de inicio de un period de yfinance ("90d", "6mo", "10y", "ytd";
+    None para "max"). Cualquier otro formato es un ValueError.
+    """
+    today = pd.Timestamp.today().normalize()
+    if period == "max":
+        return None
+    if period == "ytd":
+        return today.replace(month=1, day=1)
+    for unit, name in PERIOD_UNITS.items():
+        count = period[:-len(unit)]
+        if period.endswith(unit) and count.isdigit():
+            return today - pd.DateOffset(**{name: int(count)})
+    raise ValueError(f"period no soportado: {period!r} (usar Nd, Nwk, Nmo, Ny, ytd o max)")
+
+
+class YahooClient:
+    """
+    Cliente HTTP mínimo de los endpoints de Yahoo que usa el pipeline (chart y
+    quoteSummary) para una base URL configurable, p. ej. el servidor simulado
+    de bench/mock_server.py. yfinance no admite cambiar de host, así que con
+    `yahoo.base_url` los agentes usan este cliente en su lugar.
+    """
+
+    def __init__(self, base_url, concurrency=8, max_retries=3, retry_backoff_sec=1.0, timeout=10):
+        self.base_url = base_url.rstrip("/")
+        self.concurrency = max(1, int(concurrency))
+        self.max_retries = max_retries
+        self.retry_backoff_sec = retry_backoff_sec
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.concurrency, pool_maxsize=self.concurrency * 2)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.lock = threading.Lock()
+        self.request_count = 0
+        self.retry_count = 0
+
+    def get(self, path, params=None, endpoint="", max_retries=None):
+        """
+        GET con reintentos de 429/5xx (respeta Retry-After). Retorna el JSON,
+        o lanza requests.HTTPError si se agotan los intentos.
+        """
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        max_retries = self.max_retries if max_retries is None else max_retries
+
+        for attempt in range(max_retries + 1):
+            with self.lock:
+                self.request_count += 1
+            response = self.session.get(url, params=params, timeout=self.timeout)
+            if response.status_code == 200:
+                return response.json()
+
+            retryable = response.status_code == 429 or response.status_code >= 500
+            if not retryable or attempt == max_retries:
+                raise requests.HTTPError(f"HTTP {response.status_code} en {path}", response=response)
+
+            with self.lock:
+                self.retry_count += 1
+            metrics.inc("http_retries", vendor="yahoo", endpoint=endpoint)
+            wait = self.retry_backoff_sec * (2 ** attempt)
+            if response.headers.get("Retry-After", "").isdigit():
+                wait = max(wait, int(response.headers["Retry-After"]))
+            time.sleep(wait)
+
+    def info(self, symbol):
+        """
+        Campos de Ticker.info que usa el filtro de calidad. Sin reintentos
+        propios: QualityFilterAgent ya reintenta con backoff.
+        """
+        data = self.get(f"v10/finance/quoteSummary/{symbol}", {"modules": "price,summaryDetail,assetProfile"},
+                        endpoint="info", max_retries=0)
+        result = (data.get("quoteSummary", {}).get("result") or [{}])[0]
+        price, detail = result.get("price", {}), result.get("summaryDetail", {})
+        profile = result.get("assetProfile") or {}
+        raw = lambda module, key: (module.get(key) or {}).get("raw")
+        return {
+            "marketCap": raw(price, "marketCap"),
+            "averageVolume": raw(detail, "averageVolume"),
+            "currentPrice": raw(price, "regularMarketPrice"),
+            "bid": raw(detail, "bid"),
+            "ask": raw(detail, "ask"),
+            "beta": raw(detail, "beta"),
+            "shortName": price.get("shortName", symbol),
+            "sector": profile.get("sector"),
+        }
+
+    def chart(self, symbol, period=None, start=None):
+        """Histórico diario de un símbolo como DataFrame OHLCV (None si no hay datos)."""
+        if period:
+            start = period_start(period)
+        params = {"interval": "1d", "period1": int(pd.Timestamp(start).timestamp()) if start is not None else 0,
+                  "period2": int(time.time())}
+        metrics.inc("http_requests", vendor="yahoo", endpoint="chart")
+        data = self.get(f"v8/finance/chart/{symbol}", params, endpoint="chart")
+        result = (data.get("chart", {}).get("result") or [None])[0]
+        if not result or not result.get("timestamp"):
+            return None
+        quote = result["indicators"]["quote"][0]
+        index = pd.to_datetime(result["timestamp"], unit="s").normalize()
+        return pd.DataFrame({field: quote.get(field.lower()) for field in FIELDS}, index=index, dtype=float)
+
+    def download(self, symbols, period=None, start=None, **kwargs):
+        """
+        Equivalente a yf.download(group_by="ticker"): un chart por símbolo en
+        paralelo, combinados con columnas (símbolo, campo). Los símbolos que
+        fallan se omiten, como hace yfinance.
+        """
+        def fetch(symbol):
+            try:
+                return self.chart(symbol, period, start)
+            except requests.RequestException:
+                return None
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            frames = {s: df for s, df in zip(symbols, pool.map(fetch, symbols)) if df is not None}
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=1)
+
+    def close(self):
+        self.session.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def yahoo_client(config):
+    """
+    Cliente compartido para `yahoo.base_url` de config.json, o None si no está
+    configurada (los agentes usan entonces yfinance contra Yahoo).
+    """
+    yahoo_config = config.get("yahoo", {})
+    base_url = yahoo_config.get("base_url")
+    if not base_url:
+        return None
+    with _clients_lock:
+        if base_url not in _clients:
+            _clients[base_url] = YahooClient(
+                base_url,
+                concurrency=yahoo_config.get("concurrency", 8),
+                max_retries=yahoo_config.get("max_retries", 3),
+                retry_backoff_sec=yahoo_config.get("retry_backoff_sec", 1.0),
+                timeout=yahoo_config.get("timeout", 10)
+            )
+        return _clients[base_url]